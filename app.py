@@ -1,73 +1,1211 @@
-from flask import Flask, render_template, request, jsonify, redirect
+from flask import Flask, Response, g, render_template, request, jsonify, redirect, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
-import requests
+import asyncio
 import json
+import random
+import re
 import time
+import hashlib
+import ipaddress
+import logging
+import io
+import shutil
+import socket
+import sqlite3
+import tempfile
+import threading
+import uuid
+import zipfile
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
 from datetime import datetime
 from pathlib import Path
-from groq import Groq
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 
+try:
+    import fcntl
+except ImportError:  # Windows: session locks are per-process only
+    fcntl = None
+
 # Load environment variables first
 load_dotenv()
 
+# Log lines go through a leveled logger instead of print. Below LOG_LEVEL a
+# call returns after one level check, and the noisiest lines (raw model
+# output, per-chunk progress) are DEBUG with lazy %-formatting.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(format="%(message)s", level=getattr(logging, LOG_LEVEL, logging.INFO))
+log = logging.getLogger("app")
+
 # Get API key from environment - DO NOT hardcode API keys in source code
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
-    print("⚠️ GROQ_API_KEY not found in environment variables")
-    print("⚠️ Please set GROQ_API_KEY in your .env file or environment")
-    # Exit gracefully or handle appropriately
-    raise ValueError("GROQ_API_KEY environment variable is required")
+    log.warning("⚠️ GROQ_API_KEY not found in environment variables")
+    log.warning("⚠️ Please set GROQ_API_KEY in your .env file or environment")
 else:
-    print(f"GROQ_API_KEY configured: {'Yes' if GROQ_API_KEY else 'No'}")
+    log.info("GROQ_API_KEY configured: %s", 'Yes' if GROQ_API_KEY else 'No')
 
-# Clear proxy environment variables that might interfere with Groq client
-os.environ.pop('HTTP_PROXY', None)
-os.environ.pop('HTTPS_PROXY', None)
-os.environ.pop('http_proxy', None)
-os.environ.pop('https_proxy', None)
+# ================== METRICS ==================
+# Hot-path stages are timed with span(stage), usable as a context manager or
+# a decorator, into the app_stage_seconds histogram. Counters and histograms
+# live in process memory and /metrics renders them in the Prometheus text
+# format; under gunicorn each worker reports its own series, so scrape the
+# workers individually or sum them in the query.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRICS = []
 
-# Initialize Groq client once at startup
-try:
-    print("🔧 Attempting to initialize Groq client...")
-    print(f"🔑 API Key length: {len(GROQ_API_KEY) if GROQ_API_KEY else 0}")
-    groq_client = Groq(api_key=GROQ_API_KEY)
-    print("✅ Groq client initialized successfully at startup")
-    
-    # Test the client with a simple API call
+def format_labels(names, values, extra=""):
+    pairs = ['%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.values = {}
+        self.lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, *labels, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value, *labels):
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    le = format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = format_labels(self.labelnames, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {series[-1]}")
+                lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+STAGE_SECONDS = Histogram("app_stage_seconds", "Time spent in each pipeline stage", STAGE_BUCKETS, ("stage",))
+HTTP_REQUEST_SECONDS = Histogram("app_http_request_seconds", "Request handling time by endpoint and status",
+                                 STAGE_BUCKETS, ("endpoint", "status"))
+FALLBACKS = Counter("app_fallbacks_total", "Times a degraded path was taken instead of the primary one", ("reason",))
+GROQ_ERRORS = Counter("app_groq_errors_total", "Failed Groq attempts by endpoint and status", ("endpoint", "status"))
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block (or decorated function) into app_stage_seconds"""
+    start = time.perf_counter()
     try:
-        models = groq_client.models.list()
-        print(f"✅ Groq API connection verified - {len(models.data)} models available")
-    except Exception as test_error:
-        print(f"⚠️ Groq API test failed: {test_error}")
-        
-except Exception as e:
-    print(f"❌ Failed to initialize Groq client: {e}")
-    print(f"❌ Error type: {type(e).__name__}")
-    groq_client = None
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+# ================== GROQ TRANSPORT ==================
+# Both Groq clients get an explicitly built httpx client instead of the SDK
+# defaults: one keep-alive pool per process shared by Whisper and chat calls
+# (same host, so a warm connection and its TLS session serve either), HTTP/2
+# when the optional h2 package is installed, and connect/read/write/pool
+# timeouts per endpoint. Proxy variables are ignored for Groq only, rather
+# than deleted from the environment. A trace hook on every request counts new
+# TCP connections and TLS handshakes, so groq_transport in /api and /metrics
+# show how often a call reused a warm connection.
+GROQ_HTTP2 = os.getenv("GROQ_HTTP2", "auto").lower()
+GROQ_POOL_CONNECTIONS = int(os.getenv("GROQ_POOL_CONNECTIONS", "0"))  # 0 sizes the pool from the worker pools
+GROQ_KEEPALIVE_SECONDS = float(os.getenv("GROQ_KEEPALIVE_SECONDS", "60"))
+GROQ_CONNECT_TIMEOUT_SECONDS = float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", "5"))
+GROQ_POOL_TIMEOUT_SECONDS = float(os.getenv("GROQ_POOL_TIMEOUT_SECONDS", "10"))
+GROQ_AUDIO_WRITE_TIMEOUT_SECONDS = float(os.getenv("GROQ_AUDIO_WRITE_TIMEOUT_SECONDS", "60"))
+GROQ_AUDIO_READ_TIMEOUT_SECONDS = float(os.getenv("GROQ_AUDIO_READ_TIMEOUT_SECONDS", "120"))
+GROQ_CHAT_READ_TIMEOUT_SECONDS = float(os.getenv("GROQ_CHAT_READ_TIMEOUT_SECONDS", "30"))
+GROQ_ASYNC_MAX_CONNECTIONS = int(os.getenv("GROQ_ASYNC_MAX_CONNECTIONS", "1000"))
+# Idle connections the async pool keeps open; a burst of up to
+# GROQ_ASYNC_MAX_CONNECTIONS is served, but only this many stay warm after it
+GROQ_ASYNC_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_ASYNC_KEEPALIVE_CONNECTIONS", "100"))
+
+GROQ_TRANSPORT_STATS = {"requests": 0, "connections": 0, "tlsHandshakes": 0}
+GROQ_TRANSPORT_LOCK = threading.Lock()
+GROQ_HANDSHAKES = {
+    "connection.connect_tcp": ("connections", "groq_connect"),
+    "connection.start_tls": ("tlsHandshakes", "groq_tls")
+}
+groq_transport_info = {"http2": None, "poolConnections": {}}
+
+def groq_timeout(kind):
+    """Timeouts for one endpoint kind: audio uploads get a long write, chat a shorter read"""
+    import httpx
+    if kind == "audio":
+        return httpx.Timeout(connect=GROQ_CONNECT_TIMEOUT_SECONDS, read=GROQ_AUDIO_READ_TIMEOUT_SECONDS,
+                             write=GROQ_AUDIO_WRITE_TIMEOUT_SECONDS, pool=GROQ_POOL_TIMEOUT_SECONDS)
+    return httpx.Timeout(connect=GROQ_CONNECT_TIMEOUT_SECONDS, read=GROQ_CHAT_READ_TIMEOUT_SECONDS,
+                         write=GROQ_CONNECT_TIMEOUT_SECONDS, pool=GROQ_POOL_TIMEOUT_SECONDS)
+
+def groq_pool_size():
+    """Every thread that can call Groq at once: the LLM, chunk, batch and job pools"""
+    return GROQ_POOL_CONNECTIONS or LLM_WORKERS + CHUNK_WORKERS + BATCH_WORKERS + JOB_WORKERS
+
+def groq_http2_available():
+    if GROQ_HTTP2 == "false":
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        if GROQ_HTTP2 == "true":
+            log.warning("⚠️ GROQ_HTTP2=true but the h2 package is not installed, using HTTP/1.1 keep-alive")
+        return False
+
+def groq_tracer():
+    """httpcore trace callback timing and counting the handshakes one request needed"""
+    started = {}
+
+    def trace(event, info):
+        name, _, phase = event.rpartition(".")
+        if name not in GROQ_HANDSHAKES:
+            return
+        if phase == "started":
+            started[name] = time.perf_counter()
+        elif phase == "complete":
+            key, stage = GROQ_HANDSHAKES[name]
+            STAGE_SECONDS.observe(time.perf_counter() - started.pop(name, time.perf_counter()), stage)
+            with GROQ_TRANSPORT_LOCK:
+                GROQ_TRANSPORT_STATS[key] += 1
+    return trace
+
+def count_groq_request(request):
+    with GROQ_TRANSPORT_LOCK:
+        GROQ_TRANSPORT_STATS["requests"] += 1
+    request.extensions["trace"] = groq_tracer()
+
+async def count_groq_request_async(request):
+    trace = groq_tracer()
+
+    async def atrace(event, info):
+        trace(event, info)
+
+    with GROQ_TRANSPORT_LOCK:
+        GROQ_TRANSPORT_STATS["requests"] += 1
+    request.extensions["trace"] = atrace
+
+def build_groq_http_client(asynchronous=False):
+    """The pooled httpx client behind a Groq SDK client"""
+    import httpx
+    from groq import DefaultAsyncHttpxClient, DefaultHttpxClient
+    size = GROQ_ASYNC_MAX_CONNECTIONS if asynchronous else groq_pool_size()
+    keepalive = min(size, GROQ_ASYNC_KEEPALIVE_CONNECTIONS) if asynchronous else size
+    http2 = groq_http2_available()
+    groq_transport_info["http2"] = http2
+    groq_transport_info["poolConnections"]["async" if asynchronous else "sync"] = size
+    options = {
+        "http2": http2,
+        "limits": httpx.Limits(max_connections=size, max_keepalive_connections=keepalive,
+                               keepalive_expiry=GROQ_KEEPALIVE_SECONDS),
+        "timeout": groq_timeout("chat"),
+        "trust_env": False
+    }
+    if asynchronous:
+        return DefaultAsyncHttpxClient(event_hooks={"request": [count_groq_request_async]}, **options)
+    return DefaultHttpxClient(event_hooks={"request": [count_groq_request]}, **options)
+
+def groq_transport():
+    with GROQ_TRANSPORT_LOCK:
+        stats = dict(GROQ_TRANSPORT_STATS)
+    calls = stats["requests"]
+    return {
+        **groq_transport_info,
+        **stats,
+        "reuseRate": round(1 - stats["connections"] / calls, 3) if calls else 0.0
+    }
+
+# ================== GROQ CLIENT ==================
+# Nothing here touches the network at import time: the client is built on
+# first use, and a background probe (models.list) started at that point fills
+# in the readiness shown as groq_status in /api. Worker boots and test imports
+# therefore never wait on Groq, even with no network at all.
+groq_client = None
+GROQ_CLIENT_LOCK = threading.Lock()
+GROQ_PROBE = {"state": "not started", "models": None, "error": None, "checkedAt": None}
+
+def get_groq_client():
+    """Return the shared Groq client, creating it on first use; None if it cannot be built"""
+    global groq_client
+    if groq_client is not None:
+        return groq_client
+    if not GROQ_API_KEY:
+        return None
+    with GROQ_CLIENT_LOCK:
+        if groq_client is None:
+            try:
+                from groq import Groq
+                log.info("🔧 Initializing Groq client...")
+                # Retries are done by groq_call, which also sees the rate limits
+                groq_client = Groq(api_key=GROQ_API_KEY, max_retries=0, http_client=build_groq_http_client())
+                log.info("✅ Groq client initialized")
+            except Exception as e:
+                log.error("❌ Failed to initialize Groq client: %s", e)
+                log.error("❌ Error type: %s", type(e).__name__)
+                return None
+    start_groq_probe()
+    return groq_client
+
+# The async serving mode (asgi.py) talks to Groq through AsyncGroq, so a
+# request waiting on Whisper or the LLM holds a socket, not a thread. It is
+# built inside the worker's event loop on first use.
+async_groq_client = None
+
+def get_async_groq_client():
+    """Return the shared AsyncGroq client, creating it on first use; None if it cannot be built"""
+    global async_groq_client
+    if async_groq_client is None and GROQ_API_KEY:
+        try:
+            from groq import AsyncGroq
+            async_groq_client = AsyncGroq(
+                api_key=GROQ_API_KEY, max_retries=0, http_client=build_groq_http_client(asynchronous=True)
+            )
+        except Exception as e:
+            log.error("❌ Failed to initialize async Groq client: %s", e)
+    return async_groq_client
+
+def start_groq_probe():
+    """Check the API in the background once; the outcome is reported by groq_status()"""
+    with GROQ_CLIENT_LOCK:
+        if GROQ_PROBE["state"] != "not started":
+            return
+        GROQ_PROBE["state"] = "probing"
+    threading.Thread(target=probe_groq, name="groq-probe", daemon=True).start()
+
+def probe_groq():
+    client = get_groq_client()
+    try:
+        models = client.models.list()
+        GROQ_PROBE.update(state="ready", models=len(models.data), error=None)
+        log.info("✅ Groq API connection verified - %d models available", len(models.data))
+    except Exception as e:
+        GROQ_PROBE.update(state="unreachable", error=str(e))
+        log.warning("⚠️ Groq API test failed: %s", e)
+    GROQ_PROBE["checkedAt"] = datetime.now().isoformat()
+
+def groq_status():
+    if not GROQ_API_KEY and groq_client is None:
+        return "missing api key"
+    if groq_client is None:
+        return "not initialized"
+    if GROQ_PROBE["state"] in ("ready", "unreachable"):
+        return GROQ_PROBE["state"]
+    return "initialized"
+
+# ================== GROQ RATE LIMITING ==================
+# Every Groq request goes through groq_call, which gives each endpoint kind
+# ("audio" for Whisper, "chat" for the LLM) three things:
+#   - a token bucket sized to our quota (GROQ_AUDIO_RPM / GROQ_CHAT_RPM);
+#     callers wait up to GROQ_QUEUE_TIMEOUT_SECONDS for a token
+#   - retries of 429s, 5xx and connection errors with jittered exponential
+#     backoff, honouring Retry-After (which also pauses the bucket for everyone)
+#   - a circuit breaker that opens after GROQ_BREAKER_FAILURES failed calls in
+#     a row and refuses calls for GROQ_BREAKER_COOLDOWN_SECONDS before letting
+#     one trial through
+# Refused calls raise GroqUnavailable straight away, so product extraction
+# drops to the regex fallback and transcription reports a busy error instead
+# of piling more requests onto an unhealthy API.
+GROQ_AUDIO_RPM = float(os.getenv("GROQ_AUDIO_RPM", "20"))
+GROQ_CHAT_RPM = float(os.getenv("GROQ_CHAT_RPM", "30"))
+GROQ_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GROQ_QUEUE_TIMEOUT_SECONDS", "15"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+GROQ_BACKOFF_BASE_SECONDS = float(os.getenv("GROQ_BACKOFF_BASE_SECONDS", "0.5"))
+GROQ_BACKOFF_MAX_SECONDS = float(os.getenv("GROQ_BACKOFF_MAX_SECONDS", "8"))
+GROQ_MAX_RETRY_AFTER_SECONDS = float(os.getenv("GROQ_MAX_RETRY_AFTER_SECONDS", "30"))
+GROQ_BREAKER_FAILURES = int(os.getenv("GROQ_BREAKER_FAILURES", "5"))
+GROQ_BREAKER_COOLDOWN_SECONDS = float(os.getenv("GROQ_BREAKER_COOLDOWN_SECONDS", "30"))
+
+class GroqUnavailable(Exception):
+    """Raised when a Groq call is refused locally: circuit open or no rate-limit token in time"""
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute, holding at most capacity"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _wait(self):
+        """Seconds until a token is free (0 if one is now); call with the lock held"""
+        now = time.monotonic()
+        self._refill(now)
+        if now >= self.paused_until and self.tokens >= 1:
+            return 0
+        return max(self.paused_until - now, (1 - self.tokens) / self.rate if self.rate else float("inf"))
+
+    def _take(self):
+        """Take a token if one is free and return 0, else the seconds until the next one"""
+        with self.lock:
+            wait = self._wait()
+            if not wait:
+                self.tokens -= 1
+            return wait
+
+    def acquire(self, timeout):
+        """Take one token, waiting up to timeout seconds; returns False if none came"""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, timeout):
+        """acquire() for the event loop: waits without blocking other requests"""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def eta(self):
+        """Seconds until a token would be free, without taking one"""
+        with self.lock:
+            return self._wait()
+
+    def pause(self, seconds):
+        """Hold every caller back for seconds, e.g. after the server sent Retry-After"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def available(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            return round(self.tokens, 2)
+
+class CircuitBreaker:
+    """Opens after a run of failures, then lets a single trial call through after the cooldown"""
+
+    def __init__(self, failure_threshold, cooldown_seconds):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.trial_running or time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < self.cooldown_seconds:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def abandon_trial(self):
+        """Give the trial slot back when the trial call never reached Groq"""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.trial_running:
+                    log.warning("⚠️ Groq circuit opened after %d failures", self.failures)
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+class GroqEndpoint:
+    """Rate limit, retry policy, circuit breaker and counters for one kind of Groq call"""
+
+    def __init__(self, kind, rate_per_minute):
+        self.kind = kind
+        self.bucket = TokenBucket(rate_per_minute)
+        self.breaker = CircuitBreaker(GROQ_BREAKER_FAILURES, GROQ_BREAKER_COOLDOWN_SECONDS)
+        self.counts = {
+            "calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "rateLimited": 0, "rejected": 0,
+            "promptTokens": 0, "completionTokens": 0
+        }
+        self.wait_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counts[key] += amount
+
+    def call(self, func, streamed=False):
+        """Run func(client) under this endpoint's limits; raises GroqUnavailable when refused.
+
+        A streamed result is only settled once it has been read, see iterate().
+        """
+        self.admit()
+        for attempt in range(GROQ_MAX_RETRIES + 1):
+            waited = time.monotonic()
+            self.took_token(self.bucket.acquire(GROQ_QUEUE_TIMEOUT_SECONDS), waited)
+            try:
+                result = func(get_groq_client())
+            except Exception as e:
+                time.sleep(self.retry_delay(e, attempt))
+                continue
+            return result if streamed else self.succeeded(result)
+
+    def iterate(self, stream):
+        """Yield the chunks of a streamed call, booking it as succeeded or failed once it ends.
+
+        Errors while reading (a 5xx or error event mid-stream, a dropped
+        connection, a read timeout) count against the breaker like a failed
+        call; they cannot be retried, since chunks were already handed on.
+        """
+        try:
+            yield from stream
+        except GeneratorExit:
+            # The reader stopped early; that says nothing about Groq's health
+            self.breaker.abandon_trial()
+            raise
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            GROQ_ERRORS.inc(self.kind, status or type(e).__name__)
+            if status is not None and not is_retryable_groq_error(e):
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            self.count("failed")
+            raise
+        self.succeeded(None)
+
+    async def call_async(self, func):
+        """call() for the async client: awaits func(async_client) and never blocks the event loop"""
+        self.admit()
+        for attempt in range(GROQ_MAX_RETRIES + 1):
+            waited = time.monotonic()
+            self.took_token(await self.bucket.acquire_async(GROQ_QUEUE_TIMEOUT_SECONDS), waited)
+            try:
+                result = await func(get_async_groq_client())
+            except Exception as e:
+                await asyncio.sleep(self.retry_delay(e, attempt))
+                continue
+            return self.succeeded(result)
+
+    def admit(self):
+        self.count("calls")
+        if not self.breaker.allow():
+            self.count("rejected")
+            GROQ_ERRORS.inc(self.kind, "circuit_open")
+            raise GroqUnavailable(f"Groq {self.kind} circuit is open")
+
+    def took_token(self, acquired, waited):
+        if not acquired:
+            self.count("rejected")
+            GROQ_ERRORS.inc(self.kind, "rate_budget")
+            self.breaker.abandon_trial()
+            raise GroqUnavailable(f"Groq {self.kind} rate limit budget exhausted")
+        with self.lock:
+            self.wait_seconds += time.monotonic() - waited
+
+    def retry_delay(self, error, attempt):
+        """Book a failed attempt and return the seconds to wait before retrying; re-raises when it should not be retried"""
+        status = getattr(error, "status_code", None)
+        GROQ_ERRORS.inc(self.kind, status or type(error).__name__)
+        if status == 429:
+            self.count("rateLimited")
+        if not is_retryable_groq_error(error):
+            # The request itself was bad (400, 401, ...): Groq answered, so it is healthy
+            self.breaker.record_success()
+            self.count("failed")
+            raise error
+        retry_after = groq_retry_after(error)
+        if attempt == GROQ_MAX_RETRIES or (retry_after or 0) > GROQ_MAX_RETRY_AFTER_SECONDS:
+            self.breaker.record_failure()
+            self.count("failed")
+            raise error
+        if retry_after:
+            self.bucket.pause(retry_after)
+            delay = retry_after
+        else:
+            delay = random.uniform(0, min(GROQ_BACKOFF_MAX_SECONDS, GROQ_BACKOFF_BASE_SECONDS * 2 ** attempt))
+        self.count("retries")
+        log.info("🔁 Groq %s call failed (%s), retrying in %.2fs", self.kind, status or type(error).__name__, delay)
+        return delay
+
+    def succeeded(self, result):
+        self.breaker.record_success()
+        self.count("succeeded")
+        usage = getattr(result, "usage", None)
+        if usage is not None:
+            self.count("promptTokens", getattr(usage, "prompt_tokens", 0) or 0)
+            self.count("completionTokens", getattr(usage, "completion_tokens", 0) or 0)
+        return result
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+            wait_seconds = self.wait_seconds
+        return {
+            **counts,
+            "circuit": self.breaker.state,
+            "consecutiveFailures": self.breaker.failures,
+            "tokensAvailable": self.bucket.available(),
+            "ratePerMinute": self.bucket.rate * 60,
+            "queueWaitSeconds": round(wait_seconds, 3)
+        }
+
+def is_retryable_groq_error(e):
+    status = getattr(e, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    # APIConnectionError and its APITimeoutError subclass carry no status
+    return any(cls.__name__ == "APIConnectionError" for cls in type(e).__mro__)
+
+def groq_retry_after(e):
+    """Seconds the server asked us to wait, from Retry-After(-ms) headers; None if absent"""
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+GROQ_ENDPOINTS = {
+    "audio": GroqEndpoint("audio", GROQ_AUDIO_RPM),
+    "chat": GroqEndpoint("chat", GROQ_CHAT_RPM)
+}
+
+def groq_call(kind, func):
+    return GROQ_ENDPOINTS[kind].call(func)
+
+def groq_stream(kind, func):
+    """Iterate the chunks of a streamed Groq call, settled with the breaker when the stream ends"""
+    endpoint = GROQ_ENDPOINTS[kind]
+    return endpoint.iterate(endpoint.call(func, streamed=True))
+
+async def groq_call_async(kind, func):
+    return await GROQ_ENDPOINTS[kind].call_async(func)
+
+def groq_limits():
+    return {kind: endpoint.stats() for kind, endpoint in GROQ_ENDPOINTS.items()}
 
 app = Flask(__name__)
 CORS(app)
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request(response):
+    # Streamed responses are timed to their headers, not to the last chunk
+    started = g.pop("request_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.endpoint or "unmatched", response.status_code)
+    return response
+
 UPLOAD_FOLDER = "uploads"
 DATA_FOLDER = "data"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
-# ================== SESSION TRACKING ==================
-CURRENT_SESSION_FILE = None
-CURRENT_SESSION_FILENAME = None
+# ================== SESSION INDEX ==================
+# Sessions stay as one JSON file each in DATA_FOLDER; a SQLite sidecar records
+# a summary row per file so listing sessions and finding the latest one are
+# index lookups instead of directory scans. Every write goes through
+# write_session, which keeps the row current. The index is created on first
+# use and filled from the JSON files if it starts out empty; run
+# `flask --app app rebuild-session-index` to rebuild it from scratch.
+SESSION_INDEX_PATH = os.getenv("SESSION_INDEX_PATH", os.path.join(DATA_FOLDER, ".sessions.sqlite3"))
+session_index_local = threading.local()
+
+def session_index():
+    """Per-thread connection to the session index, creating the schema on first use"""
+    conn = getattr(session_index_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(SESSION_INDEX_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        with conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS sessions (
+                filename TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                person_name TEXT NOT NULL DEFAULT '',
+                name TEXT NOT NULL DEFAULT '',
+                city TEXT NOT NULL DEFAULT '',
+                category TEXT NOT NULL DEFAULT '',
+                product_count INTEGER NOT NULL DEFAULT 0
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_city ON sessions (city COLLATE NOCASE)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_category ON sessions (category COLLATE NOCASE)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_created_at ON sessions (created_at)")
+        session_index_local.conn = conn
+        if conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone() is None:
+            import_sessions(conn)
+    return conn
+
+def session_summary(data):
+    products = data.get("products")
+    return {
+        "person_name": str(data.get("personName") or ""),
+        "name": str(data.get("name") or ""),
+        "city": str(data.get("city") or ""),
+        "category": str(data.get("category") or ""),
+        "product_count": len(products) if isinstance(products, list) else 0
+    }
+
+def index_session(filename, data, conn=None, created_at=None, updated_at=None):
+    conn = conn or session_index()
+    now = datetime.now().isoformat()
+    row = {"filename": filename, "created_at": created_at or now, "updated_at": updated_at or now, **session_summary(data)}
+    with conn:
+        conn.execute("""INSERT INTO sessions (filename, created_at, updated_at, person_name, name, city, category, product_count)
+            VALUES (:filename, :created_at, :updated_at, :person_name, :name, :city, :category, :product_count)
+            ON CONFLICT(filename) DO UPDATE SET
+                updated_at = excluded.updated_at,
+                person_name = excluded.person_name,
+                name = excluded.name,
+                city = excluded.city,
+                category = excluded.category,
+                product_count = excluded.product_count""", row)
+
+def unindex_session(filename):
+    with session_index() as conn:
+        conn.execute("DELETE FROM sessions WHERE filename = ?", (filename,))
+
+def import_sessions(conn):
+    """Index every session JSON file in DATA_FOLDER; returns how many were indexed"""
+    count = 0
+    for entry in os.scandir(DATA_FOLDER):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path) as f:
+                data = json.load(f)
+        except Exception as e:
+            log.error("Error reading file %s: %s", entry.name, e)
+            continue
+        stat = entry.stat()
+        index_session(
+            entry.name, data, conn=conn,
+            created_at=datetime.fromtimestamp(getattr(stat, "st_birthtime", stat.st_mtime)).isoformat(),
+            updated_at=datetime.fromtimestamp(stat.st_mtime).isoformat()
+        )
+        count += 1
+    if count:
+        log.info("🗂️ Indexed %d existing session files", count)
+    return count
+
+def rebuild_session_index():
+    conn = session_index()
+    with conn:
+        conn.execute("DELETE FROM sessions")
+    return import_sessions(conn)
+
+def session_filenames():
+    """Indexed session filenames, oldest first (filenames embed their timestamp)"""
+    return [row["filename"] for row in session_index().execute("SELECT filename FROM sessions ORDER BY filename")]
+
+def query_sessions(city=None, category=None, date_from=None, date_to=None, after=None, limit=None):
+    """Lazily iterate index rows matching the filters, in filename order after the cursor"""
+    clauses, params = [], []
+    if city:
+        clauses.append("city = ? COLLATE NOCASE")
+        params.append(city)
+    if category:
+        clauses.append("category = ? COLLATE NOCASE")
+        params.append(category)
+    if date_from:
+        clauses.append("created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        clauses.append("created_at < date(?, '+1 day')")
+        params.append(date_to)
+    if after:
+        clauses.append("filename > ?")
+        params.append(after)
+    sql = "SELECT * FROM sessions"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY filename"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return session_index().execute(sql, params)
+
+def latest_session_filename():
+    row = session_index().execute("SELECT filename FROM sessions ORDER BY filename DESC LIMIT 1").fetchone()
+    return row["filename"] if row else None
+
+@span("session_write")
+def write_session(filename, data, exclusive=False):
+    """Atomically persist a session's JSON file and refresh its index row.
+
+    The JSON is written to a temp file and renamed into place, so readers never
+    see a half-written session. exclusive raises FileExistsError instead of
+    replacing an existing session.
+    """
+    path = os.path.join(DATA_FOLDER, filename)
+    fd, temp_path = tempfile.mkstemp(dir=DATA_FOLDER, prefix=".session-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        if exclusive:
+            os.link(temp_path, path)
+        else:
+            os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    index_session(filename, data)
+
+# ================== SESSION STORE ==================
+# Clients address sessions by id: the session filename returned from the
+# business upload is passed back as session_id on product uploads. Updates
+# are read-modify-write under a per-session lock, a thread lock plus an
+# flock on a lock file, so concurrent uploads from any thread or gunicorn
+# worker never lose each other's products. Sessions hash onto a fixed set
+# of lock stripes, which keeps the number of lock files bounded.
+SESSION_LOCK_STRIPES = int(os.getenv("SESSION_LOCK_STRIPES", "64"))
+SESSION_LOCK_FOLDER = os.path.join(DATA_FOLDER, ".locks")
+SESSION_FILENAME = re.compile(r'^session_[\w-]+\.json$')
+os.makedirs(SESSION_LOCK_FOLDER, exist_ok=True)
+
+session_thread_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+
+class SessionNotFound(Exception):
+    pass
+
+def valid_session_id(session_id):
+    return bool(session_id) and bool(SESSION_FILENAME.match(session_id))
+
+@contextmanager
+def session_lock(filename):
+    """Exclusive access to one session across threads and processes"""
+    stripe = int(hashlib.sha1(filename.encode()).hexdigest(), 16) % SESSION_LOCK_STRIPES
+    with session_thread_locks[stripe]:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(SESSION_LOCK_FOLDER, f"{stripe}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def blank_session():
+    return {
+        "personName": "",
+        "name": "",
+        "address": "",
+        "city": "",
+        "state": "",
+        "pincode": "",
+        "gstNumber": "",
+        "category": "",
+        "subcategory": "",
+        "businessType": "",
+        "email": "",
+        "phone": "",
+        "website": "",
+        "establishedYear": "",
+        "products": [],
+        "transcription": ""
+    }
+
+def create_session(data):
+    """Store data as a brand-new session and return its filename (the session id)"""
+    now = datetime.now()
+    filename = f"session_{now.strftime('%Y%m%d_%H%M%S')}.json"
+    while True:
+        try:
+            write_session(filename, data, exclusive=True)
+            return filename
+        except FileExistsError:
+            # Another upload started a session in the same second
+            filename = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+
+def update_session(filename, mutate):
+    """Apply mutate(data) to a stored session under its lock and return the saved data.
+
+    If mutate returns False the session is left untouched.
+    """
+    with session_lock(filename):
+        try:
+            with span("session_read"), open(os.path.join(DATA_FOLDER, filename), "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            raise SessionNotFound(filename)
+        if mutate(data) is not False:
+            write_session(filename, data)
+    return data
+
+@app.cli.command("rebuild-session-index")
+def rebuild_session_index_command():
+    """Rebuild the session index from the JSON files in DATA_FOLDER"""
+    log.info("✅ Indexed %d sessions into %s", rebuild_session_index(), SESSION_INDEX_PATH)
+
+# ================== EXTRACTION ENGINE ==================
+# Everything the regex fallback needs is built once at import time: the
+# patterns are compiled up front and every keyword dictionary is folded into
+# a single Aho-Corasick automaton, so one pass over the transcript tells us
+# which gazetteer entries occur in it.
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting every keyword found in a text in one scan"""
+
+    def __init__(self, keywords):
+        goto = [{}]
+        outputs = [set()]
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    outputs.append(set())
+                    nxt = len(goto) - 1
+                    goto[state][ch] = nxt
+                state = nxt
+            outputs[state].add(keyword)
+
+        # Breadth-first pass computing failure links; each state's transition
+        # table is completed with the transitions of its failure state so the
+        # scan loop never has to walk failure links.
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            outputs[state] |= outputs[fail[state]]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+
+        self._delta = delta
+        self._outputs = [frozenset(out) if out else None for out in outputs]
+
+    def find_all(self, text):
+        """Return the set of keywords occurring anywhere in text, overlaps included"""
+        delta = self._delta
+        outputs = self._outputs
+        hits = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            out = outputs[state]
+            if out is not None:
+                hits |= out
+        return hits
+
+
+def _gate_open(requires, hits):
+    """A gated pattern only runs if, for every literal group, some literal was seen"""
+    return all(any(literal in hits for literal in group) for group in requires)
+
+
+BUSINESS_STATES = ["andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh", "goa", "gujarat", "haryana", "himachal pradesh", "jammu & kashmir", "jharkhand", "karnataka", "kerala", "madhya pradesh", "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", "odisha", "punjab", "rajasthan", "sikkim", "tamil nadu", "telangana", "tripura", "uttar pradesh", "uttarakhand", "west bengal", "chandigarh", "delhi", "hyderabad", "bangalore", "mumbai", "chennai", "kolkata", "pune", "jaipur", "lucknow"]
+
+BUSINESS_CITIES = ["chandigarh", "hyderabad", "bangalore", "delhi", "mumbai", "chennai", "kolkata", "pune", "jaipur", "lucknow", "ahmedabad", "surat", "nagpur", "indore", "thane", "bhopal", "visakhapatnam", "pimpri", "patna", "vadodara", "ghaziabad", "ludhiana", "agra", "nashik", "faridabad", "meerut", "rajkot", "kalyan", "vasai", "varanasi", "srinagar", "aurangabad", "dhanbad", "amritsar", "navi mumbai", "allahabad", "ranchi", "howrah", "coimbatore", "jabalpur", "gwalior", "vijayawada", "jodhpur", "madurai", "raipur", "kota", "guwahati", "chandigarh", "hubli", "dharwad", "mysore"]
+
+BUSINESS_CATEGORIES = {
+    "retail": ["retail", "shop", "store", "grocery", "market", "supermarket", "mart", "bazaar", "outlet"],
+    "food & restaurant": ["food", "restaurant", "cafe", "hotel", "eatery", "sweet", "treat", "bakery", "dining", "catering", "food court"],
+    "services": ["service", "consulting", "repair", "maintenance", "cleaning", "salon", "spa", "fitness"],
+    "manufacturing": ["manufacturing", "factory", "production", "industry", "plant", "workshop"],
+    "healthcare": ["health", "medical", "hospital", "clinic", "pharmacy", "diagnostic", "wellness"],
+    "education": ["education", "school", "college", "tuition", "institute", "academy", "training", "coaching"],
+    "technology": ["tech", "software", "computer", "it", "digital", "app", "website", "automation"],
+    "agriculture": ["agriculture", "farming", "crops", "seeds", "horticulture", "dairy", "poultry"],
+    "textile": ["textile", "clothing", "garments", "fashion", "apparel", "boutique", "fabrics"],
+    "automotive": ["automotive", "car", "vehicle", "motor", "auto", "garage", "showroom"],
+    "real estate": ["property", "real estate", "construction", "builder", "developer", "housing"],
+    "finance": ["finance", "banking", "loan", "insurance", "investment", "accounting"],
+    "transportation": ["transport", "logistics", "shipping", "delivery", "cargo", "courier"],
+    "entertainment": ["entertainment", "media", "gaming", "cinema", "music", "events"]
+}
+
+BUSINESS_SUBCATEGORIES = {
+    "electronics": ["mobile", "phone", "laptop", "computer", "tablet", "tv", "electronics", "gadgets"],
+    "jewelry": ["jewelry", "gold", "silver", "diamond", "ornaments", "accessories"],
+    "books & stationery": ["books", "stationery", "notebooks", "pens", "paper", "office supplies"],
+    "home appliances": ["appliances", "refrigerator", "washing machine", "microwave", "kitchen", "home"],
+    "furniture": ["furniture", "sofa", "bed", "table", "chair", "wood", "interior"],
+    "sports & fitness": ["sports", "fitness", "gym", "equipment", "exercise", "yoga"],
+    "toys & games": ["toys", "games", "children", "kids", "play", "fun"],
+    "beauty & cosmetics": ["beauty", "cosmetics", "makeup", "skincare", "hair", "salon"],
+    "bakery & confectionery": ["bakery", "confectionery", "cakes", "pastries", "sweets", "desserts"],
+    "beverages": ["beverages", "drinks", "juice", "tea", "coffee", "cold drinks"],
+    "hardware": ["hardware", "tools", "plumbing", "electrical", "building materials"],
+    "pet supplies": ["pet", "animals", "dog", "cat", "food", "supplies"]
+}
+
+BUSINESS_TYPES = {
+    "proprietorship": ["proprietor", "sole proprietor", "individual", "owner"],
+    "partnership": ["partnership", "partner", "joint venture"],
+    "private limited": ["private limited", "pvt ltd", "private ltd"],
+    "limited company": ["limited company", "ltd", "public limited"],
+    "llp": ["llp", "limited liability partnership"],
+    "startup": ["startup", "start up", "new business", "emerging"],
+    "small business": ["small business", "sme", "small medium", "micro"],
+    "large enterprise": ["large enterprise", "corporate", "multinational", "mnc"]
+}
+
+BUSINESS_PRODUCT_KEYWORDS = ["vegetable", "fruit", "rice", "milk", "bread", "sweet", "snack", "food", "grocery", "tomato", "potato", "onion", "egg", "chicken", "meat", "fish"]
+
+# GST numbers are 15 characters, not 6
+GST_PATTERNS = [
+    re.compile(r'\b(\d{2}[A-Z]{5}\d{4}[A-Z]{1}[A-Z0-9]{1}Z\d{1})\b'),
+    re.compile(r'(?:gst|gstin|gst no)\s*[:\-]?\s*([A-Z0-9]{15})'),
+    re.compile(r'(?:tax|tin)\s*[:\-]?\s*([A-Z0-9]{15})')
+]
+GST_FULL_PATTERN = re.compile(r'^\d{2}[A-Z]{5}\d{4}[A-Z]{1}[A-Z0-9]{1}Z\d{1}$')
+PINCODE_PATTERN = re.compile(r'\b(\d{6})\b')
+
+# Email and website patterns are (pattern, requires); requires lists literal
+# groups the pattern cannot match without, checked against the automaton
+# hits: every group needs at least one literal seen
+EMAIL_PATTERNS = [
+    (re.compile(r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b'), (("@",),)),
+    (re.compile(r'(?:email|mail|e-mail)\s*[:\-]?\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'), (("@",), ("mail",))),
+    (re.compile(r'(?:contact|reach)\s+(?:me|us)\s+at\s+([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'), (("@",),)),
+    (re.compile(r'(?:my email address is|email is)\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'), (("@",), ("email",)))
+]
+
+_URL_PREFIXES = ("http", "www.")
+
+WEBSITE_PATTERNS = [
+    (re.compile(r'\b((?:https?://|www\.)[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b'), (_URL_PREFIXES,)),
+    (re.compile(r'(?:website|site|web|url)\s*[:\-]?\s*((?:https?://|www\.)[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'), (_URL_PREFIXES,)),
+    (re.compile(r'(?:visit|check)\s+(?:our|the)\s+website\s*((?:https?://|www\.)[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'), (_URL_PREFIXES, ("website",))),
+    (re.compile(r'([a-zA-Z0-9.-]+\.(?:com|in|org|net|co|io))'), ((".com", ".in", ".org", ".net", ".co", ".io"),)),
+    (re.compile(r'(?:my website is|my site is|website is)\s*([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'), (("site is",),)),
+    (re.compile(r'(?:email address is|my email is)\s*([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'), (("email address is", "my email is"),))
+]
+
+# Year, pincode and phone patterns need a run of at least this many digits
+DIGIT_RUN_PATTERN = re.compile(r'\d+')
+
+YEAR_PATTERNS = [
+    re.compile(r'(?:established|founded|started|since|year|operating|running)\s+(?:in|from|since)?\s*(\d{4})'),
+    re.compile(r'(?:since|from)\s+(\d{4})'),
+    re.compile(r'(\d{4})\s+(?:established|founded|started|since)'),
+    re.compile(r'(?:business|company|shop)\s+(?:is|was)\s+(?:established|founded|started)\s+(?:in)?\s*(\d{4})')
+]
+
+PHONE_PATTERNS = [
+    re.compile(r'\b(\d{10})\b'),
+    re.compile(r'(?:phone|mobile|contact|call)\s*[:\-]?\s*(\d{10})'),
+    re.compile(r'(?:\+91|0)?\s*(\d{10})'),
+    re.compile(r'(?:phone|mobile|contact)\s+(?:number|no)?\s*[:\-]?\s*(\d{10})')
+]
+
+# Person/business/address patterns run in order until one yields a usable
+# value. Each entry is (pattern, requires, window):
+#   requires - literal groups, as for the email and website patterns
+#   window   - for patterns opening with a lazy character class, which are
+#              quadratic on long transcripts, (anchor, outside) where anchor is
+#              the tail every match contains and outside matches characters not
+#              in the leading class; the search then starts at the run of class
+#              characters holding the first anchor, as no match can start earlier
+_ADDRESS_STOPS = ("city", "and", "we", "phone", "state", "near", "beside", "opposite")
+_OUTSIDE_NAME_CHARS = re.compile(r'[^a-zA-Z\s]')
+_OUTSIDE_ADDRESS_CHARS = re.compile(r'[^a-zA-Z0-9\s,\-#]')
+
+PERSON_PATTERNS = [
+    (re.compile(r'myself is ([a-zA-Z\s]+)'), (("myself",),), None),
+    (re.compile(r'(?:my name is|i am|this is|myself)\s+is\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|my|i|from|at|in|owner|live|reside))'), (), None),
+    (re.compile(r'(?:my name is|i am|this is|myself)\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|my|i|from|at|in|owner|live|reside))'), (), None),
+    (re.compile(r'(?:i\'m|i am)\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|my|from|at|in|live|reside))'), (), None),
+    (re.compile(r'(?:myself)\s+([a-zA-Z\s]+?)(?:\s+(?:and|i|owner|from|business|live|reside))'), (("myself",),), None),
+    (re.compile(r'([a-zA-Z\s]+?)(?:\s+is my name)'), (("is my name",),),
+     (re.compile(r'\s+is my name'), _OUTSIDE_NAME_CHARS)),
+    (re.compile(r'calling\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|my|i))'), (("calling",),), None),
+    (re.compile(r'([a-zA-Z\s]+?)(?:\s+and\s+i\s+live)'), (("and",), ("live",)),
+     (re.compile(r'\s+and\s+i\s+live'), _OUTSIDE_NAME_CHARS))
+]
+
+BUSINESS_NAME_PATTERNS = [
+    (re.compile(r'(?:my name is|my business is|i own|we are|this is)\s+([a-zA-Z\s]+?)(?:\s+(?:in|at|and|located|so|feed|business|shop|store))'), (), None),
+    (re.compile(r'business\s+name\s+is\s+([a-zA-Z\s]+?)(?:\s+(?:and|we|located|in|at))'), (("business",), ("name",)), None),
+    (re.compile(r'we\s+are\s+([a-zA-Z\s]+?)(?:\s+(?:and|we|located|in|at|business))'), (), None),
+    (re.compile(r'name\s+is\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|business|shop|store))'), (("name",),), None),
+    (re.compile(r'(?:running|operating)\s+([a-zA-Z\s]+?)(?:\s+(?:business|shop|store|firm|company))'), (("running", "operating"),), None),
+    (re.compile(r'([a-zA-Z\s]+?)(?:\s+(?:business|shop|store|firm|company)\s+name)'), (("business", "shop", "store", "firm", "company"), ("name",)),
+     (re.compile(r'\s+(?:business|shop|store|firm|company)\s+name'), _OUTSIDE_NAME_CHARS))
+]
+
+ADDRESS_PATTERNS = [
+    (re.compile(r'(?:located|address|at|in|shop at|store at)\s+([a-zA-Z0-9\s,\-#]+?)(?:\s+(?:city|and|we|phone|state|near|beside|opposite))'), (_ADDRESS_STOPS,), None),
+    (re.compile(r'address\s+is\s+([a-zA-Z0-9\s,\-#]+?)(?:\s+(?:city|and|we|phone|state|near|beside|opposite))'), (("address",), _ADDRESS_STOPS), None),
+    (re.compile(r'(?:shop|store|business)\s+(?:is\s+)?(?:located|situated)\s+at\s+([a-zA-Z0-9\s,\-#]+?)(?:\s+(?:city|and|we|phone|state|near|beside|opposite))'), (("located", "situated"), _ADDRESS_STOPS), None),
+    (re.compile(r'([a-zA-Z0-9\s,\-#]+?)(?:\s+(?:road|street|lane|nagar|colony|area|sector))'), (("road", "street", "lane", "nagar", "colony", "area", "sector"),),
+     (re.compile(r'\s+(?:road|street|lane|nagar|colony|area|sector)'), _OUTSIDE_ADDRESS_CHARS))
+]
+
+# Group layouts per pattern: q = quantity, u = unit, n = name, p = price
+_PRODUCT_UNITS = ("kg", "grams", "pcs", "pieces", "liter", "litre", "dozen", "packet", "bottle", "box")
+_PRICE_MARKERS = ("at", "@", "for", "rupee", "rs", "₹")
+
+BUSINESS_PRODUCT_PATTERNS = [
+    (re.compile(r'(\d+)\s+(kg|grams|pcs|pieces|liter|litre|dozen|packet|bottle|box)\s+(\w+)\s+(?:at|@|for|rupees?|rs\.?|₹)\s*(\d+)'), (_PRODUCT_UNITS, _PRICE_MARKERS), "qunp"),
+    (re.compile(r'(\w+)\s+(kg|grams|pcs|pieces|liter|litre|dozen|packet|bottle|box)\s+(?:at|@|for|rupees?|rs\.?|₹)\s*(\d+)'), (_PRODUCT_UNITS, _PRICE_MARKERS), "nup"),
+    (re.compile(r'(\w+)\s+(?:at|@|for|rupees?|rs\.?|₹)\s*(\d+)\s+(?:per\s+)?(kg|grams|pcs|pieces|liter|litre|dozen|packet|bottle|box)'), (_PRODUCT_UNITS, _PRICE_MARKERS), "npu"),
+    (re.compile(r'(\w+)\s+(?:at|@|for|rupees?|rs\.?|₹)\s*(\d+)'), (_PRICE_MARKERS,), "np"),
+    (re.compile(r'(\d+)\s+(kg|grams|pcs|pieces|liter|litre|dozen|packet|bottle|box)\s+(\w+)'), (_PRODUCT_UNITS,), "qun")
+]
+
+
+def _gated_literals(*pattern_lists):
+    return [literal for patterns in pattern_lists for entry in patterns for group in entry[1] for literal in group]
+
+
+BUSINESS_AUTOMATON = KeywordAutomaton(set(
+    BUSINESS_STATES
+    + BUSINESS_CITIES
+    + [k for keywords in BUSINESS_CATEGORIES.values() for k in keywords]
+    + [k for keywords in BUSINESS_SUBCATEGORIES.values() for k in keywords]
+    + [k for keywords in BUSINESS_TYPES.values() for k in keywords]
+    + BUSINESS_PRODUCT_KEYWORDS
+    + _gated_literals(EMAIL_PATTERNS, WEBSITE_PATTERNS, PERSON_PATTERNS, BUSINESS_NAME_PATTERNS, ADDRESS_PATTERNS, BUSINESS_PRODUCT_PATTERNS)
+))
+
+
+def _first_keyword(keywords, hits):
+    for keyword in keywords:
+        if keyword in hits:
+            return keyword
+    return None
+
+
+def _first_group(groups, hits):
+    for group, keywords in groups.items():
+        if _first_keyword(keywords, hits):
+            return group
+    return None
+
+
+def _first_gated_search(patterns, text, hits):
+    for pattern, requires in patterns:
+        if _gate_open(requires, hits):
+            match = pattern.search(text)
+            if match:
+                return match.group(1)
+    return ""
+
+
+def _window_start(text, anchor, outside):
+    """Start of the run of class characters holding the first anchor, or None if there is no anchor"""
+    anchor_match = anchor.search(text)
+    if not anchor_match:
+        return None
+    # Scan backwards from the anchor for the nearest character outside the class
+    reversed_text = text[::-1]
+    stop = outside.search(reversed_text, len(text) - anchor_match.start())
+    return len(text) - stop.start() if stop else 0
+
+
+def _first_gated_match(patterns, text, hits, length_bounds):
+    low, high = length_bounds
+    for pattern, requires, window in patterns:
+        if not _gate_open(requires, hits):
+            continue
+        start = 0
+        if window:
+            start = _window_start(text, *window)
+            if start is None:
+                continue
+        match = pattern.search(text, start)
+        if match:
+            value = match.group(1).strip().title()
+            if low < len(value) < high:
+                return value
+    return ""
 
 # ================== BUSINESS EXTRACTION ==================
 def extract_business_info(text):
-    print("🔄 Using fallback business extraction")
-    return extract_business_info_fallback(text)
+    extractor = route_extractor("business", text, BUSINESS_LLM_BUDGET_SECONDS)
+    if extractor.name == "regex":
+        log.info("🔄 Using fallback business extraction")
+        return extract_business_info_fallback(text)
+    data = extractor.run("business", text)
+    if data is None:
+        log.info("🔄 LLM business extraction failed, using fallback extraction")
+        FALLBACKS.inc("llm_failed")
+        return extract_business_info_fallback(text)
+    return data
 
+@span("regex_business")
 def extract_business_info_fallback(text):
     """Fallback function to extract business info from transcription using basic text processing"""
-    import re
-    
     result = {
         "personName": "",
         "name": "",
@@ -86,73 +1224,41 @@ def extract_business_info_fallback(text):
     }
     
     text_lower = text.lower()
+    hits = BUSINESS_AUTOMATON.find_all(text_lower)
     
     # Extract state
-    states = ["andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh", "goa", "gujarat", "haryana", "himachal pradesh", "jammu & kashmir", "jharkhand", "karnataka", "kerala", "madhya pradesh", "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", "odisha", "punjab", "rajasthan", "sikkim", "tamil nadu", "telangana", "tripura", "uttar pradesh", "uttarakhand", "west bengal", "chandigarh", "delhi", "hyderabad", "bangalore", "mumbai", "chennai", "kolkata", "pune", "jaipur", "lucknow"]
-    for state in states:
-        if state in text_lower:
-            result["state"] = state.title()
-            break
+    state = _first_keyword(BUSINESS_STATES, hits)
+    if state:
+        result["state"] = state.title()
+    
+    longest_digits = max(map(len, DIGIT_RUN_PATTERN.findall(text_lower)), default=0)
     
     # Extract GST number (should be 15 characters, not 6)
-    gst_patterns = [
-        r'\b(\d{2}[A-Z]{5}\d{4}[A-Z]{1}[A-Z0-9]{1}Z\d{1})\b',
-        r'(?:gst|gstin|gst no)\s*[:\-]?\s*([A-Z0-9]{15})',
-        r'(?:tax|tin)\s*[:\-]?\s*([A-Z0-9]{15})'
-    ]
-    for pattern in gst_patterns:
-        gst_matches = re.findall(pattern, text.upper())
-        if gst_matches:
-            result["gstNumber"] = gst_matches[0]
+    text_upper = text.upper()
+    for pattern in GST_PATTERNS:
+        gst_match = pattern.search(text_upper)
+        if gst_match:
+            result["gstNumber"] = gst_match.group(1)
             break
     
     # Extract pincode (6 digits, 优先级高于GST)
-    pincode_pattern = r'\b(\d{6})\b'
-    pincodes = re.findall(pincode_pattern, text_lower)
-    if pincodes:
+    pincode_match = PINCODE_PATTERN.search(text_lower) if longest_digits >= 6 else None
+    if pincode_match:
         # Only treat as pincode if it's not a valid GST format
-        pincode = pincodes[0]
-        if len(pincode) == 6 and not re.match(r'^\d{2}[A-Z]{5}\d{4}[A-Z]{1}[A-Z0-9]{1}Z\d{1}$', pincode.upper()):
+        pincode = pincode_match.group(1)
+        if not GST_FULL_PATTERN.match(pincode.upper()):
             result["pincode"] = pincode
     
     # Extract email
-    email_patterns = [
-        r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b',
-        r'(?:email|mail|e-mail)\s*[:\-]?\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-        r'(?:contact|reach)\s+(?:me|us)\s+at\s+([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-        r'(?:my email address is|email is)\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-    ]
-    for pattern in email_patterns:
-        emails = re.findall(pattern, text_lower)
-        if emails:
-            result["email"] = emails[0]
-            break
+    result["email"] = _first_gated_search(EMAIL_PATTERNS, text_lower, hits)
     
     # Extract website
-    website_patterns = [
-        r'\b((?:https?://|www\.)[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b',
-        r'(?:website|site|web|url)\s*[:\-]?\s*((?:https?://|www\.)[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-        r'(?:visit|check)\s+(?:our|the)\s+website\s*((?:https?://|www\.)[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-        r'([a-zA-Z0-9.-]+\.(?:com|in|org|net|co|io))',
-        r'(?:my website is|my site is|website is)\s*([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-        r'(?:email address is|my email is)\s*([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-    ]
-    for pattern in website_patterns:
-        websites = re.findall(pattern, text_lower)
-        if websites:
-            result["website"] = websites[0]
-            break
+    result["website"] = _first_gated_search(WEBSITE_PATTERNS, text_lower, hits)
     
     # Extract established year
-    year_patterns = [
-        r'(?:established|founded|started|since|year|operating|running)\s+(?:in|from|since)?\s*(\d{4})',
-        r'(?:since|from)\s+(\d{4})',
-        r'(\d{4})\s+(?:established|founded|started|since)',
-        r'(?:business|company|shop)\s+(?:is|was)\s+(?:established|founded|started)\s+(?:in)?\s*(\d{4})'
-    ]
-    for pattern in year_patterns:
-        years = re.findall(pattern, text_lower)
-        for year in years:
+    for pattern in (YEAR_PATTERNS if longest_digits >= 4 else ()):
+        for year_match in pattern.finditer(text_lower):
+            year = year_match.group(1)
             if 1900 <= int(year) <= 2024:
                 result["establishedYear"] = year
                 break
@@ -160,349 +1266,670 @@ def extract_business_info_fallback(text):
             break
     
     # Extract city
-    cities = ["chandigarh", "hyderabad", "bangalore", "delhi", "mumbai", "chennai", "kolkata", "pune", "jaipur", "lucknow", "ahmedabad", "surat", "nagpur", "indore", "thane", "bhopal", "visakhapatnam", "pimpri", "patna", "vadodara", "ghaziabad", "ludhiana", "agra", "nashik", "faridabad", "meerut", "rajkot", "kalyan", "vasai", "varanasi", "srinagar", "aurangabad", "dhanbad", "amritsar", "navi mumbai", "allahabad", "ranchi", "howrah", "coimbatore", "jabalpur", "gwalior", "vijayawada", "jodhpur", "madurai", "raipur", "kota", "guwahati", "chandigarh", "hubli", "dharwad", "mysore"]
-    for city in cities:
-        if city in text_lower:
-            result["city"] = city.title()
-            break
+    city = _first_keyword(BUSINESS_CITIES, hits)
+    if city:
+        result["city"] = city.title()
     
     # Extract phone
-    phone_patterns = [
-        r'\b(\d{10})\b',
-        r'(?:phone|mobile|contact|call)\s*[:\-]?\s*(\d{10})',
-        r'(?:\+91|0)?\s*(\d{10})',
-        r'(?:phone|mobile|contact)\s+(?:number|no)?\s*[:\-]?\s*(\d{10})'
-    ]
-    for pattern in phone_patterns:
-        phones = re.findall(pattern, text_lower)
-        if phones:
-            result["phone"] = phones[0]
+    for pattern in (PHONE_PATTERNS if longest_digits >= 10 else ()):
+        phone = pattern.search(text_lower)
+        if phone:
+            result["phone"] = phone.group(1)
             break
     
-    # Extract person name
-    person_patterns = [
-        r'myself is ([a-zA-Z\s]+)',
-        r'(?:my name is|i am|this is|myself)\s+is\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|my|i|from|at|in|owner|live|reside))',
-        r'(?:my name is|i am|this is|myself)\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|my|i|from|at|in|owner|live|reside))',
-        r'(?:i\'m|i am)\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|my|from|at|in|live|reside))',
-        r'(?:myself)\s+([a-zA-Z\s]+?)(?:\s+(?:and|i|owner|from|business|live|reside))',
-        r'([a-zA-Z\s]+?)(?:\s+is my name)',
-        r'calling\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|my|i))',
-        r'([a-zA-Z\s]+?)(?:\s+and\s+i\s+live)'
-    ]
-    
-    for pattern in person_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            name = match.group(1).strip().title()
-            if len(name) > 2 and len(name) < 50:
-                result["personName"] = name
-                break
-    
-    # Extract business name
-    name_patterns = [
-        r'(?:my name is|my business is|i own|we are|this is)\s+([a-zA-Z\s]+?)(?:\s+(?:in|at|and|located|so|feed|business|shop|store))',
-        r'business\s+name\s+is\s+([a-zA-Z\s]+?)(?:\s+(?:and|we|located|in|at))',
-        r'we\s+are\s+([a-zA-Z\s]+?)(?:\s+(?:and|we|located|in|at|business))',
-        r'name\s+is\s+([a-zA-Z\s]+?)(?:\s+(?:and|so|feed|business|shop|store))',
-        r'(?:running|operating)\s+([a-zA-Z\s]+?)(?:\s+(?:business|shop|store|firm|company))',
-        r'([a-zA-Z\s]+?)(?:\s+(?:business|shop|store|firm|company)\s+name)'
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            name = match.group(1).strip().title()
-            if len(name) > 2 and len(name) < 50:
-                result["name"] = name
-                break
-    
-    # Extract address
-    address_patterns = [
-        r'(?:located|address|at|in|shop at|store at)\s+([a-zA-Z0-9\s,\-#]+?)(?:\s+(?:city|and|we|phone|state|near|beside|opposite))',
-        r'address\s+is\s+([a-zA-Z0-9\s,\-#]+?)(?:\s+(?:city|and|we|phone|state|near|beside|opposite))',
-        r'(?:shop|store|business)\s+(?:is\s+)?(?:located|situated)\s+at\s+([a-zA-Z0-9\s,\-#]+?)(?:\s+(?:city|and|we|phone|state|near|beside|opposite))',
-        r'([a-zA-Z0-9\s,\-#]+?)(?:\s+(?:road|street|lane|nagar|colony|area|sector))'
-    ]
-    
-    for pattern in address_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            address = match.group(1).strip().title()
-            if len(address) > 3 and len(address) < 100:
-                result["address"] = address
-                break
+    # Extract person name, business name and address
+    result["personName"] = _first_gated_match(PERSON_PATTERNS, text_lower, hits, (2, 50))
+    result["name"] = _first_gated_match(BUSINESS_NAME_PATTERNS, text_lower, hits, (2, 50))
+    result["address"] = _first_gated_match(ADDRESS_PATTERNS, text_lower, hits, (3, 100))
     
     # Extract category
-    categories = {
-        "retail": ["retail", "shop", "store", "grocery", "market", "supermarket", "mart", "bazaar", "outlet"],
-        "food & restaurant": ["food", "restaurant", "cafe", "hotel", "eatery", "sweet", "treat", "bakery", "dining", "catering", "food court"],
-        "services": ["service", "consulting", "repair", "maintenance", "cleaning", "salon", "spa", "fitness"],
-        "manufacturing": ["manufacturing", "factory", "production", "industry", "plant", "workshop"],
-        "healthcare": ["health", "medical", "hospital", "clinic", "pharmacy", "diagnostic", "wellness"],
-        "education": ["education", "school", "college", "tuition", "institute", "academy", "training", "coaching"],
-        "technology": ["tech", "software", "computer", "it", "digital", "app", "website", "automation"],
-        "agriculture": ["agriculture", "farming", "crops", "seeds", "horticulture", "dairy", "poultry"],
-        "textile": ["textile", "clothing", "garments", "fashion", "apparel", "boutique", "fabrics"],
-        "automotive": ["automotive", "car", "vehicle", "motor", "auto", "garage", "showroom"],
-        "real estate": ["property", "real estate", "construction", "builder", "developer", "housing"],
-        "finance": ["finance", "banking", "loan", "insurance", "investment", "accounting"],
-        "transportation": ["transport", "logistics", "shipping", "delivery", "cargo", "courier"],
-        "entertainment": ["entertainment", "media", "gaming", "cinema", "music", "events"]
-    }
-    
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                result["category"] = category.title()
-                break
-        if result["category"]:
-            break
+    category = _first_group(BUSINESS_CATEGORIES, hits)
+    if category:
+        result["category"] = category.title()
     
     # Extract subcategory
-    subcategories = {
-        "electronics": ["mobile", "phone", "laptop", "computer", "tablet", "tv", "electronics", "gadgets"],
-        "jewelry": ["jewelry", "gold", "silver", "diamond", "ornaments", "accessories"],
-        "books & stationery": ["books", "stationery", "notebooks", "pens", "paper", "office supplies"],
-        "home appliances": ["appliances", "refrigerator", "washing machine", "microwave", "kitchen", "home"],
-        "furniture": ["furniture", "sofa", "bed", "table", "chair", "wood", "interior"],
-        "sports & fitness": ["sports", "fitness", "gym", "equipment", "exercise", "yoga"],
-        "toys & games": ["toys", "games", "children", "kids", "play", "fun"],
-        "beauty & cosmetics": ["beauty", "cosmetics", "makeup", "skincare", "hair", "salon"],
-        "bakery & confectionery": ["bakery", "confectionery", "cakes", "pastries", "sweets", "desserts"],
-        "beverages": ["beverages", "drinks", "juice", "tea", "coffee", "cold drinks"],
-        "hardware": ["hardware", "tools", "plumbing", "electrical", "building materials"],
-        "pet supplies": ["pet", "animals", "dog", "cat", "food", "supplies"]
-    }
+    subcategory = _first_group(BUSINESS_SUBCATEGORIES, hits)
+    if subcategory:
+        result["subcategory"] = subcategory.title()
     
-    for subcategory, keywords in subcategories.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                result["subcategory"] = subcategory.title()
-                break
-        if result["subcategory"]:
-            break
     # Extract business type/size
-    business_types = {
-        "proprietorship": ["proprietor", "sole proprietor", "individual", "owner"],
-        "partnership": ["partnership", "partner", "joint venture"],
-        "private limited": ["private limited", "pvt ltd", "private ltd"],
-        "limited company": ["limited company", "ltd", "public limited"],
-        "llp": ["llp", "limited liability partnership"],
-        "startup": ["startup", "start up", "new business", "emerging"],
-        "small business": ["small business", "sme", "small medium", "micro"],
-        "large enterprise": ["large enterprise", "corporate", "multinational", "mnc"]
-    }
-    
-    for business_type, keywords in business_types.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                result["businessType"] = business_type.title()
-                break
-        if result.get("businessType"):
-            break
-    
-    # Extract products
-    product_keywords = ["vegetable", "fruit", "rice", "milk", "bread", "sweet", "snack", "food", "grocery", "tomato", "potato", "onion", "egg", "chicken", "meat", "fish"]
-    found_products = []
-    
-    # First try pattern-based extraction for structured product info
-    product_patterns = [
-        r'(\d+)\s+(kg|grams|pcs|pieces|liter|litre|dozen|packet|bottle|box)\s+(\w+)\s+(?:at|@|for|rupees?|rs\.?|₹)\s*(\d+)',
-        r'(\w+)\s+(kg|grams|pcs|pieces|liter|litre|dozen|packet|bottle|box)\s+(?:at|@|for|rupees?|rs\.?|₹)\s*(\d+)',
-        r'(\w+)\s+(?:at|@|for|rupees?|rs\.?|₹)\s*(\d+)\s+(?:per\s+)?(kg|grams|pcs|pieces|liter|litre|dozen|packet|bottle|box)',
-        r'(\w+)\s+(?:at|@|for|rupees?|rs\.?|₹)\s*(\d+)',
-        r'(\d+)\s+(kg|grams|pcs|pieces|liter|litre|dozen|packet|bottle|box)\s+(\w+)'
-    ]
+    business_type = _first_group(BUSINESS_TYPES, hits)
+    if business_type:
+        result["businessType"] = business_type.title()
     
     # Extract structured products first
-    for pattern in product_patterns:
-        matches = re.findall(pattern, text_lower)
-        for match in matches:
-            if isinstance(match, tuple):
-                if len(match) == 4:  # quantity, unit, name, price
-                    quantity, unit, name, price = match
-                    if name not in [p[0] for p in found_products]:  # avoid duplicates
-                        found_products.append({
-                            "name": name.title(),
-                            "price": int(price),
-                            "category": "General",
-                            "subcategory": "",
-                            "description": f"Fresh {name.title()}",
-                            "unit": unit,
-                            "unitQuantity": int(quantity),
-                            "minimumOrderQuantity": 1,
-                            "quantity": int(quantity)
-                        })
-                elif len(match) == 3:  # name, price, unit OR quantity, unit, name
-                    if match[1].isdigit():  # quantity, unit, name
-                        quantity, unit, name = match
-                        if name not in [p[0] for p in found_products]:
-                            found_products.append({
-                                "name": name.title(),
-                                "price": int(match[2]),
-                                "category": "General", 
-                                "subcategory": "",
-                                "description": f"Fresh {name.title()}",
-                                "unit": unit,
-                                "unitQuantity": int(quantity),
-                                "minimumOrderQuantity": 1,
-                                "quantity": int(quantity)
-                            })
-                    else:  # name, price, unit
-                        name, price, unit = match
-                        if name not in [p[0] for p in found_products]:
-                            found_products.append({
-                                "name": name.title(),
-                                "price": int(price),
-                                "category": "General",
-                                "subcategory": "",
-                                "description": f"Fresh {name.title()}",
-                                "unit": unit,
-                                "unitQuantity": 1,
-                                "minimumOrderQuantity": 1,
-                                "quantity": 1
-                            })
-                elif len(match) == 2:  # name, price OR quantity, unit
-                    if match[0].isdigit():  # quantity, unit
-                        quantity, unit = match
-                        # This is likely just quantity+unit without name, skip
-                    else:  # name, price
-                        name, price = match
-                        if name not in [p[0] for p in found_products]:
-                            found_products.append({
-                                "name": name.title(),
-                                "price": int(price),
-                                "category": "General",
-                                "subcategory": "",
-                                "description": f"Fresh {name.title()}",
-                                "unit": "pcs",
-                                "unitQuantity": 1,
-                                "minimumOrderQuantity": 1,
-                                "quantity": 1
-                            })
+    found_products = []
+    for pattern, requires, layout in BUSINESS_PRODUCT_PATTERNS:
+        if not _gate_open(requires, hits):
+            continue
+        for match in pattern.findall(text_lower):
+            fields = dict(zip(layout, match))
+            # A bare number is a quantity or a price, never a product name
+            if fields["n"].isdigit():
+                continue
+            name = fields["n"].title()
+            if name in [p["name"] for p in found_products]:  # avoid duplicates
+                continue
+            quantity = int(fields.get("q", 1))
+            found_products.append({
+                "name": name,
+                "price": int(fields.get("p", 0)),
+                "category": "General",
+                "subcategory": "",
+                "description": f"Fresh {name}",
+                "unit": fields.get("u", "pcs"),
+                "unitQuantity": quantity,
+                "minimumOrderQuantity": 1,
+                "quantity": quantity
+            })
     
     # If no structured products found, look for individual product keywords
     if not found_products:
-        for keyword in product_keywords:
-            if keyword in text_lower:
-                if keyword.endswith('y'):
-                    plural = keyword[:-1] + 'ies'
-                else:
-                    plural = keyword + 's'
-                
-                if keyword in text_lower and keyword not in [p["name"] for p in found_products]:
-                    found_products.append({
-                        "name": keyword.title(),
-                        "price": 0,
-                        "category": "General",
-                        "subcategory": "",
-                        "description": f"Fresh {keyword.title()}",
-                        "unit": "pcs",
-                        "unitQuantity": 1,
-                        "minimumOrderQuantity": 1,
-                        "quantity": 1
-                    })
-                elif plural in text_lower and plural not in [p["name"] for p in found_products]:
-                    found_products.append({
-                        "name": plural.title(),
-                        "price": 0,
-                        "category": "General",
-                        "subcategory": "", 
-                        "description": f"Fresh {plural.title()}",
-                        "unit": "pcs",
-                        "unitQuantity": 1,
-                        "minimumOrderQuantity": 1,
-                        "quantity": 1
-                    })
+        for keyword in BUSINESS_PRODUCT_KEYWORDS:
+            if keyword in hits:
+                found_products.append({
+                    "name": keyword.title(),
+                    "price": 0,
+                    "category": "General",
+                    "subcategory": "",
+                    "description": f"Fresh {keyword.title()}",
+                    "unit": "pcs",
+                    "unitQuantity": 1,
+                    "minimumOrderQuantity": 1,
+                    "quantity": 1
+                })
     
     result["products"] = found_products[:5]
     
     return result
 
-# ================== PRODUCT EXTRACTION ==================
-def extract_products_llm(text):
-    """Extract products using Groq LLM with structured output"""
-    try:
-        if not groq_client:
-            print("❌ Groq client not available for LLM extraction")
-            return None
-            
-        prompt = f"""Extract product information from the following text.
-Return a JSON array of products with these exact fields:
-- name: product name (can be multiple words, e.g., "Premium Basmati Rice")
-- price: price per unit in rupees (number only, use 0 if not mentioned)
-- unit: unit of measurement (kg, gram, liter, piece, pcs, etc. - use lowercase)
-- unitQuantity: total quantity available (number only, use 1 if not mentioned)
-- minimumOrderQuantity: minimum order quantity (number only, use 1 if not mentioned)
-- category: product category (Groceries, Electronics, Clothing, Food, etc.)
-- subcategory: product subcategory (Rice, Wheat, Vegetables, etc.)
-- description: brief description
+# ================== PRODUCT EXTRACTION ==================
+PRODUCT_LLM_MODEL = "llama-3.3-70b-versatile"
+
+# Field list and extraction rules shared by the single and batched prompts
+PRODUCT_EXTRACTION_RULES = """- name: product name (can be multiple words, e.g., "Premium Basmati Rice")
+- price: price per unit in rupees (number only, use 0 if not mentioned)
+- unit: unit of measurement (kg, gram, liter, piece, pcs, etc. - use lowercase)
+- unitQuantity: total quantity available (number only, use 1 if not mentioned)
+- minimumOrderQuantity: minimum order quantity (number only, use 1 if not mentioned)
+- category: product category (Groceries, Electronics, Clothing, Food, etc.)
+- subcategory: product subcategory (Rice, Wheat, Vegetables, etc.)
+- description: brief description
+
+Important extraction rules:
+- Extract the FULL product name including adjectives (e.g., "Premium Basmati Rice" not just "Rice")
+- Look for price keywords: "price is", "costs", "rupees", "rs", "per kg", "per unit"
+- Look for category keywords: "category", "category is"
+- Look for subcategory keywords: "subcategory", "subcategory is", "type"
+- Look for total quantity keywords: "total quantity available", "available", "stock", "quantity available"
+- Look for minimum order keywords: "minimum order quantity", "min order", "minimum quantity"
+- Look for unit keywords: "units is", "unit", "per kg", "per liter"
+- Convert "kilogram" to "kg", "piece" to "pcs", "pieces" to "pcs"
+"""
+
+PRODUCT_PROMPT_TEMPLATE = """Extract product information from the following text.
+Return a JSON array of products with these exact fields:
+""" + PRODUCT_EXTRACTION_RULES + """
+Text: {text}
+
+Return ONLY a valid JSON array, no other text. Example format:
+[{{"name": "Premium Basmati Rice", "price": 12, "unit": "kg", "unitQuantity": 50, "minimumOrderQuantity": 5, "category": "Groceries", "subcategory": "Rice", "description": "High quality aged Basmati rice perfect for biryani and daily cooking"}}]"""
+
+# Several transcripts in one completion: the rules are sent once and the
+# answer is an object keyed by each text's number, so every array can be
+# checked against the input it belongs to.
+PRODUCT_BATCH_PROMPT_TEMPLATE = """Extract product information from each of the numbered texts below.
+For every text, build a JSON array of products with these exact fields:
+""" + PRODUCT_EXTRACTION_RULES + """
+Texts:
+{texts}
+
+Return ONLY a valid JSON object that maps each text number (as a string) to its array of products, with an entry for every number and [] for a text without products, no other text. Example format:
+{{"0": [{{"name": "Premium Basmati Rice", "price": 12, "unit": "kg", "unitQuantity": 50, "minimumOrderQuantity": 5, "category": "Groceries", "subcategory": "Rice", "description": "High quality aged Basmati rice perfect for biryani and daily cooking"}}], "1": []}}"""
+
+# Parsed LLM product lists are memoized per normalized transcript, so replays
+# and re-submitted transcripts skip the Groq call. The key also covers the
+# prompt template and model, so editing either invalidates old entries.
+PRODUCT_CACHE_ENTRIES = int(os.getenv("PRODUCT_CACHE_ENTRIES", "512"))
+PRODUCT_CACHE_TTL_SECONDS = int(os.getenv("PRODUCT_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+class LRUCache:
+    """Thread-safe in-memory LRU with a per-entry time-to-live"""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (value, expires)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+                self.counters["evictions"] += 1
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "hitRate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0
+            }
+
+product_cache = LRUCache(PRODUCT_CACHE_ENTRIES, PRODUCT_CACHE_TTL_SECONDS)
+# JSON mode (response_format json_object) makes the API guarantee valid JSON,
+# but only for an object at the top level, so the single-transcript prompt
+# then asks for the array wrapped as {"products": [...]}. Models that refuse
+# response_format are remembered and asked again without it.
+PRODUCT_LLM_JSON_MODE = os.getenv("PRODUCT_LLM_JSON_MODE", "true").lower() == "true"
+PRODUCT_JSON_MODE_NOTE = """
+
+Wrap the array in a JSON object under the key "products", like {"products": [...]}."""
+PRODUCT_LLM_RECORD_PATH = os.getenv("PRODUCT_LLM_RECORD_PATH", "")
+
+PRODUCT_PROMPT_HASH = hashlib.sha256((PRODUCT_PROMPT_TEMPLATE + (PRODUCT_JSON_MODE_NOTE if PRODUCT_LLM_JSON_MODE else "")).encode()).hexdigest()
+
+def normalize_transcript(text):
+    """Case- and whitespace-insensitive form of a transcript, used for cache keys"""
+    return " ".join(text.casefold().split())
+
+def copy_products(products):
+    """Shallow-copy each product so cached lists are never mutated by callers"""
+    return [dict(product) if isinstance(product, dict) else product for product in products]
+
+def product_cache_key(text):
+    return hashlib.sha256(f"{PRODUCT_LLM_MODEL}|{PRODUCT_PROMPT_HASH}|{normalize_transcript(text)}".encode()).hexdigest()
+
+# ---- LLM response parsing ----
+# Answers are parsed strictly first. If that fails (truncated output, a stray
+# comma, prose around the JSON) every complete object in the text is decoded
+# on its own and the broken ones are skipped, so one bad product no longer
+# throws away the rest. Either way each product is coerced to PRODUCT_FIELDS.
+PRODUCT_FIELDS = ("name", "price", "unit", "unitQuantity", "minimumOrderQuantity", "category", "subcategory", "description")
+UNIT_ALIASES = {
+    "kgs": "kg", "kilo": "kg", "kilos": "kg", "kilogram": "kg", "kilograms": "kg",
+    "g": "gram", "gm": "gram", "gms": "gram", "grams": "gram",
+    "l": "liter", "ltr": "liter", "litre": "liter", "litres": "liter", "liters": "liter",
+    "milliliter": "ml", "millilitre": "ml", "milliliters": "ml", "millilitres": "ml",
+    "pc": "pcs", "piece": "pcs", "pieces": "pcs",
+    "dozens": "dozen", "packets": "packet", "bottles": "bottle", "boxes": "box"
+}
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+PARSE_STATS = {"strict": 0, "salvaged": 0, "failed": 0}
+PARSE_STATS_LOCK = threading.Lock()
+record_lock = threading.Lock()
+
+def strip_code_fences(result):
+    """LLMs sometimes wrap JSON in markdown code blocks"""
+    if "```json" in result:
+        return result.split("```json")[1].split("```")[0].strip()
+    if "```" in result:
+        return result.split("```")[1].split("```")[0].strip()
+    return result
+
+def iter_json_objects(text):
+    """Yield every complete JSON object in text, resyncing at the next "{" after a broken one"""
+    decoder = json.JSONDecoder()
+    pos = text.find("{")
+    while pos != -1:
+        try:
+            obj, end = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            pos = text.find("{", pos + 1)
+            continue
+        yield obj
+        pos = text.find("{", end)
+
+def coerce_number(value, default):
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        number = value
+    elif isinstance(value, str):
+        match = NUMBER_PATTERN.search(value.replace(",", ""))
+        if not match:
+            return default
+        number = float(match.group())
+    else:
+        return default
+    if number != number or number in (float("inf"), float("-inf")) or number < 0:
+        return default
+    return int(number) if float(number).is_integer() else number
+
+def normalize_unit(unit):
+    unit = str(unit or "").strip().lower().rstrip(".")
+    return UNIT_ALIASES.get(unit, unit)
+
+def coerce_product(raw):
+    """A product with every PRODUCT_FIELDS key of the right type, or None without a usable name"""
+    if not isinstance(raw, dict):
+        return None
+    name = raw.get("name")
+    if not isinstance(name, (str, int, float)) or isinstance(name, bool) or not str(name).strip():
+        return None
+    return {
+        "name": str(name).strip(),
+        "price": coerce_number(raw.get("price"), 0),
+        "unit": normalize_unit(raw.get("unit")),
+        "unitQuantity": coerce_number(raw.get("unitQuantity"), 1),
+        "minimumOrderQuantity": coerce_number(raw.get("minimumOrderQuantity"), 1),
+        "category": str(raw.get("category") or ""),
+        "subcategory": str(raw.get("subcategory") or ""),
+        "description": str(raw.get("description") or "")
+    }
+
+def coerce_products(items):
+    return [product for product in map(coerce_product, items) if product]
+
+def unwrap_products(answer):
+    """The product list in a parsed answer: a bare array, {"products": [...]}, or a lone product"""
+    if isinstance(answer, list):
+        return answer
+    if isinstance(answer, dict):
+        if isinstance(answer.get("products"), list):
+            return answer["products"]
+        if "name" in answer:
+            return [answer]
+        lists = [value for value in answer.values() if isinstance(value, list)]
+        if len(lists) == 1:
+            return lists[0]
+    return None
+
+def parse_products_response(result):
+    """Parse an LLM product answer into coerced products; returns (products, "strict" | "salvaged" | "failed")"""
+    text = strip_code_fences(result.strip())
+    try:
+        items = unwrap_products(json.loads(text))
+        outcome = "strict" if items is not None else "failed"
+        products = coerce_products(items or [])
+    except json.JSONDecodeError:
+        products = coerce_products(iter_json_objects(text))
+        outcome = "salvaged" if products else "failed"
+    with PARSE_STATS_LOCK:
+        PARSE_STATS[outcome] += 1
+    return products, outcome
+
+def parse_stats():
+    with PARSE_STATS_LOCK:
+        total = sum(PARSE_STATS.values())
+        broken = PARSE_STATS["salvaged"] + PARSE_STATS["failed"]
+        return {**PARSE_STATS, "salvageRate": round(PARSE_STATS["salvaged"] / broken, 3) if broken else 0.0, "responses": total}
+
+def record_llm_response(kind, result):
+    """Append a raw LLM answer to PRODUCT_LLM_RECORD_PATH for replaying through the parser"""
+    if not PRODUCT_LLM_RECORD_PATH:
+        return
+    with record_lock, open(PRODUCT_LLM_RECORD_PATH, "a") as f:
+        f.write(json.dumps({"at": datetime.now().isoformat(), "kind": kind, "response": result}) + "\n")
+
+json_mode_refused = set()
+
+@span("llm")
+def request_product_completion(prompt, max_tokens, json_mode=None):
+    """Chat completion for product extraction, in JSON mode where the model accepts it"""
+    kwargs = product_completion_kwargs(prompt, max_tokens, json_mode)
+    try:
+        return groq_call("chat", lambda client: client.chat.completions.create(**kwargs))
+    except Exception as e:
+        if not drop_refused_json_mode(e, kwargs):
+            raise
+        return groq_call("chat", lambda client: client.chat.completions.create(**kwargs))
+
+def product_completion_kwargs(prompt, max_tokens, json_mode=None):
+    json_mode = PRODUCT_LLM_JSON_MODE if json_mode is None else json_mode
+    kwargs = {
+        "model": PRODUCT_LLM_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.1,
+        "max_tokens": max_tokens,
+        "timeout": groq_timeout("chat")
+    }
+    if json_mode and PRODUCT_LLM_MODEL not in json_mode_refused:
+        kwargs["response_format"] = {"type": "json_object"}
+    return kwargs
+
+def drop_refused_json_mode(e, kwargs):
+    """True (and response_format removed from kwargs) if the model rejected JSON mode"""
+    if "response_format" in kwargs and getattr(e, "status_code", None) == 400 and "response_format" in str(e):
+        log.warning("⚠️ %s refused JSON mode, retrying without it", PRODUCT_LLM_MODEL)
+        json_mode_refused.add(PRODUCT_LLM_MODEL)
+        FALLBACKS.inc("json_mode_refused")
+        del kwargs["response_format"]
+        return True
+    return False
+
+class ProductStreamParser:
+    """Incrementally scans a streamed JSON answer, returning each product object once its closing brace arrives.
+
+    Products are the objects directly inside the first array, so both a bare
+    array and {"products": [...]} work.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.array_depth = None
+        self.in_string = False
+        self.escaped = False
+        self.start = None
+        self.text = ""
+
+    def feed(self, chunk):
+        products = []
+        base = len(self.text)
+        self.text += chunk
+        for offset, char in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            if char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+                if char == "[" and self.array_depth is None:
+                    self.array_depth = self.depth
+                elif char == "{" and self.array_depth is not None and self.depth == self.array_depth + 1:
+                    self.start = base + offset
+            elif char in "]}":
+                if char == "}" and self.start is not None and self.depth == self.array_depth + 1:
+                    try:
+                        product = coerce_product(json.loads(self.text[self.start:base + offset + 1]))
+                    except json.JSONDecodeError:
+                        product = None
+                    if product:
+                        products.append(product)
+                    self.start = None
+                self.depth -= 1
+        return products
+
+def stream_products_llm(text, refresh=False):
+    """Yield products from a streamed LLM answer as soon as each object is complete.
+
+    JSON mode cannot be combined with streaming, so this asks for the plain
+    array. A cached list is replayed at once. Raises GroqUnavailable or API
+    errors; products already yielded stay valid.
+    """
+    cache_key = product_cache_key(text)
+    if not refresh:
+        cached = product_cache.get(cache_key)
+        if cached is not None:
+            log.info("♻️ Product extraction cache hit (%d products)", len(cached))
+            yield from copy_products(cached)
+            return
+
+    prompt = PRODUCT_PROMPT_TEMPLATE.format(text=text)
+    log.info("🤖 Streaming Groq LLM product extraction...")
+    stream = groq_stream("chat", lambda client: client.chat.completions.create(
+        model=PRODUCT_LLM_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.1,
+        max_tokens=1500,
+        stream=True,
+        timeout=groq_timeout("chat")
+    ))
+
+    parser = ProductStreamParser()
+    emitted = 0
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        for product in parser.feed(chunk.choices[0].delta.content or ""):
+            emitted += 1
+            yield product
 
-Important extraction rules:
-- Extract the FULL product name including adjectives (e.g., "Premium Basmati Rice" not just "Rice")
-- Look for price keywords: "price is", "costs", "rupees", "rs", "per kg", "per unit"
-- Look for category keywords: "category", "category is"
-- Look for subcategory keywords: "subcategory", "subcategory is", "type"
-- Look for total quantity keywords: "total quantity available", "available", "stock", "quantity available"
-- Look for minimum order keywords: "minimum order quantity", "min order", "minimum quantity"
-- Look for unit keywords: "units is", "unit", "per kg", "per liter"
-- Convert "kilogram" to "kg", "piece" to "pcs", "pieces" to "pcs"
+    record_llm_response("stream", parser.text)
+    products, outcome = parse_products_response(parser.text)
+    log.info("✅ LLM streamed %d products (%s parse)", emitted, outcome)
+    if outcome == "strict" and len(products) == emitted:
+        product_cache.put(cache_key, copy_products(products))
 
-Text: {text}
+def extract_products_llm(text, refresh=False):
+    """Extract products using Groq LLM with structured output
 
-Return ONLY a valid JSON array, no other text. Example format:
-[{{"name": "Premium Basmati Rice", "price": 12, "unit": "kg", "unitQuantity": 50, "minimumOrderQuantity": 5, "category": "Groceries", "subcategory": "Rice", "description": "High quality aged Basmati rice perfect for biryani and daily cooking"}}]"""
+    Results are served from product_cache unless refresh is set, which forces
+    a new LLM call and overwrites the cached entry.
+    """
+    try:
+        cached = cached_products(text, refresh)
+        if cached is not None:
+            return cached
 
-        print("🤖 Calling Groq LLM for product extraction...")
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=1500
-        )
-        
-        result = response.choices[0].message.content.strip()
-        print(f"📝 LLM Response: {result[:200]}...")
-        
-        # Try to extract JSON from response
-        # Sometimes LLM wraps JSON in markdown code blocks
-        if "```json" in result:
-            result = result.split("```json")[1].split("```")[0].strip()
-        elif "```" in result:
-            result = result.split("```")[1].split("```")[0].strip()
-        
-        products = json.loads(result)
-        
-        if not isinstance(products, list):
-            print("❌ LLM response is not a list")
+        client = get_groq_client()
+        if not client:
+            log.error("❌ Groq client not available for LLM extraction")
             return None
             
-        print(f"✅ LLM extracted {len(products)} products")
-        return products
+        prompt, json_mode = product_prompt(text)
+        log.info("🤖 Calling Groq LLM for product extraction...")
+        response = request_product_completion(prompt, 1500, json_mode)
+        return read_products_answer(text, response)
         
-    except json.JSONDecodeError as e:
-        print(f"❌ LLM extraction JSON parse error: {e}")
-        print(f"   Raw response: {result[:200]}")
+    except GroqUnavailable as e:
+        log.warning("⚠️ Skipping LLM extraction: %s", e)
         return None
     except Exception as e:
-        print(f"❌ LLM extraction failed: {e}")
+        log.error("❌ LLM extraction failed: %s", e)
         return None
 
-def extract_products(text):
-    """Extract products using LLM first, fallback to regex"""
-    # Try LLM extraction first
-    print("🤖 Attempting LLM product extraction...")
-    llm_products = extract_products_llm(text)
+def cached_products(text, refresh=False):
+    """A copy of the cached product list for text, or None (always None with refresh)"""
+    if refresh:
+        return None
+    cached = product_cache.get(product_cache_key(text))
+    if cached is None:
+        return None
+    log.info("♻️ Product extraction cache hit (%d products)", len(cached))
+    return copy_products(cached)
+
+def product_prompt(text):
+    """(prompt, json_mode) for one transcript"""
+    json_mode = PRODUCT_LLM_JSON_MODE and PRODUCT_LLM_MODEL not in json_mode_refused
+    return PRODUCT_PROMPT_TEMPLATE.format(text=text) + (PRODUCT_JSON_MODE_NOTE if json_mode else ""), json_mode
+
+def read_products_answer(text, response):
+    """Parse a completion into products, caching strict results; None when nothing usable came back"""
+    result = response.choices[0].message.content.strip()
+    log.debug("📝 LLM Response: %.200s...", result)
+    record_llm_response("single", result)
     
+    products, outcome = parse_products_response(result)
+    if outcome == "failed":
+        log.error("❌ LLM response held no usable products")
+        log.debug("   Raw response: %.200s", result)
+        return None
+        
+    if outcome == "salvaged":
+        log.info("🩹 Salvaged %d products from a malformed LLM response", len(products))
+    else:
+        log.info("✅ LLM extracted %d products", len(products))
+        product_cache.put(product_cache_key(text), copy_products(products))
+    return products
+
+# The LLM is given PRODUCT_LLM_DEADLINE_SECONDS (0 waits forever). The regex
+# fallback runs alongside it, so when the LLM is late its answer is ready
+# straight away and the LLM keeps running: its result still lands in the
+# product cache and, with PRODUCT_LLM_LATE_UPDATE, replaces the regex
+# products in the session.
+PRODUCT_LLM_DEADLINE_SECONDS = float(os.getenv("PRODUCT_LLM_DEADLINE_SECONDS", "5"))
+PRODUCT_LLM_LATE_UPDATE = os.getenv("PRODUCT_LLM_LATE_UPDATE", "true").lower() == "true"
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "8"))
+
+llm_executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm")
+
+PRODUCT_BATCH_SIZE = int(os.getenv("PRODUCT_BATCH_SIZE", "8"))
+PRODUCT_BATCH_MAX_CHARS = int(os.getenv("PRODUCT_BATCH_MAX_CHARS", "12000"))
+PRODUCT_BATCH_MAX_TOKENS = int(os.getenv("PRODUCT_BATCH_MAX_TOKENS", "8000"))
+
+def pack_batches(items):
+    """Group (position, text) items into batches bounded by PRODUCT_BATCH_SIZE and PRODUCT_BATCH_MAX_CHARS"""
+    batches, batch, chars = [], [], 0
+    for item in items:
+        if batch and (len(batch) >= PRODUCT_BATCH_SIZE or chars + len(item[1]) > PRODUCT_BATCH_MAX_CHARS):
+            batches.append(batch)
+            batch, chars = [], 0
+        batch.append(item)
+        chars += len(item[1])
+    if batch:
+        batches.append(batch)
+    return batches
+
+def request_product_batch(texts):
+    """One chat completion for several transcripts; returns {local index: products} for the valid entries"""
+    prompt = PRODUCT_BATCH_PROMPT_TEMPLATE.format(texts="\n".join(f"[{i}] {text}" for i, text in enumerate(texts)))
+    log.info("🤖 Calling Groq LLM for a batch of %d transcripts...", len(texts))
+    response = request_product_completion(prompt, min(PRODUCT_BATCH_MAX_TOKENS, 1500 * len(texts)))
+    result = response.choices[0].message.content.strip()
+    record_llm_response("batch", result)
+    try:
+        answer = json.loads(strip_code_fences(result))
+    except json.JSONDecodeError as e:
+        log.error("❌ Batch response JSON parse error: %s", e)
+        return {}
+    if not isinstance(answer, dict):
+        log.error("❌ Batch response is not an object")
+        return {}
+
+    results = {}
+    for i in range(len(texts)):
+        products = answer.get(str(i))
+        if isinstance(products, list) and all(isinstance(product, dict) for product in products):
+            results[i] = coerce_products(products)
+    return results
+
+def extract_batch(items, refresh):
+    """Resolve (position, text) items, retrying only the entries a response got wrong"""
+    if len(items) == 1:
+        position, text = items[0]
+        return {position: extract_products_llm(text, refresh=refresh)}
+
+    try:
+        answered = request_product_batch([text for _, text in items])
+    except GroqUnavailable as e:
+        log.warning("⚠️ Skipping batched LLM extraction: %s", e)
+        return {position: None for position, _ in items}
+    except Exception as e:
+        log.error("❌ Batched LLM extraction failed: %s", e)
+        answered = {}
+
+    results = {}
+    failed = []
+    for i, (position, text) in enumerate(items):
+        if i in answered:
+            results[position] = answered[i]
+            product_cache.put(product_cache_key(text), copy_products(answered[i]))
+        else:
+            failed.append((position, text))
+
+    if failed:
+        log.info("🔁 Retrying %d of %d batched transcripts", len(failed), len(items))
+        if len(failed) == len(items):
+            # Nothing usable came back: halve the batch so one bad input cannot sink the rest
+            middle = len(failed) // 2
+            parts = [failed[:middle], failed[middle:]]
+        else:
+            parts = [failed]
+        for part in parts:
+            results.update(extract_batch(part, refresh))
+    return results
+
+def extract_products_llm_batch(texts, refresh=False):
+    """extract_products_llm for many transcripts, packing cache misses into shared completions.
+
+    Returns one entry per text, in order: its product list, or None where the
+    LLM could not produce one.
+    """
+    results = [None] * len(texts)
+    pending = []
+    for position, text in enumerate(texts):
+        cached = None if refresh else product_cache.get(product_cache_key(text))
+        if cached is not None:
+            results[position] = copy_products(cached)
+        else:
+            pending.append((position, text))
+    log.info("📦 Batched product extraction: %d cached, %d to extract", len(texts) - len(pending), len(pending))
+
+    for batch in pack_batches(pending):
+        for position, products in extract_batch(batch, refresh).items():
+            results[position] = products
+    return results
+
+def extract_products_routed(text, refresh=False):
+    """(products, extractor label) from the routed extractor with no deadline, regex when it fails"""
+    extractor = route_extractor("products", text, 0)
+    cached = extractor.cached("products", text, refresh)
+    if cached is not None:
+        return cached, "cache"
+    products = extractor.run("products", text, refresh) if extractor.name != "regex" else None
+    if products:
+        return products, extractor.label
+    if extractor.name != "regex":
+        FALLBACKS.inc("llm_failed")
+    return extract_products_fallback(text), "regex"
+
+def extract_products_hedged(text, refresh=False, deadline=None):
+    """Race the routed LLM extractor against the deadline with the regex fallback computed meanwhile.
+
+    Returns (products, extractor, pending): extractor is the label of the
+    extractor used ("llm", "local_llm", "replay", "cache" or "regex"), and
+    pending is the still-running LLM future if the deadline was missed.
+    """
+    deadline = PRODUCT_LLM_DEADLINE_SECONDS if deadline is None else deadline
+    extractor = route_extractor("products", text, deadline)
+    if extractor.name == "regex":
+        log.info("🔄 No LLM extractor available within budget, using regex extraction")
+        FALLBACKS.inc("llm_routed_away")
+        products = extract_products_fallback(text)
+        return products, "regex", None
+    cached = extractor.cached("products", text, refresh)
+    if cached is not None:
+        return cached, "cache", None
+    log.info("🤖 Attempting %s LLM product extraction...", extractor.name)
+    llm_future = llm_executor.submit(extractor.run, "products", text, refresh)
+    fallback_products = extract_products_fallback(text)
+
+    try:
+        llm_products = llm_future.result(timeout=deadline if deadline > 0 else None)
+    except FutureTimeout:
+        log.info("⏱️ LLM missed the %gs deadline, using regex fallback: %d products", deadline, len(fallback_products))
+        FALLBACKS.inc("llm_deadline")
+        return fallback_products, "regex", llm_future
+
     if llm_products and len(llm_products) > 0:
-        print(f"✅ Using LLM-extracted products: {len(llm_products)} products")
-        return llm_products
+        log.info("✅ Using LLM-extracted products: %d products", len(llm_products))
+        return llm_products, extractor.label, None
     
     # Fallback to regex
-    print("🔄 LLM extraction failed or returned no products, using regex fallback")
-    return extract_products_fallback(text)
+    log.info("🔄 LLM extraction failed or returned no products, using regex fallback")
+    FALLBACKS.inc("llm_failed")
+    return fallback_products, "regex", None
+
+def extract_products(text, refresh=False):
+    """Extract products using LLM first, fallback to regex"""
+    return extract_products_hedged(text, refresh=refresh)[0]
 
+@span("regex_products")
 def extract_products_fallback(text):
     """Fallback function to extract products from transcription"""
     import re
@@ -678,101 +2105,1874 @@ def extract_products_fallback(text):
     
     return unique_products[:5]
 
-def get_product_category(product_name, category_keywords):
-    """Helper function to determine product category"""
-    product_lower = product_name.lower()
-    for category, keywords in category_keywords.items():
-        for keyword in keywords:
-            if keyword in product_lower:
-                return category
-    return "General"
+def get_product_category(product_name, category_keywords):
+    """Helper function to determine product category"""
+    product_lower = product_name.lower()
+    for category, keywords in category_keywords.items():
+        for keyword in keywords:
+            if keyword in product_lower:
+                return category
+    return "General"
+
+def get_product_subcategory(product_name, subcategory_keywords):
+    """Helper function to determine product subcategory"""
+    product_lower = product_name.lower()
+    for subcategory, keywords in subcategory_keywords.items():
+        for keyword in keywords:
+            if keyword in product_lower:
+                return subcategory
+    return ""
+
+# ================== EXTRACTOR ROUTING ==================
+# Products and business details are extracted by one of several backends:
+#   groq  - llama-3.3-70b on Groq (the product LLM above)
+#   local - a small instruction model in GGUF format on this machine's CPU
+#           (optional llama-cpp-python package, LOCAL_LLM_MODEL_PATH); runs
+#           offline, and with TRANSCRIPTION_ENGINE=local so does the pipeline
+#   replay - answers recorded earlier, looked up by transcript (REPLAY_PATH,
+#           see below); deterministic and needs no model or network, so the
+#           pipeline can run offline and in tests
+#   regex - the rule-based extractors; always available, always last
+# Each declares its expected latency (a fixed part plus a part per 1000
+# transcript characters, scaled by how slow its recent calls really were,
+# plus any wait for a Groq rate-limit token) and its cost per call. For every
+# transcript route_extractor() takes the first ready extractor in
+# PRODUCT_EXTRACTORS / BUSINESS_EXTRACTORS order that is expected to finish
+# within the latency budget and stays under EXTRACTION_MAX_COST; if none
+# fits, the fastest one. Products use PRODUCT_LLM_DEADLINE_SECONDS as their
+# budget and keep the regex race and late update for an extractor that
+# overruns; business details use BUSINESS_LLM_BUDGET_SECONDS.
+PRODUCT_EXTRACTORS = os.getenv("PRODUCT_EXTRACTORS", "groq,local,regex")
+BUSINESS_EXTRACTORS = os.getenv("BUSINESS_EXTRACTORS", "regex")  # e.g. "groq,regex" to extract profiles with the LLM
+BUSINESS_LLM_BUDGET_SECONDS = float(os.getenv("BUSINESS_LLM_BUDGET_SECONDS", "8"))
+EXTRACTION_MAX_COST = float(os.getenv("EXTRACTION_MAX_COST", "0"))  # dollars per call, 0 for no cap
+GROQ_LLM_INPUT_PRICE_PER_M = float(os.getenv("GROQ_LLM_INPUT_PRICE_PER_M", "0.59"))
+GROQ_LLM_OUTPUT_PRICE_PER_M = float(os.getenv("GROQ_LLM_OUTPUT_PRICE_PER_M", "0.79"))
+LOCAL_LLM_MODEL_PATH = os.getenv("LOCAL_LLM_MODEL_PATH", "")
+LOCAL_LLM_THREADS = int(os.getenv("LOCAL_LLM_THREADS", "0"))  # 0 lets llama.cpp decide
+LOCAL_LLM_CONTEXT = int(os.getenv("LOCAL_LLM_CONTEXT", "4096"))
+LOCAL_LLM_BASE_SECONDS = float(os.getenv("LOCAL_LLM_BASE_SECONDS", "2"))
+LOCAL_LLM_SECONDS_PER_KCHAR = float(os.getenv("LOCAL_LLM_SECONDS_PER_KCHAR", "6"))
+EXTRACTOR_LATENCY_SMOOTHING = 0.2
+
+# REPLAY_PATH is a JSONL file read by the replay extractor and the replay
+# transcription engine. Extractor answers are {"transcript", "response"} lines,
+# as bench_accuracy.py --record writes them, with an optional "kind"
+# ("products", the default, or "business"); transcripts are
+# {"audioSha256", "transcript"} lines, matched against the bytes sent to the
+# engine (the uploaded bytes with AUDIO_TRANSCODE=original).
+REPLAY_PATH = os.getenv("REPLAY_PATH", "")
+
+BUSINESS_FIELDS = ("personName", "name", "address", "city", "state", "pincode", "gstNumber", "category",
+                   "subcategory", "email", "phone", "website", "establishedYear")
+
+BUSINESS_PROMPT_TEMPLATE = """Extract the business profile from the following text, spoken by a business owner.
+Return a JSON object with these exact fields, using "" for anything not mentioned:
+- personName: the speaker's name
+- name: the business name
+- address: street address
+- city, state: location
+- pincode: 6-digit postal code
+- gstNumber: 15-character GST number
+- category, subcategory: what the business deals in (e.g. "Food & Beverages", "Grocery")
+- email, phone, website: contact details
+- establishedYear: four-digit year
+- products: array of products mentioned, each with name, price (number, 0 if not mentioned) and unit
+
+Text: {text}
+
+Return ONLY the JSON object, no other text."""
+
+class ReplayLog:
+    """Recorded extractor answers and transcripts, read from REPLAY_PATH on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        self.answers = {}  # (kind, normalized transcript) -> response text
+        self.transcripts = {}  # audio sha256 -> transcript
+        self.loaded = not path
+        self.error = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            try:
+                with open(self.path) as f:
+                    for line in f:
+                        if line.strip():
+                            self.add(**json.loads(line))
+                log.info("📼 Loaded %d answers and %d transcripts from %s", len(self.answers), len(self.transcripts), self.path)
+            except (OSError, ValueError, TypeError) as e:
+                self.error = f"{type(e).__name__}: {e}"
+                log.error("❌ Could not read %s: %s", self.path, self.error)
+
+    def add(self, transcript, response=None, kind="products", audioSha256=None, **_):
+        if audioSha256:
+            self.transcripts[audioSha256] = transcript
+        else:
+            self.answers[(kind, normalize_transcript(transcript))] = response
+
+    def ready(self):
+        self.load()
+        if self.error is None and not (self.answers or self.transcripts):
+            self.error = "REPLAY_PATH is not set" if not self.path else f"{self.path} holds no records"
+        return self.error is None
+
+    def answer(self, kind, text):
+        self.load()
+        return self.answers.get((kind, normalize_transcript(text)))
+
+    def transcript(self, audio_sha256):
+        self.load()
+        return self.transcripts.get(audio_sha256)
+
+replay_log = ReplayLog(REPLAY_PATH)
+
+class Extractor:
+    """One way of turning a transcript into products or business details; by default the rule-based extractors"""
+    name = ""
+    label = ""  # the "extractor" value reported to clients
+    base_seconds = 0.0
+    seconds_per_kchar = 0.0
+
+    def __init__(self):
+        self.slowdown = 1.0
+        self.counts = {"calls": 0, "failed": 0, "seconds": 0.0, "cost": 0.0}
+        self.lock = threading.Lock()
+
+    def ready(self):
+        return True
+
+    def queue_seconds(self):
+        return 0.0
+
+    def declared_seconds(self, text):
+        return self.base_seconds + self.seconds_per_kchar * len(text) / 1000
+
+    def expected_seconds(self, text):
+        return self.queue_seconds() + self.declared_seconds(text) * self.slowdown
+
+    def expected_cost(self, text):
+        return 0.0
+
+    def cached(self, task, text, refresh=False):
+        """A stored answer for text, returned without a call (and without skewing the latency estimate)"""
+        return None
+
+    def products(self, text, refresh=False):
+        return extract_products_fallback(text)
+
+    def business(self, text):
+        return extract_business_info_fallback(text)
+
+    def run(self, task, text, refresh=False):
+        """Products or business details for text; None when nothing usable came back"""
+        cached = self.cached(task, text, refresh)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        try:
+            result = self.products(text, refresh) if task == "products" else self.business(text)
+        except Exception as e:
+            log.error("❌ %s %s extraction failed: %s", self.name, task, e)
+            result = None
+        self.record(text, time.perf_counter() - start, result is not None)
+        return result
+
+    def record(self, text, seconds, ok):
+        """Book a finished call and fold its latency into the slowdown estimate"""
+        declared = self.declared_seconds(text)
+        with self.lock:
+            self.counts["calls"] += 1
+            self.counts["failed"] += not ok
+            self.counts["seconds"] += seconds
+            self.counts["cost"] += self.expected_cost(text)
+            if declared > 0:
+                self.slowdown += EXTRACTOR_LATENCY_SMOOTHING * (seconds / declared - self.slowdown)
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        return {
+            "ready": self.ready(),
+            "label": self.label,
+            **counts,
+            "seconds": round(counts["seconds"], 2),
+            "cost": round(counts["cost"], 6),
+            "slowdown": round(self.slowdown, 2)
+        }
+
+class GroqExtractor(Extractor):
+    name = "groq"
+    label = "llm"
+    base_seconds = 1.0
+    seconds_per_kchar = 0.3
+
+    def ready(self):
+        return get_groq_client() is not None and GROQ_ENDPOINTS["chat"].breaker.state != "open"
+
+    def queue_seconds(self):
+        return GROQ_ENDPOINTS["chat"].bucket.eta()
+
+    def expected_cost(self, text):
+        prompt_tokens = (len(PRODUCT_PROMPT_TEMPLATE) + len(text)) / 4
+        return (prompt_tokens * GROQ_LLM_INPUT_PRICE_PER_M + 400 * GROQ_LLM_OUTPUT_PRICE_PER_M) / 1e6
+
+    def cached(self, task, text, refresh=False):
+        return cached_products(text, refresh) if task == "products" else None
+
+    def products(self, text, refresh=False):
+        return extract_products_llm(text, refresh=True)
+
+    def business(self, text):
+        log.info("🤖 Calling Groq LLM for business extraction...")
+        response = request_product_completion(BUSINESS_PROMPT_TEMPLATE.format(text=text), 1000, PRODUCT_LLM_JSON_MODE)
+        result = response.choices[0].message.content.strip()
+        record_llm_response("business", result)
+        return read_business_answer(text, result)
+
+class LocalLLMExtractor(Extractor):
+    """A GGUF model on the CPU through llama-cpp-python, loaded once per worker; one call at a time"""
+    name = "local"
+    label = "local_llm"
+    base_seconds = LOCAL_LLM_BASE_SECONDS
+    seconds_per_kchar = LOCAL_LLM_SECONDS_PER_KCHAR
+
+    def __init__(self):
+        super().__init__()
+        self.model = None
+        self.error = None if LOCAL_LLM_MODEL_PATH else "LOCAL_LLM_MODEL_PATH is not set"
+        self.model_lock = threading.Lock()
+
+    def ready(self):
+        """Whether the model is loaded or can be; a failed load is not retried"""
+        if self.model is None and self.error is None:
+            try:
+                import llama_cpp  # noqa: F401
+            except ImportError as e:
+                self.error = str(e)
+        return self.error is None
+
+    def complete(self, prompt, max_tokens):
+        """Answer text for one prompt, in JSON mode"""
+        with self.model_lock:
+            if self.model is None:
+                if self.error is not None:
+                    raise RuntimeError(f"Local LLM unavailable: {self.error}")
+                try:
+                    from llama_cpp import Llama
+                    log.info("🔧 Loading local LLM %s...", os.path.basename(LOCAL_LLM_MODEL_PATH))
+                    self.model = Llama(model_path=LOCAL_LLM_MODEL_PATH, n_ctx=LOCAL_LLM_CONTEXT,
+                                       n_threads=LOCAL_LLM_THREADS or None, verbose=False)
+                    log.info("✅ Local LLM loaded")
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+            response = self.model.create_chat_completion(
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.1,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
+            )
+        return response["choices"][0]["message"]["content"].strip()
+
+    def products(self, text, refresh=False):
+        log.info("🖥️ Running local LLM product extraction...")
+        result = self.complete(PRODUCT_PROMPT_TEMPLATE.format(text=text) + PRODUCT_JSON_MODE_NOTE, 1500)
+        record_llm_response("local", result)
+        products, outcome = parse_products_response(result)
+        return products if outcome != "failed" else None
+
+    def business(self, text):
+        log.info("🖥️ Running local LLM business extraction...")
+        return read_business_answer(text, self.complete(BUSINESS_PROMPT_TEMPLATE.format(text=text), 1000))
+
+class ReplayExtractor(Extractor):
+    """Answers recorded in REPLAY_PATH, run through the same parsers as a live LLM answer"""
+    name = "replay"
+    label = "replay"
+    base_seconds = 0.001
+    seconds_per_kchar = 0.001
+
+    def ready(self):
+        return replay_log.ready()
+
+    def products(self, text, refresh=False):
+        result = replay_log.answer("products", text)
+        if result is None:
+            log.warning("⚠️ No recorded product answer for this transcript")
+            return None
+        products, outcome = parse_products_response(result)
+        return products if outcome != "failed" else None
+
+    def business(self, text):
+        result = replay_log.answer("business", text)
+        if result is None:
+            log.warning("⚠️ No recorded business answer for this transcript")
+            return None
+        return read_business_answer(text, result)
+
+class RegexExtractor(Extractor):
+    name = "regex"
+    label = "regex"
+    base_seconds = 0.001
+    seconds_per_kchar = 0.001
+
+EXTRACTORS = {extractor.name: extractor for extractor in (GroqExtractor(), LocalLLMExtractor(), ReplayExtractor(), RegexExtractor())}
+
+def extractor_order(task):
+    names = [name.strip() for name in (PRODUCT_EXTRACTORS if task == "products" else BUSINESS_EXTRACTORS).split(",")]
+    order = [EXTRACTORS[name] for name in names if name in EXTRACTORS]
+    return order if EXTRACTORS["regex"] in order else order + [EXTRACTORS["regex"]]
+
+def route_extractor(task, text, budget):
+    """The extractor for one transcript: the first ready one expected within budget (0 = no limit) and the cost cap"""
+    candidates = [
+        extractor for extractor in extractor_order(task)
+        if extractor.ready() and (not EXTRACTION_MAX_COST or extractor.expected_cost(text) <= EXTRACTION_MAX_COST)
+    ] or [EXTRACTORS["regex"]]
+    for extractor in candidates:
+        if budget <= 0 or extractor.expected_seconds(text) <= budget:
+            return extractor
+    return min(candidates, key=lambda extractor: extractor.expected_seconds(text))
+
+def read_business_answer(text, result):
+    """Business details from an LLM answer, gaps filled by the regex extractor; None if it is not a JSON object"""
+    try:
+        answer = json.loads(strip_code_fences(result))
+    except json.JSONDecodeError:
+        answer = None
+    if not isinstance(answer, dict):
+        log.error("❌ LLM business answer is not a JSON object")
+        return None
+    data = extract_business_info_fallback(text)
+    for field in BUSINESS_FIELDS:
+        value = answer.get(field)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool) and str(value).strip():
+            data[field] = str(value).strip()
+    if isinstance(answer.get("products"), list):
+        products = coerce_products(item for item in answer["products"] if isinstance(item, dict))
+        if products:
+            data["products"] = products
+    return data
+
+def extractor_stats():
+    return {
+        "products": [extractor.name for extractor in extractor_order("products")],
+        "business": [extractor.name for extractor in extractor_order("business")],
+        **{name: extractor.stats() for name, extractor in EXTRACTORS.items()}
+    }
+
+# ================== TRANSCRIPTION CACHE ==================
+# Re-uploads of the same recording skip conversion and the Whisper call.
+# Transcripts are keyed by the SHA-256 of the uploaded bytes (of the decoded
+# samples for long-audio chunks) plus the model, language, temperature and
+# audio preparation settings, and looked up before any decoding; a bounded
+# in-process LRU sits in front of one JSON file per transcript on disk, and
+# both tiers drop entries older than the TTL.
+TRANSCRIPTION_CACHE_ENABLED = os.getenv("TRANSCRIPTION_CACHE", "true").lower() == "true"
+TRANSCRIPTION_CACHE_DIR = os.getenv("TRANSCRIPTION_CACHE_DIR", os.path.join("cache", "transcriptions"))
+TRANSCRIPTION_CACHE_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_ENTRIES", "256"))
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRANSCRIPTION_CACHE_TTL_SECONDS = int(os.getenv("TRANSCRIPTION_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return stream_sha256(f)
+
+def stream_sha256(f):
+    digest = hashlib.sha256()
+    f.seek(0)
+    for chunk in iter(lambda: f.read(64 * 1024), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+class TranscriptionCache:
+    """Two-tier transcript cache: in-process LRU in front of JSON files on disk"""
+
+    def __init__(self, directory, max_entries, max_disk_bytes, ttl_seconds, enabled=True):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._memory = OrderedDict()  # key -> (text, created)
+        self._disk = None  # key -> (size, mtime), oldest first; loaded on first use
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"memoryHits": 0, "diskHits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(audio_digest, model, language, temperature):
+        return hashlib.sha256(f"{audio_digest}|{model}|{language}|{temperature}".encode()).hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.counters["memoryHits"] += 1
+                return entry[0]
+            if entry:
+                del self._memory[key]
+                self.counters["evictions"] += 1
+
+            entry = self._read_disk(key, now)
+            if entry:
+                self._remember(key, *entry)
+                self.counters["diskHits"] += 1
+                return entry[0]
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key, text):
+        if not self.enabled:
+            return
+        created = time.time()
+        with self._lock:
+            self._remember(key, text, created)
+            self._write_disk(key, text, created)
+            self.counters["stores"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["memoryHits"] + self.counters["diskHits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            return {
+                **self.counters,
+                "enabled": self.enabled,
+                "hitRate": round(hits / lookups, 3) if lookups else 0.0,
+                "memoryEntries": len(self._memory),
+                "diskEntries": len(self._disk) if self._disk is not None else None,
+                "diskBytes": self._disk_bytes if self._disk is not None else None
+            }
+
+    def _remember(self, key, text, created):
+        self._memory[key] = (text, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_disk_index(self):
+        if self._disk is not None or not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            stat = entry.stat()
+            if stat.st_mtime < cutoff:
+                os.remove(entry.path)
+                self.counters["evictions"] += 1
+                continue
+            files.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        self._disk = OrderedDict((key, (size, mtime)) for mtime, key, size in sorted(files))
+        self._disk_bytes = sum(size for size, _ in self._disk.values())
+
+    def _read_disk(self, key, now):
+        self._load_disk_index()
+        if not self._disk or key not in self._disk:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            self._drop_disk(key)
+            return None
+        if now - stored.get("created", 0) > self.ttl_seconds:
+            self._drop_disk(key)
+            return None
+        return stored["text"], stored["created"]
+
+    def _write_disk(self, key, text, created):
+        self._load_disk_index()
+        if self._disk is None:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"text": text, "created": created}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("⚠️ Could not write transcription cache entry: %s", e)
+            return
+        if key in self._disk:
+            self._disk_bytes -= self._disk.pop(key)[0]
+        size = os.path.getsize(path)
+        self._disk[key] = (size, created)
+        self._disk_bytes += size
+
+        # Size-based eviction, oldest first; expired files go as they are met
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            oldest = next(iter(self._disk))
+            self._drop_disk(oldest)
+
+    def _drop_disk(self, key):
+        size, _ = self._disk.pop(key, (0, 0))
+        self._disk_bytes -= size
+        self.counters["evictions"] += 1
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+transcription_cache = TranscriptionCache(
+    TRANSCRIPTION_CACHE_DIR,
+    TRANSCRIPTION_CACHE_ENTRIES,
+    TRANSCRIPTION_CACHE_MAX_BYTES,
+    TRANSCRIPTION_CACHE_TTL_SECONDS,
+    enabled=TRANSCRIPTION_CACHE_ENABLED
+)
+
+# ================== SILENCE TRIMMING ==================
+# Every decoded recording is downmixed to mono and resampled to
+# WHISPER_SAMPLE_RATE (what Whisper works at anyway) before it is encoded,
+# and with AUDIO_TRIM_SILENCE the dead air is cut out: leading and trailing
+# silence goes, and longer pauses inside the clip shrink to 2 x SILENCE_PAD_MS.
+# Each SILENCE_FRAME_MS frame is speech when its energy is SILENCE_MARGIN_DB
+# above the clip's own noise floor (its SILENCE_NOISE_PERCENTILE quietest
+# frame), so background hiss in field recordings counts as silence too.
+# Bursts shorter than SILENCE_MIN_SPEECH_MS (clicks, bumps) are ignored, and a
+# clip without a clear speech/silence contrast is left whole for Whisper.
+AUDIO_TRIM_SILENCE = os.getenv("AUDIO_TRIM_SILENCE", "true").lower() == "true"
+SILENCE_FRAME_MS = int(os.getenv("SILENCE_FRAME_MS", "20"))
+SILENCE_MARGIN_DB = float(os.getenv("SILENCE_MARGIN_DB", "10"))
+SILENCE_NOISE_PERCENTILE = float(os.getenv("SILENCE_NOISE_PERCENTILE", "0.1"))
+SILENCE_MIN_SPEECH_MS = int(os.getenv("SILENCE_MIN_SPEECH_MS", "100"))
+SILENCE_PAD_MS = int(os.getenv("SILENCE_PAD_MS", "250"))
+
+TRIM_STATS = {"clips": 0, "trimmedClips": 0, "secondsIn": 0.0, "secondsRemoved": 0.0}
+TRIM_STATS_LOCK = threading.Lock()
+
+def speech_regions(segment):
+    """(start_ms, end_ms) of the stretches of segment that hold speech; None if it cannot tell"""
+    levels = [segment[pos:pos + SILENCE_FRAME_MS].rms for pos in range(0, len(segment), SILENCE_FRAME_MS)]
+    if not levels:
+        return None
+    ranked = sorted(levels)
+    noise = ranked[int(SILENCE_NOISE_PERCENTILE * (len(ranked) - 1))]
+    loud = ranked[int(0.9 * (len(ranked) - 1))]
+    threshold = max(noise, 1) * 10 ** (SILENCE_MARGIN_DB / 20)
+    if loud < threshold:
+        return None
+
+    regions = []
+    for i, level in enumerate(levels):
+        if level < threshold:
+            continue
+        start = i * SILENCE_FRAME_MS
+        if regions and start - regions[-1][1] <= 2 * SILENCE_PAD_MS:
+            regions[-1][1] = start + SILENCE_FRAME_MS
+        else:
+            regions.append([start, start + SILENCE_FRAME_MS])
+    return [(start, end) for start, end in regions if end - start >= SILENCE_MIN_SPEECH_MS] or None
+
+@span("audio_trim")
+def trim_silence(segment):
+    """segment with leading/trailing silence cut and long pauses shortened"""
+    regions = speech_regions(segment)
+    if regions is None:
+        return segment
+    # Join the raw samples once; adding segments one by one copies the whole clip each time
+    pieces = (segment[max(0, start - SILENCE_PAD_MS):min(len(segment), end + SILENCE_PAD_MS)] for start, end in regions)
+    return segment._spawn(b"".join(piece.raw_data for piece in pieces))
+
+def condition_audio(segment):
+    """Downmix, resample and (with AUDIO_TRIM_SILENCE) trim a decoded recording for Whisper"""
+    segment = segment.set_channels(1).set_frame_rate(WHISPER_SAMPLE_RATE)
+    if not AUDIO_TRIM_SILENCE:
+        return segment
+    trimmed = trim_silence(segment)
+    removed = segment.duration_seconds - trimmed.duration_seconds
+    with TRIM_STATS_LOCK:
+        TRIM_STATS["clips"] += 1
+        TRIM_STATS["trimmedClips"] += removed > 0
+        TRIM_STATS["secondsIn"] += segment.duration_seconds
+        TRIM_STATS["secondsRemoved"] += removed
+    if removed > 0:
+        log.info("🔇 Trimmed %.1fs of silence (%.1fs -> %.1fs)", removed, segment.duration_seconds, trimmed.duration_seconds)
+    return trimmed
+
+def trim_stats():
+    with TRIM_STATS_LOCK:
+        stats = dict(TRIM_STATS)
+    seconds = stats["secondsIn"]
+    return {
+        **stats,
+        "secondsIn": round(seconds, 1),
+        "secondsRemoved": round(stats["secondsRemoved"], 1),
+        "removedShare": round(stats["secondsRemoved"] / seconds, 3) if seconds else 0.0
+    }
+
+# ================== TRANSCRIPTION ==================
+WHISPER_MODEL = "whisper-large-v3"
+WHISPER_LANGUAGE = "en"  # Force English-only transcription
+WHISPER_TEMPERATURE = 0
+WHISPER_SAMPLE_RATE = 16000
+
+# How WebM uploads are handed to Whisper:
+#   wav      - decode and send uncompressed WAV (default)
+#   original - send the uploaded bytes untouched; Whisper accepts WebM/Opus
+#   flac     - decode and send 16 kHz mono FLAC
+#   opus     - decode and send 16 kHz mono Opus in an Ogg container
+# Only "wav" on a saved upload touches the disk; every other combination is
+# encoded in memory and sent straight from the buffer.
+AUDIO_TRANSCODE = os.getenv("AUDIO_TRANSCODE", "wav").lower()
+
+def encode_for_whisper(data, mode=None, segment=None):
+    """Encode a WebM upload (bytes or an open file) in memory; returns the (filename, payload) file tuple for Whisper.
+
+    An open file that is sent as it is stays a file, so it is never copied into memory.
+    segment is the upload already decoded, when the caller has it, so it is not decoded twice.
+    """
+    mode = mode or AUDIO_TRANSCODE
+    if mode == "original":
+        return "audio.webm", data
+
+    try:
+        from pydub import AudioSegment
+        with span("audio_convert"):
+            if segment is None:
+                segment = AudioSegment.from_file(io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else rewind(data))
+            segment = condition_audio(segment)
+            buffer = io.BytesIO()
+            if mode == "flac":
+                segment.export(buffer, format="flac")
+                filename = "audio.flac"
+            elif mode == "opus":
+                segment.export(buffer, format="ogg", codec="libopus", bitrate="32k")
+                filename = "audio.ogg"
+            else:
+                segment.export(buffer, format="wav")
+                filename = "audio.wav"
+            payload = buffer.getvalue()
+        size = len(data) if isinstance(data, (bytes, bytearray)) else data.seek(0, os.SEEK_END)
+        log.info("🔄 Encoded WebM as %s in memory (%.2f KB -> %.2f KB)", filename, size / 1024, len(payload) / 1024)
+        return filename, payload
+    except ImportError:
+        log.warning("⚠️ pydub not installed, using original audio")
+        FALLBACKS.inc("audio_convert_failed")
+    except Exception as e:
+        log.warning("⚠️ Audio conversion failed: %s, using original audio", e)
+        FALLBACKS.inc("audio_convert_failed")
+    return "audio.webm", data
+
+def rewind(file):
+    """The payload of an upload (an open file, a path or a (filename, bytes or file) tuple), seeked back to its start"""
+    body = file[1] if isinstance(file, tuple) else file
+    if hasattr(body, "seek"):
+        body.seek(0)
+    return body
+
+@span("whisper")
+def request_groq_transcription(file):
+    """Single place the Whisper API is called; file is an open file or a (filename, bytes or file) tuple"""
+    def create(client):
+        rewind(file)  # a retry must resend the whole file
+        return client.audio.transcriptions.create(
+            file=file,  # send file object, NOT read()
+            model=WHISPER_MODEL,
+            response_format="text",  # simpler + more stable
+            temperature=WHISPER_TEMPERATURE,
+            language=WHISPER_LANGUAGE,
+            timeout=groq_timeout("audio")
+        )
+    return groq_call("audio", create)
+
+# ================== TRANSCRIPTION ENGINES ==================
+# TRANSCRIPTION_ENGINE picks who turns audio into text:
+#   groq  - Whisper large-v3 on Groq's API (default)
+#   local - faster-whisper on this machine's CPU, int8-quantized; runs offline
+#   auto  - Groq, switching to local Whisper while Groq cannot take the call:
+#           its audio circuit is open, its rate budget is spent, or a call was
+#           refused or failed after its retries
+#   replay - transcripts recorded in REPLAY_PATH, looked up by the SHA-256 of
+#           the audio; no model and no network, for offline runs and tests
+# The local model (the optional faster-whisper package) is loaded on first use
+# and kept for the life of the worker. At most LOCAL_WHISPER_WORKERS clips are
+# decoded at once, each on its own CTranslate2 worker, and further requests
+# queue for a slot; within a clip, LOCAL_WHISPER_BATCH_SIZE 30s windows go
+# through the encoder together.
+TRANSCRIPTION_ENGINE = os.getenv("TRANSCRIPTION_ENGINE", "groq").lower()
+LOCAL_WHISPER_MODEL = os.getenv("LOCAL_WHISPER_MODEL", "medium")
+LOCAL_WHISPER_COMPUTE_TYPE = os.getenv("LOCAL_WHISPER_COMPUTE_TYPE", "int8")
+LOCAL_WHISPER_CPU_THREADS = int(os.getenv("LOCAL_WHISPER_CPU_THREADS", "0"))  # 0 lets CTranslate2 decide
+LOCAL_WHISPER_WORKERS = int(os.getenv("LOCAL_WHISPER_WORKERS", "2"))
+LOCAL_WHISPER_BATCH_SIZE = int(os.getenv("LOCAL_WHISPER_BATCH_SIZE", "8"))
+LOCAL_WHISPER_BEAM_SIZE = int(os.getenv("LOCAL_WHISPER_BEAM_SIZE", "5"))
+
+class GroqWhisper:
+    """Whisper on Groq, behind the audio endpoint's rate limit and circuit breaker"""
+    name = "groq"
+    model = WHISPER_MODEL
+
+    def ready(self):
+        """Whether a call would go out now, rather than be refused or wait for a rate-limit token"""
+        endpoint = GROQ_ENDPOINTS["audio"]
+        return get_groq_client() is not None and endpoint.breaker.state != "open" and endpoint.bucket.available() >= 1
+
+    def transcribe(self, file):
+        return request_groq_transcription(file)
+
+class LocalWhisper:
+    """faster-whisper on the CPU, loaded once per worker process"""
+    name = "local"
+    model = LOCAL_WHISPER_MODEL
+
+    def __init__(self):
+        self.pipeline = None
+        self.batched = False
+        self.error = None
+        self.slots = threading.BoundedSemaphore(LOCAL_WHISPER_WORKERS)
+        self.lock = threading.Lock()
+        self.counts = {"calls": 0, "failed": 0, "audioSeconds": 0.0, "seconds": 0.0}
+
+    def ready(self):
+        """Whether the model is loaded or can be; a failed load is not retried"""
+        if self.pipeline is None and self.error is None:
+            try:
+                import faster_whisper  # noqa: F401
+            except ImportError as e:
+                self.error = str(e)
+        return self.error is None
+
+    def load(self):
+        with self.lock:
+            if self.pipeline is None:
+                if self.error is not None:
+                    raise RuntimeError(f"Local Whisper unavailable: {self.error}")
+                try:
+                    import faster_whisper
+                    log.info("🔧 Loading local Whisper %s (%s)...", LOCAL_WHISPER_MODEL, LOCAL_WHISPER_COMPUTE_TYPE)
+                    model = faster_whisper.WhisperModel(
+                        LOCAL_WHISPER_MODEL,
+                        device="cpu",
+                        compute_type=LOCAL_WHISPER_COMPUTE_TYPE,
+                        cpu_threads=LOCAL_WHISPER_CPU_THREADS,
+                        num_workers=LOCAL_WHISPER_WORKERS
+                    )
+                    batched = getattr(faster_whisper, "BatchedInferencePipeline", None)
+                    self.batched = batched is not None and LOCAL_WHISPER_BATCH_SIZE > 1
+                    self.pipeline = batched(model=model) if self.batched else model
+                    log.info("✅ Local Whisper loaded")
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    log.error("❌ Failed to load local Whisper: %s", self.error)
+                    raise
+        return self.pipeline
+
+    @span("whisper_local")
+    def transcribe(self, file):
+        """Transcribe an open file, a path or a (filename, bytes or file) tuple"""
+        pipeline = self.load()
+        body = rewind(file)
+        file = io.BytesIO(body) if isinstance(body, (bytes, bytearray)) else body
+        options = {"language": WHISPER_LANGUAGE, "temperature": WHISPER_TEMPERATURE, "beam_size": LOCAL_WHISPER_BEAM_SIZE}
+        if self.batched:
+            options["batch_size"] = LOCAL_WHISPER_BATCH_SIZE
+        with self.slots:
+            start = time.perf_counter()
+            try:
+                segments, info = pipeline.transcribe(file, **options)
+                text = " ".join(segment.text.strip() for segment in segments)
+            except Exception:
+                self.count("failed")
+                raise
+            self.count("calls")
+            self.count("audioSeconds", info.duration)
+            self.count("seconds", time.perf_counter() - start)
+        return text
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counts[key] += amount
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        return {
+            "model": LOCAL_WHISPER_MODEL,
+            "loaded": self.pipeline is not None,
+            "error": self.error,
+            **counts,
+            "audioSeconds": round(counts["audioSeconds"], 1),
+            "seconds": round(counts["seconds"], 1),
+            "realtimeFactor": round(counts["seconds"] / counts["audioSeconds"], 3) if counts["audioSeconds"] else None
+        }
+
+class ReplayWhisper:
+    """Stand-in engine answering with the transcripts recorded in REPLAY_PATH"""
+    name = "replay"
+    model = "replay"
+
+    def ready(self):
+        return replay_log.ready()
+
+    @property
+    def error(self):
+        return replay_log.error
+
+    def transcribe(self, file):
+        """Transcript recorded for an open file, a path or a (filename, bytes or file) tuple"""
+        body = rewind(file)
+        if isinstance(body, (bytes, bytearray)):
+            digest = hashlib.sha256(body).hexdigest()
+        elif isinstance(body, str):
+            digest = file_sha256(body)
+        else:
+            digest = stream_sha256(body)
+        text = replay_log.transcript(digest)
+        if text is None:
+            raise LookupError(f"no recorded transcript for audio {digest[:12]}")
+        return text
+
+groq_whisper = GroqWhisper()
+local_whisper = LocalWhisper()
+replay_whisper = ReplayWhisper()
+
+def configured_engine():
+    return {"local": local_whisper, "replay": replay_whisper}.get(TRANSCRIPTION_ENGINE, groq_whisper)
+
+def transcription_engine():
+    """The engine for the next clip; None when the configured engine cannot run at all"""
+    if TRANSCRIPTION_ENGINE in ("local", "replay"):
+        engine = configured_engine()
+        return engine if engine.ready() else None
+    if TRANSCRIPTION_ENGINE == "auto" and not groq_whisper.ready() and local_whisper.ready():
+        return local_whisper
+    return groq_whisper if get_groq_client() is not None else None
+
+def transcription_model():
+    """Model name that transcripts are cached under: the configured engine's, never a fallback's"""
+    return configured_engine().model
+
+def cacheable(engine):
+    """Whether a transcript from engine may be cached; auto-mode local fallbacks are not, so Groq takes over once it recovers"""
+    return engine.model == transcription_model()
+
+def local_fallback(e):
+    """Whether a failed Groq transcription should be retried on local Whisper"""
+    return (TRANSCRIPTION_ENGINE == "auto" and (isinstance(e, GroqUnavailable) or is_retryable_groq_error(e))
+            and local_whisper.ready())
+
+def request_transcription(file):
+    """Transcribe file with the selected engine; in auto mode Groq failures fall back to local Whisper"""
+    return transcribe_with_engine(file)[0]
+
+def transcribe_with_engine(file):
+    """(text, engine that produced it) for file"""
+    engine = transcription_engine() or groq_whisper
+    if engine is replay_whisper:
+        return replay_whisper.transcribe(file), replay_whisper
+    if engine is local_whisper:
+        if TRANSCRIPTION_ENGINE == "auto":
+            FALLBACKS.inc("local_whisper")
+            log.info("🖥️ Groq Whisper busy, transcribing locally")
+        return local_whisper.transcribe(file), local_whisper
+    try:
+        return groq_whisper.transcribe(file), groq_whisper
+    except Exception as e:
+        if not local_fallback(e):
+            raise
+        FALLBACKS.inc("local_whisper")
+        log.warning("⚠️ Groq Whisper failed (%s), transcribing locally", type(e).__name__)
+        return local_whisper.transcribe(file), local_whisper
+
+def transcription_engines():
+    return {
+        "engine": TRANSCRIPTION_ENGINE,
+        "selected": getattr(transcription_engine(), "name", None),
+        "local": local_whisper.stats()
+    }
+
+# ================== LONG AUDIO ==================
+# Recordings longer than LONG_AUDIO_SECONDS are cut into CHUNK_SECONDS pieces
+# and the pieces are transcribed concurrently, so a 20 minute dictation
+# takes about as long as one chunk instead of one long blocking request (and
+# is no longer bound by Whisper's 25MB request limit). Each cut is placed at
+# the quietest point of the CHUNK_SEARCH_SECONDS before its target so words
+# are not split, and neighbouring chunks overlap by CHUNK_OVERLAP_SECONDS;
+# the words repeated in the overlap are removed when the texts are stitched.
+# Only uploads of at least LONG_AUDIO_MIN_BYTES are decoded to measure them,
+# and the decoded audio is reused when the recording turns out to be short.
+# Uploads over WHISPER_MAX_BYTES are always chunked, whatever their length.
+LONG_AUDIO_CHUNKING = os.getenv("LONG_AUDIO_CHUNKING", "true").lower() == "true"
+LONG_AUDIO_MIN_BYTES = int(os.getenv("LONG_AUDIO_MIN_BYTES", str(1024 * 1024)))
+LONG_AUDIO_SECONDS = float(os.getenv("LONG_AUDIO_SECONDS", "180"))
+CHUNK_SECONDS = float(os.getenv("CHUNK_SECONDS", "90"))
+CHUNK_OVERLAP_SECONDS = float(os.getenv("CHUNK_OVERLAP_SECONDS", "1.5"))
+CHUNK_SEARCH_SECONDS = float(os.getenv("CHUNK_SEARCH_SECONDS", "10"))
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "6"))
+WHISPER_MAX_BYTES = 25 * 1024 * 1024
+STITCH_MAX_OVERLAP_WORDS = 40
+
+chunk_executor = ThreadPoolExecutor(max_workers=CHUNK_WORKERS, thread_name_prefix="chunk")
+
+def decode_for_chunking(audio, file_size):
+    """Decode a recording big enough that it may need chunking; None if it is small or cannot be decoded"""
+    if not LONG_AUDIO_CHUNKING or file_size < LONG_AUDIO_MIN_BYTES:
+        return None
+    try:
+        from pydub import AudioSegment
+        if hasattr(audio, "seek"):
+            audio.seek(0)
+        with span("audio_decode"):
+            return AudioSegment.from_file(io.BytesIO(audio) if isinstance(audio, (bytes, bytearray)) else audio)
+    except ImportError:
+        return None
+    except Exception as e:
+        log.warning("⚠️ Could not decode audio for chunking: %s", e)
+        return None
+
+def needs_chunking(segment, file_size):
+    return segment.duration_seconds > LONG_AUDIO_SECONDS or file_size > WHISPER_MAX_BYTES
+
+def quietest_point(segment, start_ms, end_ms, frame_ms=50):
+    """Middle of the lowest-energy frame between start_ms and end_ms"""
+    best_ms, best_rms = end_ms, None
+    for pos in range(start_ms, end_ms - frame_ms + 1, frame_ms):
+        rms = segment[pos:pos + frame_ms].rms
+        if best_rms is None or rms < best_rms:
+            best_ms, best_rms = pos + frame_ms // 2, rms
+    return best_ms
+
+def plan_chunks(segment):
+    """(start_ms, end_ms) for each chunk: cut on silence, then widened by the overlap"""
+    length = len(segment)
+    chunk_ms = int(CHUNK_SECONDS * 1000)
+    search_ms = int(min(CHUNK_SEARCH_SECONDS, CHUNK_SECONDS / 2) * 1000)
+    overlap_ms = int(CHUNK_OVERLAP_SECONDS * 1000)
+
+    cuts = [0]
+    while length - cuts[-1] > chunk_ms + search_ms:
+        target = cuts[-1] + chunk_ms
+        cuts.append(quietest_point(segment, target - search_ms, target))
+    cuts.append(length)
+
+    return [
+        (max(0, start - overlap_ms), min(length, end + overlap_ms))
+        for start, end in zip(cuts, cuts[1:])
+    ]
+
+@span("audio_convert")
+def export_chunk(chunk):
+    """Encode one chunk for Whisper as 16 kHz mono, honouring AUDIO_TRANSCODE where it applies"""
+    chunk = chunk.set_channels(1).set_frame_rate(WHISPER_SAMPLE_RATE)
+    buffer = io.BytesIO()
+    if AUDIO_TRANSCODE == "flac":
+        chunk.export(buffer, format="flac")
+        return "chunk.flac", buffer.getvalue()
+    if AUDIO_TRANSCODE == "opus":
+        chunk.export(buffer, format="ogg", codec="libopus", bitrate="32k")
+        return "chunk.ogg", buffer.getvalue()
+    chunk.export(buffer, format="wav")
+    return "chunk.wav", buffer.getvalue()
+
+def transcribe_chunk(chunk):
+    # Keyed on the decoded samples, so a hit skips the export as well
+    cache_key = transcription_cache_key(hashlib.sha256(chunk.raw_data).hexdigest())
+    text = transcription_cache.get(cache_key)
+    if text is None:
+        text, engine = transcribe_with_engine(export_chunk(chunk))
+        text = text.strip()
+        if len(text) >= 3 and cacheable(engine):
+            transcription_cache.put(cache_key, text)
+    return text
+
+def _stitch_word(word):
+    return re.sub(r'[^\w]', '', word.lower())
+
+def stitch_transcripts(texts):
+    """Join chunk transcripts, dropping the words each chunk repeats from the previous one"""
+    words = []
+    for text in texts:
+        new_words = text.split()
+        tail = [_stitch_word(w) for w in words[-STITCH_MAX_OVERLAP_WORDS:]]
+        head = [_stitch_word(w) for w in new_words[:STITCH_MAX_OVERLAP_WORDS]]
+        overlap = 0
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == head[:size] and (size > 1 or len(head[0]) > 3):
+                overlap = size
+                break
+        words.extend(new_words[overlap:])
+    return " ".join(words)
+
+def transcribe_long_audio(segment):
+    """Transcribe the chunks of a long recording concurrently and stitch the text"""
+    segment = condition_audio(segment)
+    spans = plan_chunks(segment)
+    total = len(spans)
+    log.info("✂️ Splitting %.0fs of audio into %d chunks", segment.duration_seconds, total)
+    report_progress("transcription", 0, total)
 
-def get_product_subcategory(product_name, subcategory_keywords):
-    """Helper function to determine product subcategory"""
-    product_lower = product_name.lower()
-    for subcategory, keywords in subcategory_keywords.items():
-        for keyword in keywords:
-            if keyword in product_lower:
-                return subcategory
-    return ""
+    futures = {chunk_executor.submit(transcribe_chunk, segment[start:end]): i for i, (start, end) in enumerate(spans)}
+    texts = [None] * total
+    done = 0
+    for future in as_completed(futures):
+        texts[futures[future]] = future.result()
+        done += 1
+        log.debug("🧩 Chunk %d/%d transcribed (%d/%d done)", futures[future] + 1, total, done, total)
+        report_progress("transcription", done, total)
 
-# ================== TRANSCRIPTION ==================
-def transcribe_audio(path):
-    """Transcribe audio using Groq Whisper API"""
+    return stitch_transcripts(texts)
+
+def transcribe_audio(audio):
+    """Transcribe audio using Groq Whisper API
+
+    audio is the path of a saved upload or, for in-memory uploads, its raw WebM bytes
+    or the (spooled) file the request parser left it in.
+    """
     try:
-        # Check if Groq client is initialized
-        if groq_client is None:
-            print("❌ Groq client not initialized")
-            return "Groq API client initialization failed. Please check API key."
-        
+        prepared = prepare_transcription(audio)
+        if isinstance(prepared, str):
+            return prepared
+        upload, cache_key = prepared
+
+        # Transcribe using Groq Whisper
+        log.info("📤 Sending audio to Whisper...")
+        if isinstance(upload, str):
+            with open(upload, "rb") as audio_file:
+                transcription, engine = transcribe_with_engine(audio_file)
+        else:
+            transcription, engine = transcribe_with_engine(upload)
+        return finish_transcription(transcription, cache_key if cacheable(engine) else None)
+
+    except Exception as e:
+        return transcription_error_message(e)
+
+def prepare_transcription(audio):
+    """Checks, conversion and cache lookup ahead of the Whisper call.
+
+    Returns the final text when no call is needed (an error message, a cached
+    or chunked transcript), else (upload, cache_key) for the Whisper request.
+    """
+    # Check that some engine can transcribe
+    if transcription_engine() is None:
+        if TRANSCRIPTION_ENGINE == "local":
+            log.error("❌ Local Whisper unavailable: %s", local_whisper.error)
+            return "Audio transcription unavailable: local Whisper could not be loaded."
+        if TRANSCRIPTION_ENGINE == "replay":
+            log.error("❌ Replay transcripts unavailable: %s", replay_whisper.error)
+            return "Audio transcription unavailable: no recorded transcripts to replay."
+        log.error("❌ Groq client not initialized")
+        return "Groq API client initialization failed. Please check API key."
+    
+    if isinstance(audio, (bytes, bytearray)):
+        path = None
+        file_size = len(audio)
+    elif hasattr(audio, "read"):
+        path = None
+        file_size = audio.seek(0, os.SEEK_END)
+    else:
+        path = audio
         # Check file exists and size
         if not os.path.exists(path):
-            print(f"❌ Audio file not found: {path}")
+            log.error("❌ Audio file not found: %s", path)
             return "Audio file not found"
-        
         file_size = os.path.getsize(path)
-        print(f"📁 Audio file size: {file_size / 1024:.2f} KB")
+    log.debug("📁 Audio file size: %.2f KB", file_size / 1024)
 
-        # Check file size limit (25MB for Groq)
-        if file_size > 25 * 1024 * 1024:
-            print("❌ Audio file too large")
-            return "Audio file too large (max 25MB). Please record shorter audio."
-        
-        if file_size < 100:
-            print("❌ Audio file too small")
-            return "Audio file too small. Please record again."
+    if file_size < 100:
+        log.error("❌ Audio file too small")
+        return "Audio file too small. Please record again."
 
+    # Keyed on the uploaded bytes, so a hit skips decoding and encoding altogether
+    if path:
+        digest = file_sha256(path)
+    elif hasattr(audio, "read"):
+        digest = stream_sha256(audio)
+    else:
+        digest = hashlib.sha256(audio).hexdigest()
+    cache_key = transcription_cache_key(digest)
+    text = transcription_cache.get(cache_key)
+    if text is not None:
+        log.info("♻️ Transcription cache hit")
+        return finish_transcription(text)
+
+    segment = decode_for_chunking(audio, file_size)
+    if segment is not None and needs_chunking(segment, file_size):
+        return finish_transcription(transcribe_long_audio(segment), cache_key)
+
+    # Check file size limit (25MB for Groq)
+    if file_size > WHISPER_MAX_BYTES:
+        log.error("❌ Audio file too large")
+        return "Audio file too large (max 25MB). Please record shorter audio."
+
+    if path is None or (path.endswith('.webm') and AUDIO_TRANSCODE != "wav"):
+        if path is not None:
+            with open(path, "rb") as f:
+                audio = f.read()
+        upload = encode_for_whisper(audio if hasattr(audio, "read") else bytes(audio), segment=segment)
+    else:
         # Convert WebM to WAV for better compatibility
         if path.endswith('.webm'):
             try:
                 from pydub import AudioSegment
-                wav_path = path.replace(".webm", ".wav")
-                AudioSegment.from_file(path).export(wav_path, format="wav")
+                wav_path = os.path.splitext(path)[0] + ".wav"
+                with span("audio_convert"):
+                    if segment is None:
+                        segment = AudioSegment.from_file(path)
+                    condition_audio(segment).export(wav_path, format="wav")
                 path = wav_path
-                print(f"🔄 Converted WebM to WAV: {path}")
+                log.info("🔄 Converted WebM to WAV: %s", path)
             except ImportError:
-                print("⚠️ pydub not installed, using original file")
+                log.warning("⚠️ pydub not installed, using original file")
+                FALLBACKS.inc("audio_convert_failed")
             except Exception as e:
-                print(f"⚠️ Audio conversion failed: {e}, using original file")
+                log.warning("⚠️ Audio conversion failed: %s, using original file", e)
+                FALLBACKS.inc("audio_convert_failed")
+        upload = path
+    return upload, cache_key
 
-        # Transcribe using Groq Whisper
-        print("📤 Sending audio to Groq Whisper API...")
-        
-        with open(path, "rb") as audio_file:
-            transcription = groq_client.audio.transcriptions.create(
-                file=audio_file,  # send file object, NOT read()
-                model="whisper-large-v3",
-                response_format="text",  # simpler + more stable
-                temperature=0,
-                language="en"  # Force English-only transcription
-            )
-        
-        text = transcription.strip()
-        print(f"✅ Transcription successful ({len(text)} chars)")
-        print(f"📝 Transcribed text: {text[:200]}...")
+def transcription_cache_key(audio_digest):
+    """Cache key for audio whose bytes hash to audio_digest, covering the model and how audio is prepared"""
+    pipeline = f"{AUDIO_TRANSCODE}|trim={AUDIO_TRIM_SILENCE}"
+    return transcription_cache.make_key(audio_digest, f"{transcription_model()}|{pipeline}", WHISPER_LANGUAGE, WHISPER_TEMPERATURE)
 
-        if not text or len(text.strip()) < 3:
-            print("⚠️ Transcription too short or empty")
-            return "No speech detected. Please speak clearly and try again."
+def finish_transcription(transcription, cache_key=None):
+    """Cache a fresh Whisper answer under cache_key and check it holds speech"""
+    text = transcription.strip()
+    if cache_key and len(text) >= 3:
+        transcription_cache.put(cache_key, text)
 
-        return text
+    log.info("✅ Transcription successful (%d chars)", len(text))
+    log.debug("📝 Transcribed text: %.200s...", text)
+
+    if len(text) < 3:
+        log.warning("⚠️ Transcription too short or empty")
+        return "No speech detected. Please speak clearly and try again."
+    return text
+
+def transcription_error_message(e):
+    """User-facing message for an exception raised while transcribing"""
+    log.debug("FULL ERROR: %r", e)
+    log.error("❌ Transcription error: %s: %s", type(e).__name__, e)
+    
+    if isinstance(e, GroqUnavailable):
+        return "Groq transcription is busy right now. Please try again in a minute."
+
+    # Check for specific network/API errors
+    error_str = str(e).lower()
+    if "network" in error_str or "connection" in error_str or "timeout" in error_str:
+        return "Network error: Unable to connect to transcription service. Please check your internet connection and try again."
+    elif "unauthorized" in error_str or "authentication" in error_str or "401" in error_str:
+        return "Authentication error: Invalid API key. Please check your Groq API key."
+    elif "rate limit" in error_str or "429" in error_str:
+        return "Rate limit error: Too many requests. Please wait a moment and try again."
+    elif "400" in error_str or "bad request" in error_str:
+        return "Audio format error: The audio file may be corrupted or in an unsupported format."
+    else:
+        return f"Transcription failed: {str(e)}"
+
+def is_transcription_error(transcript):
+    return transcript.startswith(("Transcription failed", "Groq", "Audio"))
+
+# ================== UPLOAD STORAGE ==================
+# Every upload is streamed into its own directory under UPLOAD_FOLDER and named
+# after the SHA-256 of its bytes, so concurrent requests never share a path and
+# removing the directory also removes anything converted next to it. With
+# AUDIO_IN_MEMORY=true uploads are read into memory instead and never touch disk.
+AUDIO_IN_MEMORY = os.getenv("AUDIO_IN_MEMORY", "false").lower() == "true"
+# MAX_UPLOAD_BYTES bounds a clip that goes to Whisper whole (streamed frames,
+# or any upload while LONG_AUDIO_CHUNKING is off). Recordings that are cut into
+# chunks may be up to MAX_LONG_UPLOAD_BYTES, since no single request carries them.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+MAX_LONG_UPLOAD_BYTES = int(os.getenv("MAX_LONG_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_LIMIT_BYTES = max(MAX_UPLOAD_BYTES, MAX_LONG_UPLOAD_BYTES) if LONG_AUDIO_CHUNKING else MAX_UPLOAD_BYTES
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Refuse oversized request bodies before they are parsed, leaving a little
+# room for the multipart framing around the audio file
+app.config["MAX_CONTENT_LENGTH"] = UPLOAD_LIMIT_BYTES + 1024 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when an upload grows past UPLOAD_LIMIT_BYTES while being saved"""
+
+def iter_upload_chunks(storage):
+    """Yield an upload's bytes in chunks, raising UploadTooLarge past UPLOAD_LIMIT_BYTES"""
+    size = 0
+    while True:
+        chunk = storage.stream.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            return
+        size += len(chunk)
+        if size > UPLOAD_LIMIT_BYTES:
+            raise UploadTooLarge(f"upload exceeds {UPLOAD_LIMIT_BYTES} bytes")
+        yield chunk
+
+@span("upload_save")
+def save_upload(storage, suffix=".webm"):
+    """Stream an uploaded file to disk in chunks and return its content-addressed path"""
+    upload_dir = tempfile.mkdtemp(prefix="upload_", dir=UPLOAD_FOLDER)
+    part_path = os.path.join(upload_dir, "audio.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(part_path, "wb") as f:
+            for chunk in iter_upload_chunks(storage):
+                size += len(chunk)
+                digest.update(chunk)
+                f.write(chunk)
+        path = os.path.join(upload_dir, digest.hexdigest() + suffix)
+        os.replace(part_path, path)
+    except BaseException:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        raise
+
+    log.info("💾 Audio saved to: %s (%.2f KB)", path, size / 1024)
+    return path
+
+def read_upload(storage):
+    """Read an uploaded file into memory in chunks and return its bytes"""
+    buffer = io.BytesIO()
+    for chunk in iter_upload_chunks(storage):
+        buffer.write(chunk)
+    data = buffer.getvalue()
+    log.info("💾 Audio kept in memory (%.2f KB)", len(data) / 1024)
+    return data
+
+def discard_upload(path):
+    """Remove the directory save_upload created for an upload"""
+    upload_dir = os.path.dirname(path)
+    if os.path.basename(upload_dir).startswith("upload_"):
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+def receive_upload(storage):
+    """Take an upload into memory or onto disk depending on AUDIO_IN_MEMORY"""
+    return read_upload(storage) if AUDIO_IN_MEMORY else save_upload(storage)
+
+def release_upload(upload):
+    if isinstance(upload, str):
+        discard_upload(upload)
+
+def upload_too_large_error(limit=UPLOAD_LIMIT_BYTES):
+    limit_mb = limit / (1024 * 1024)
+    return f"Audio file too large (max {limit_mb:g}MB). Please record shorter audio."
+
+def upload_too_large_response():
+    log.error("❌ Audio file too large")
+    return jsonify({"error": upload_too_large_error()}), 413
+
+# ================== AUDIO PIPELINES ==================
+def process_business_audio(upload):
+    """Transcribe a saved business recording, extract the profile and start a new session.
+
+    Returns (body, status) so the result can be served inline or stored on a job.
+    """
+    log.info("🔍 Starting transcription...")
+    transcript = transcribe_audio(upload)
+    
+    # Check if transcription failed
+    if is_transcription_error(transcript):
+        log.error("❌ Transcription error: %s", transcript)
+        return {"error": transcript}, 400
+    
+    log.debug("📝 Transcription completed: %.100s...", transcript)
+    return business_upload_result(transcript)
+
+def business_upload_result(transcript):
+    """Extract the profile from a business transcript and start a new session with it"""
+    log.info("🤖 Starting business info extraction...")
+    data = extract_business_info(transcript)
+    log.info("✅ Extraction completed")
+
+    # Format products properly
+    products = data.get("products", [])
+    formatted_products = []
+    for item in products:
+        if isinstance(item, str):
+            formatted_products.append({
+                "name": item,
+                "price": 0,
+                "category": "",
+                "subcategory": "",
+                "description": f"Fresh {item}",
+                "unit": "",
+                "unitQuantity": 1,
+                "minimumOrderQuantity": 1,
+                "quantity": 1
+            })
+        elif isinstance(item, dict):
+            formatted_products.append({
+                "name": item.get("name", ""),
+                "price": item.get("price", 0),
+                "category": item.get("category", ""),
+                "subcategory": item.get("subcategory", ""),
+                "description": item.get("description", ""),
+                "unit": item.get("unit", ""),
+                "unitQuantity": item.get("unitQuantity", 1),
+                "minimumOrderQuantity": item.get("minimumOrderQuantity", 1),
+                "quantity": item.get("quantity", 1)
+            })
+        else:
+            formatted_products.append({
+                "name": str(item),
+                "price": 0,
+                "category": "",
+                "subcategory": "",
+                "description": f"Fresh {item}",
+                "unit": "",
+                "unitQuantity": 1,
+                "minimumOrderQuantity": 1,
+                "quantity": 1
+            })
+
+    final_json = {
+        "personName": data.get("personName", ""),
+        "name": data.get("name", ""),
+        "address": data.get("address", ""),
+        "city": data.get("city", ""),
+        "state": data.get("state", ""),
+        "pincode": data.get("pincode", ""),
+        "gstNumber": data.get("gstNumber", ""),
+        "category": data.get("category", ""),
+        "subcategory": data.get("subcategory", ""),
+        "businessType": data.get("businessType", ""),
+        "email": data.get("email", ""),
+        "phone": data.get("phone", ""),
+        "website": data.get("website", ""),
+        "establishedYear": data.get("establishedYear", ""),
+        "products": formatted_products,
+        "transcription": transcript
+    }
+
+    session_id = create_session(final_json)
+    
+    log.info("💾 Session saved to: %s", session_id)
+
+    return {
+        "data": final_json, 
+        "filename": session_id,
+        "transcription": transcript
+    }, 200
+
+def save_products(session_id, transcript, products, pending=None):
+    """Append products to a session; a pending LLM future later swaps in its own list.
+
+    Raises SessionNotFound if the session is gone.
+    """
+    start = []
+
+    def add_products(session_data):
+        start.append(len(session_data.get("products", [])))
+        session_data["products"] = session_data.get("products", []) + products
+        session_data["transcription"] = transcript
+
+    session_data = update_session(session_id, add_products)
+    if pending is not None and PRODUCT_LLM_LATE_UPDATE:
+        pending.add_done_callback(lambda future: apply_late_products(session_id, start[0], products, future))
+    return session_data
+
+def apply_late_products(session_id, start, provisional, future):
+    """Replace the regex products saved at start with the late LLM result, unless they were edited since"""
+    products = future.result()
+    if not products:
+        return
+
+    def swap(session_data):
+        current = session_data.get("products", [])
+        if current[start:start + len(provisional)] != provisional:
+            log.warning("⚠️ Products in %s changed before the LLM result landed, keeping them", session_id)
+            return False
+        session_data["products"] = current[:start] + products + current[start + len(provisional):]
+
+    try:
+        update_session(session_id, swap)
+        log.info("💾 Late LLM products saved to: %s (%d products)", session_id, len(products))
+    except SessionNotFound:
+        log.warning("⚠️ Session %s was deleted before the LLM result landed", session_id)
+
+def process_product_audio(upload, session_id, refresh=False):
+    """Transcribe a saved product recording and append the products to a session.
+
+    refresh bypasses the product extraction cache. Returns (body, status) so
+    the result can be served inline or stored on a job.
+    """
+    log.info("🔍 Starting transcription...")
+    transcript = transcribe_audio(upload)
+    
+    # Check if transcription failed
+    if is_transcription_error(transcript):
+        log.error("❌ Transcription error: %s", transcript)
+        return {"error": transcript}, 400
+    
+    log.debug("📝 Transcription completed: %.100s...", transcript)
+    
+    log.info("🤖 Starting product extraction...")
+    products, extractor, pending = extract_products_hedged(transcript, refresh=refresh)
+    log.info("✅ Product extraction completed: %d products found", len(products))
+    return product_upload_result(session_id, transcript, products, extractor, pending)
 
+def product_upload_result(session_id, transcript, products, extractor, pending=None):
+    """Save extracted products to the session and build the upload response"""
+    try:
+        session_data = save_products(session_id, transcript, products, pending)
+    except SessionNotFound:
+        log.error("❌ Session %s was deleted before its products were saved", session_id)
+        return {"error": "Session file not found"}, 404
+    
+    log.info("💾 Session updated with products: %s", session_id)
+
+    return {
+        "data": session_data, 
+        "filename": session_id,
+        "transcription": transcript,
+        "extractor": extractor,
+        "llmPending": pending is not None and PRODUCT_LLM_LATE_UPDATE
+    }, 200
+
+# ================== BACKGROUND JOBS ==================
+# Uploads sent with mode=async (or a webhook_url) are saved and handed to a
+# bounded worker pool, so the request returns a job id straight away instead
+# of holding the worker through conversion, Whisper and extraction. At most
+# JOB_WORKERS jobs run at once and JOB_QUEUE_DEPTH more may wait; beyond that
+# uploads are refused with 429 until a slot frees up.
+# Webhooks only go to public addresses, so a job cannot be pointed at this
+# host or its private network; WEBHOOK_ALLOWED_HOSTS further restricts them to
+# the listed hostnames, and WEBHOOK_ALLOW_PRIVATE=true lifts the address check.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "8"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10"))
+WEBHOOK_ALLOWED_HOSTS = {h.strip().lower() for h in os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if h.strip()}
+WEBHOOK_ALLOW_PRIVATE = os.getenv("WEBHOOK_ALLOW_PRIVATE", "false").lower() == "true"
+
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+job_slots = threading.BoundedSemaphore(JOB_WORKERS + JOB_QUEUE_DEPTH)
+JOBS = {}
+JOBS_LOCK = threading.Lock()
+job_local = threading.local()
+webhook_client = None
+webhook_client_lock = threading.Lock()
+
+def report_progress(stage, done, total):
+    """Record progress on the job running in this thread, if any"""
+    job = getattr(job_local, "job", None)
+    if job is not None:
+        job["progress"] = {"stage": stage, "done": done, "total": total}
+
+def job_view(job):
+    """Public representation of a job, as served by /jobs/<job_id> and sent to webhooks"""
+    return {
+        "jobId": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "createdAt": job["createdAt"],
+        "finishedAt": job["finishedAt"],
+        "httpStatus": job["httpStatus"],
+        "progress": job["progress"],
+        "result": job["result"],
+        "statusUrl": f"/jobs/{job['id']}"
+    }
+
+def submit_job(kind, func, args, webhook_url=None, uploads=()):
+    """Queue func(*args) on the worker pool; the caller must already hold a job slot.
+
+    func returns (body, status) like the audio pipelines; uploads are deleted
+    once the job has finished with them.
+    """
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "queued",
+        "createdAt": datetime.now().isoformat(),
+        "finishedAt": None,
+        "httpStatus": None,
+        "progress": None,
+        "result": None,
+        "webhookUrl": webhook_url
+    }
+    with JOBS_LOCK:
+        prune_jobs()
+        JOBS[job["id"]] = job
+    job_executor.submit(run_job, job, func, args, uploads)
+    log.info("📥 Queued %s job %s", kind, job['id'])
+    return job
+
+def run_job(job, func, args, uploads):
+    job["status"] = "running"
+    job_local.job = job
+    try:
+        body, status = func(*args)
     except Exception as e:
-        print("FULL ERROR:", repr(e))
-        print(f"❌ Transcription error: {type(e).__name__}: {str(e)}")
-        
-        # Check for specific network/API errors
-        error_str = str(e).lower()
-        if "network" in error_str or "connection" in error_str or "timeout" in error_str:
-            return "Network error: Unable to connect to transcription service. Please check your internet connection and try again."
-        elif "unauthorized" in error_str or "authentication" in error_str or "401" in error_str:
-            return "Authentication error: Invalid API key. Please check your Groq API key."
-        elif "rate limit" in error_str or "429" in error_str:
-            return "Rate limit error: Too many requests. Please wait a moment and try again."
-        elif "400" in error_str or "bad request" in error_str:
-            return "Audio format error: The audio file may be corrupted or in an unsupported format."
+        log.exception("❌ Error in %s job %s: %s", job['kind'], job['id'], e)
+        body, status = {"error": f"Server error: {str(e)}"}, 500
+    finally:
+        job_local.job = None
+        job_slots.release()
+        for upload in uploads:
+            release_upload(upload)
+
+    job["result"] = body
+    job["httpStatus"] = status
+    job["status"] = "done" if status < 400 else "failed"
+    job["finishedAt"] = datetime.now().isoformat()
+    job["finishedMonotonic"] = time.monotonic()
+    log.info("✅ Job %s %s", job['id'], job['status'])
+
+    if job["webhookUrl"]:
+        notify_webhook(job)
+
+def get_webhook_client():
+    """Shared keep-alive client for webhook deliveries, built on first use"""
+    global webhook_client
+    with webhook_client_lock:
+        if webhook_client is None:
+            import httpx
+            webhook_client = httpx.Client(timeout=WEBHOOK_TIMEOUT_SECONDS)
+        return webhook_client
+
+def webhook_url_error(url):
+    """Why url may not receive webhooks, or None when it may"""
+    from urllib.parse import urlsplit
+    try:
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port
+    except ValueError:
+        return "webhook_url is not a valid URL"
+    if parts.scheme not in ("http", "https") or not host:
+        return "webhook_url must be an http(s) URL"
+    if WEBHOOK_ALLOWED_HOSTS and host.lower() not in WEBHOOK_ALLOWED_HOSTS:
+        return "webhook_url host is not allowed"
+    if WEBHOOK_ALLOW_PRIVATE:
+        return None
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port or 443, proto=socket.IPPROTO_TCP)}
+    except OSError:
+        return "webhook_url host could not be resolved"
+    # Every address must be public, or a second DNS answer could still reach inside
+    if not all(ipaddress.ip_address(address.split("%")[0]).is_global for address in addresses):
+        return "webhook_url must point to a public address"
+    return None
+
+def notify_webhook(job):
+    # Checked again at delivery, since the host may resolve differently by now
+    error = webhook_url_error(job["webhookUrl"])
+    if error:
+        log.warning("⚠️ Webhook for job %s not sent: %s", job['id'], error)
+        return
+    try:
+        response = get_webhook_client().post(job["webhookUrl"], json=job_view(job))
+        log.info("📨 Webhook for job %s answered %s", job['id'], response.status_code)
+    except Exception as e:
+        log.warning("⚠️ Webhook for job %s failed: %s", job['id'], e)
+
+def prune_jobs():
+    """Forget finished jobs older than JOB_TTL_SECONDS; call with JOBS_LOCK held"""
+    cutoff = time.monotonic() - JOB_TTL_SECONDS
+    expired = [job_id for job_id, job in JOBS.items() if job.get("finishedMonotonic", cutoff + 1) < cutoff]
+    for job_id in expired:
+        del JOBS[job_id]
+
+def wants_sse(req=request):
+    return req.values.get("stream") == "sse" or "text/event-stream" in req.headers.get("Accept", "")
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_product_upload(upload, session_id, refresh=False):
+    """The product pipeline as server-sent events: transcript, each product as the LLM finishes it, then done"""
+    log.info("🔍 Starting transcription...")
+    transcript = transcribe_audio(upload)
+    if is_transcription_error(transcript):
+        log.error("❌ Transcription error: %s", transcript)
+        yield sse("error", {"error": transcript, "httpStatus": 400})
+        return
+    yield sse("transcript", {"text": transcript})
+
+    # Only Groq streams; any other routed extractor answers in one piece
+    routed = route_extractor("products", transcript, PRODUCT_LLM_DEADLINE_SECONDS)
+    cached = routed.cached("products", transcript, refresh)
+    products = []
+    try:
+        if cached is not None:
+            extractor, stream = "cache", cached
+        elif routed.name == "groq":
+            extractor, stream = routed.label, stream_products_llm(transcript, refresh=True)
+        elif routed.name != "regex":
+            extractor, stream = routed.label, routed.run("products", transcript, refresh) or []
+        else:
+            FALLBACKS.inc("llm_routed_away")
+            extractor, stream = "regex", []
+        for product in stream:
+            products.append(product)
+            yield sse("product", {"product": product, "extractor": extractor})
+    except Exception as e:
+        log.warning("⚠️ Streaming LLM extraction stopped: %s", e)
+        if products:
+            # A cut-off answer is not the product list; tell the client to drop what it showed
+            FALLBACKS.inc("llm_stream_failed")
+            yield sse("reset", {"discarded": len(products), "reason": "LLM stream failed"})
+            products = []
+
+    if not products:
+        if extractor != "regex":
+            log.info("🔄 LLM extraction failed or returned no products, using regex fallback")
+            FALLBACKS.inc("llm_failed")
+        extractor = "regex"
+        products = extract_products_fallback(transcript)
+        for product in products:
+            yield sse("product", {"product": product, "extractor": extractor})
+
+    try:
+        session_data = save_products(session_id, transcript, products)
+    except SessionNotFound:
+        yield sse("error", {"error": "Session file not found", "httpStatus": 404})
+        return
+
+    log.info("💾 Session updated with products: %s", session_id)
+    yield sse("done", {
+        "data": session_data,
+        "filename": session_id,
+        "transcription": transcript,
+        "extractor": extractor,
+        "llmPending": False
+    })
+
+def wants_job(req=request):
+    return req.values.get("mode") == "async" or bool(req.values.get("webhook_url"))
+
+def start_upload_job(kind, audio, func, *args):
+    """Take the upload and queue func(upload, *args) for it; the job releases the upload"""
+    webhook_url = request.values.get("webhook_url") or None
+    error = webhook_url and webhook_url_error(webhook_url)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if not job_slots.acquire(blocking=False):
+        log.warning("⚠️ Job queue full, rejecting upload")
+        response = jsonify({"error": "Too many uploads in progress. Please try again shortly."})
+        response.headers["Retry-After"] = "5"
+        return response, 429
+
+    try:
+        upload = receive_upload(audio)
+        job = submit_job(kind, func, (upload,) + args, webhook_url=webhook_url, uploads=(upload,))
+    except Exception:
+        job_slots.release()
+        raise
+
+    return jsonify(job_view(job)), 202
+
+# ================== BATCH TRANSCRIPTION ==================
+# /batch/transcribe takes many recordings in one request, as separate
+# multipart files and/or .zip archives of them, and runs each through the
+# normal audio pipeline on a shared pool of BATCH_WORKERS threads. The pool
+# is shared by every batch request, so at most BATCH_WORKERS recordings are
+# with Groq at once no matter how many agents sync together. Results are
+# streamed back as NDJSON in completion order, one line per recording,
+# followed by a summary line.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+BATCH_AUDIO_EXTENSIONS = (".webm", ".wav", ".mp3", ".m4a", ".ogg", ".opus", ".flac", ".mp4", ".aac")
+
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch")
+
+class BatchTooLarge(Exception):
+    pass
+
+def iter_batch_files(files):
+    """Yield (name, FileStorage) for every recording in the request, expanding zip archives"""
+    count = 0
+    for storage in files:
+        if storage.filename.lower().endswith(".zip") or storage.mimetype in ("application/zip", "application/x-zip-compressed"):
+            archive = zipfile.ZipFile(storage.stream)
+            entries = [
+                info for info in archive.infolist()
+                if not info.is_dir()
+                and not os.path.basename(info.filename).startswith(".")
+                and info.filename.lower().endswith(BATCH_AUDIO_EXTENSIONS)
+            ]
+            for info in entries:
+                count += 1
+                if count > BATCH_MAX_ITEMS:
+                    raise BatchTooLarge()
+                yield info.filename, FileStorage(stream=archive.open(info), filename=info.filename)
         else:
-            return f"Transcription failed: {str(e)}"
+            count += 1
+            if count > BATCH_MAX_ITEMS:
+                raise BatchTooLarge()
+            yield storage.filename, storage
+
+def run_batch_item(func, upload, args):
+    """Run one recording through its pipeline, never raising; always releases the upload"""
+    try:
+        return func(upload, *args)
+    except Exception as e:
+        log.error("❌ Batch item failed: %s", e)
+        return {"error": f"Server error: {str(e)}"}, 500
+    finally:
+        release_upload(upload)
+
+def stream_batch(items, func, args):
+    """Yield NDJSON lines as items finish; items are (index, name, upload or error body)"""
+    start = time.perf_counter()
+    futures = {}
+    failed = 0
+    for index, name, upload, error in items:
+        if error:
+            failed += 1
+            yield json.dumps({"index": index, "name": name, "httpStatus": error[1], "result": error[0]}) + "\n"
+        else:
+            futures[batch_executor.submit(run_batch_item, func, upload, args)] = (index, name)
+
+    for future in as_completed(futures):
+        index, name = futures[future]
+        body, status = future.result()
+        if status >= 400:
+            failed += 1
+        yield json.dumps({"index": index, "name": name, "httpStatus": status, "result": body}) + "\n"
+
+    elapsed = time.perf_counter() - start
+    log.info("📦 Batch finished: %d items, %d failed, %.2fs", len(items), failed, elapsed)
+    yield json.dumps({
+        "done": True,
+        "items": len(items),
+        "succeeded": len(items) - failed,
+        "failed": failed,
+        "elapsedSeconds": round(elapsed, 3)
+    }) + "\n"
+
+# ================== STREAMING PRODUCTS ==================
+# /stream/products keeps one request open while the user is still speaking.
+# The client sends its recording as a chunked POST body of frames, each a
+# 4-byte big-endian length followed by that many bytes of a self-contained
+# audio clip (a zero-length frame, or closing the body, ends the stream).
+# Every clip is transcribed as soon as it arrives and the regex fallback
+# runs on each newly completed sentence, so provisional products go back
+# within one clip's round trip. When the body ends, the LLM extracts the
+# final product list from the whole transcript and the session is saved.
+# Events are NDJSON lines; "t" is seconds since the stream opened.
+STREAM_MAX_CHUNKS = int(os.getenv("STREAM_MAX_CHUNKS", "240"))
+STREAM_MAX_BYTES = int(os.getenv("STREAM_MAX_BYTES", str(200 * 1024 * 1024)))
+SENTENCE_END = re.compile(r'(?<![Rr]s)[.!?](?=\s|$)')
+
+class StreamFrameError(Exception):
+    pass
+
+def read_exact(stream, size):
+    data = bytearray()
+    while len(data) < size:
+        block = stream.read(size - len(data))
+        if not block:
+            break
+        data.extend(block)
+    return bytes(data)
+
+def iter_stream_frames(stream):
+    """Yield the audio clips of a framed request body as they arrive"""
+    for _ in range(STREAM_MAX_CHUNKS + 1):
+        header = read_exact(stream, 4)
+        if not header:
+            return
+        if len(header) < 4:
+            raise StreamFrameError("Truncated frame header")
+        size = int.from_bytes(header, "big")
+        if size == 0:
+            return
+        if size > MAX_UPLOAD_BYTES:
+            raise StreamFrameError(upload_too_large_error(MAX_UPLOAD_BYTES))
+        frame = read_exact(stream, size)
+        if len(frame) < size:
+            raise StreamFrameError("Truncated audio frame")
+        yield frame
+    raise StreamFrameError(f"Too many audio chunks (max {STREAM_MAX_CHUNKS})")
+
+class IncrementalProductExtractor:
+    """Runs extract_products_fallback over a growing transcript, one completed sentence at a time"""
+
+    def __init__(self):
+        self.pending = ""
+        self.seen = set()
+        self.products = []
+
+    def feed(self, text):
+        """Add transcript text; returns products not reported before"""
+        self.pending = f"{self.pending} {text}".strip()
+        ends = [m.end() for m in SENTENCE_END.finditer(self.pending)]
+        if not ends:
+            return []
+        complete, self.pending = self.pending[:ends[-1]], self.pending[ends[-1]:].strip()
+        return self._extract(complete)
+
+    def finish(self):
+        """Extract from whatever trailing text never got a sentence end"""
+        remainder, self.pending = self.pending, ""
+        return self._extract(remainder) if remainder else []
+
+    def _extract(self, text):
+        new_products = []
+        for product in extract_products_fallback(text):
+            key = (product["name"], product["unit"])
+            if key not in self.seen:
+                self.seen.add(key)
+                new_products.append(product)
+        self.products.extend(new_products)
+        return new_products
+
+def stream_products(frames, session_id, refresh=False):
+    """Yield NDJSON events for a streamed product recording, ending with the saved session"""
+    start = time.perf_counter()
+    def event(kind, **fields):
+        return json.dumps({"event": kind, "t": round(time.perf_counter() - start, 3), **fields}) + "\n"
+
+    extractor = IncrementalProductExtractor()
+    texts = []
+    try:
+        for index, clip in enumerate(frames):
+            text = transcribe_audio(clip)
+            if is_transcription_error(text) or text.startswith("No speech"):
+                log.warning("⚠️ Stream chunk %s not transcribed: %s", index, text)
+                yield event("error", chunk=index, error=text)
+                continue
+            texts.append(text)
+            yield event("transcript", chunk=index, text=text)
+
+            new_products = extractor.feed(text)
+            if new_products:
+                yield event("products", chunk=index, provisional=True, products=new_products)
+    except StreamFrameError as e:
+        yield event("error", error=str(e))
+        return
+
+    trailing = extractor.finish()
+    if trailing:
+        yield event("products", chunk=len(texts) - 1, provisional=True, products=trailing)
+
+    transcript = " ".join(texts)
+    if not transcript:
+        yield event("error", error="No speech detected. Please speak clearly and try again.")
+        return
+
+    log.info("🤖 Refining streamed products with the full transcript...")
+    products, extractor, pending = extract_products_hedged(transcript, refresh=refresh)
+
+    try:
+        session_data = save_products(session_id, transcript, products, pending)
+    except SessionNotFound:
+        yield event("error", error="Session file not found")
+        return
+
+    log.info("💾 Streamed products saved to: %s (%d products)", session_id, len(products))
+    yield event(
+        "final", products=products, data=session_data, filename=session_id, transcription=transcript,
+        extractor=extractor, llmPending=pending is not None and PRODUCT_LLM_LATE_UPDATE
+    )
 
 # ================== ROUTES ==================
 @app.route("/")
@@ -782,6 +3982,11 @@ def index():
         "endpoints": [
             "/upload_business_audio (POST)",
             "/upload_product_audio (POST)", 
+            "/jobs/<job_id> (GET)",
+            "/batch/transcribe (POST)",
+            "/stream/products (POST)",
+            "/batch/extract_products (POST)",
+            "/metrics (GET)",
             "/save (POST)",
             "/get_sessions (GET)",
             "/get_session/<filename> (GET)",
@@ -791,13 +3996,29 @@ def index():
 
 @app.route("/api")
 def api_info():
+    # Building the client also kicks off the readiness probe on first call
+    get_groq_client()
     return jsonify({
         "message": "Flask API is running",
         "react_app": "http://localhost:3000",
-        "groq_status": "initialized" if groq_client else "not initialized",
+        "groq_status": groq_status(),
+        "groq_probe": GROQ_PROBE,
+        "transcription_cache": transcription_cache.stats(),
+        "product_cache": product_cache.stats(),
+        "groq_limits": groq_limits(),
+        "groq_transport": groq_transport(),
+        "llm_parse": parse_stats(),
+        "silence_trim": trim_stats(),
+        "transcription_engines": transcription_engines(),
+        "extractors": extractor_stats(),
         "endpoints": [
             "/upload_business_audio",
             "/upload_product_audio", 
+            "/jobs/<job_id>",
+            "/batch/transcribe",
+            "/stream/products",
+            "/batch/extract_products",
+            "/metrics",
             "/save",
             "/get_sessions",
             "/get_session/<filename>",
@@ -805,213 +4026,259 @@ def api_info():
         ]
     })
 
+def cache_metric_lines():
+    """Counters kept by the caches, Groq endpoints, LLM parser and silence trimming, rendered at scrape time"""
+    lines = ["# HELP app_cache_total Cache lookups by cache and result", "# TYPE app_cache_total counter"]
+    product = product_cache.stats()
+    transcription = transcription_cache.stats()
+    for cache, result, value in [
+        ("product", "hit", product["hits"]), ("product", "miss", product["misses"]),
+        ("transcription", "memory_hit", transcription["memoryHits"]),
+        ("transcription", "disk_hit", transcription["diskHits"]),
+        ("transcription", "miss", transcription["misses"])
+    ]:
+        lines.append(f'app_cache_total{{cache="{cache}",result="{result}"}} {value}')
+
+    lines += ["# HELP app_groq_calls_total Groq calls by endpoint and outcome", "# TYPE app_groq_calls_total counter"]
+    for kind, stats in groq_limits().items():
+        for outcome in ("succeeded", "failed", "retries", "rateLimited", "rejected"):
+            lines.append(f'app_groq_calls_total{{endpoint="{kind}",outcome="{outcome}"}} {stats[outcome]}')
+    lines += ["# HELP app_groq_tokens_total Groq tokens used by endpoint and kind", "# TYPE app_groq_tokens_total counter"]
+    for kind, stats in groq_limits().items():
+        lines.append(f'app_groq_tokens_total{{endpoint="{kind}",kind="prompt"}} {stats["promptTokens"]}')
+        lines.append(f'app_groq_tokens_total{{endpoint="{kind}",kind="completion"}} {stats["completionTokens"]}')
+    lines += ["# HELP app_groq_circuit_open Whether the endpoint's circuit breaker is refusing calls", "# TYPE app_groq_circuit_open gauge"]
+    for kind, stats in groq_limits().items():
+        lines.append(f'app_groq_circuit_open{{endpoint="{kind}"}} {int(stats["circuit"] == "open")}')
+    transport = groq_transport()
+    lines += ["# HELP app_groq_transport_total Groq HTTP requests and the handshakes they needed", "# TYPE app_groq_transport_total counter"]
+    for event, key in (("request", "requests"), ("connection", "connections"), ("tls_handshake", "tlsHandshakes")):
+        lines.append(f'app_groq_transport_total{{event="{event}"}} {transport[key]}')
+
+    lines += ["# HELP app_llm_parse_total LLM product answers by parse outcome", "# TYPE app_llm_parse_total counter"]
+    stats = parse_stats()
+    for outcome in ("strict", "salvaged", "failed"):
+        lines.append(f'app_llm_parse_total{{outcome="{outcome}"}} {stats[outcome]}')
+
+    lines += ["# HELP app_audio_seconds_total Seconds of decoded audio received and trimmed as silence", "# TYPE app_audio_seconds_total counter"]
+    with TRIM_STATS_LOCK:
+        lines.append(f'app_audio_seconds_total{{kind="received"}} {TRIM_STATS["secondsIn"]:.3f}')
+        lines.append(f'app_audio_seconds_total{{kind="removed"}} {TRIM_STATS["secondsRemoved"]:.3f}')
+    return lines
+
+@app.route("/metrics")
+def metrics():
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += cache_metric_lines()
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
 @app.route("/upload_business_audio", methods=["POST"])
 def upload_business_audio():
-    global CURRENT_SESSION_FILE, CURRENT_SESSION_FILENAME
     try:
-        print("🎤 Received business audio upload request")
+        log.info("🎤 Received business audio upload request")
         
         if 'audio' not in request.files:
-            print("❌ No audio file in request")
+            log.error("❌ No audio file in request")
             return jsonify({"error": "No audio file provided"}), 400
             
         audio = request.files["audio"]
         if audio.filename == '':
-            print("❌ Empty audio filename")
+            log.error("❌ Empty audio filename")
             return jsonify({"error": "No audio file selected"}), 400
             
-        print(f"📁 Audio file received: {audio.filename}")
-        
-        path = os.path.join(UPLOAD_FOLDER, "business_audio.webm")
-        audio.save(path)
-        print(f"💾 Audio saved to: {path}")
-
-        print("🔍 Starting transcription...")
-        transcript = transcribe_audio(path)
-        
-        # Check if transcription failed
-        if transcript.startswith("Transcription failed") or transcript.startswith("Groq") or transcript.startswith("Audio"):
-            print(f"❌ Transcription error: {transcript}")
-            return jsonify({"error": transcript}), 400
-        
-        print(f"📝 Transcription completed: {transcript[:100]}...")
-        
-        print("🤖 Starting business info extraction...")
-        data = extract_business_info(transcript)
-        print(f"✅ Extraction completed")
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        CURRENT_SESSION_FILENAME = f"session_{timestamp}.json"
-        CURRENT_SESSION_FILE = os.path.join(DATA_FOLDER, CURRENT_SESSION_FILENAME)
-
-        # Format products properly
-        products = data.get("products", [])
-        formatted_products = []
-        for item in products:
-            if isinstance(item, str):
-                formatted_products.append({
-                    "name": item,
-                    "price": 0,
-                    "category": "",
-                    "subcategory": "",
-                    "description": f"Fresh {item}",
-                    "unit": "",
-                    "unitQuantity": 1,
-                    "minimumOrderQuantity": 1,
-                    "quantity": 1
-                })
-            elif isinstance(item, dict):
-                formatted_products.append({
-                    "name": item.get("name", ""),
-                    "price": item.get("price", 0),
-                    "category": item.get("category", ""),
-                    "subcategory": item.get("subcategory", ""),
-                    "description": item.get("description", ""),
-                    "unit": item.get("unit", ""),
-                    "unitQuantity": item.get("unitQuantity", 1),
-                    "minimumOrderQuantity": item.get("minimumOrderQuantity", 1),
-                    "quantity": item.get("quantity", 1)
-                })
-            else:
-                formatted_products.append({
-                    "name": str(item),
-                    "price": 0,
-                    "category": "",
-                    "subcategory": "",
-                    "description": f"Fresh {item}",
-                    "unit": "",
-                    "unitQuantity": 1,
-                    "minimumOrderQuantity": 1,
-                    "quantity": 1
-                })
+        log.info("📁 Audio file received: %s", audio.filename)
 
-        final_json = {
-            "personName": data.get("personName", ""),
-            "name": data.get("name", ""),
-            "address": data.get("address", ""),
-            "city": data.get("city", ""),
-            "state": data.get("state", ""),
-            "pincode": data.get("pincode", ""),
-            "gstNumber": data.get("gstNumber", ""),
-            "category": data.get("category", ""),
-            "subcategory": data.get("subcategory", ""),
-            "businessType": data.get("businessType", ""),
-            "email": data.get("email", ""),
-            "phone": data.get("phone", ""),
-            "website": data.get("website", ""),
-            "establishedYear": data.get("establishedYear", ""),
-            "products": formatted_products,
-            "transcription": transcript
-        }
-
-        with open(CURRENT_SESSION_FILE, "w") as f:
-            json.dump(final_json, f, indent=4)
+        if wants_job():
+            return start_upload_job("business", audio, process_business_audio)
         
-        print(f"💾 Session saved to: {CURRENT_SESSION_FILE}")
-
-        return jsonify({
-            "data": final_json, 
-            "filename": CURRENT_SESSION_FILENAME,
-            "transcription": transcript
-        })
+        upload = receive_upload(audio)
+        try:
+            body, status = process_business_audio(upload)
+        finally:
+            release_upload(upload)
+        return jsonify(body), status
         
+    except (UploadTooLarge, RequestEntityTooLarge):
+        return upload_too_large_response()
     except Exception as e:
-        print(f"❌ Error in upload_business_audio: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error in upload_business_audio: %s", e)
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 @app.route("/upload_product_audio", methods=["POST"])
 def upload_product_audio():
-    global CURRENT_SESSION_FILE, CURRENT_SESSION_FILENAME
     try:
-        print("🛒 Received product audio upload request")
+        log.info("🛒 Received product audio upload request")
         
-        if not CURRENT_SESSION_FILE:
-            print("📝 No business session found, creating new session for products")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            CURRENT_SESSION_FILENAME = f"session_{timestamp}.json"
-            CURRENT_SESSION_FILE = os.path.join(DATA_FOLDER, CURRENT_SESSION_FILENAME)
-            
-            basic_session = {
-                "personName": "",
-                "name": "",
-                "address": "",
-                "city": "",
-                "state": "",
-                "pincode": "",
-                "gstNumber": "",
-                "category": "",
-                "subcategory": "",
-                "businessType": "",
-                "email": "",
-                "phone": "",
-                "website": "",
-                "establishedYear": "",
-                "products": [],
-                "transcription": ""
-            }
-            
-            with open(CURRENT_SESSION_FILE, "w") as f:
-                json.dump(basic_session, f, indent=4)
-            
-            print(f"📁 Created new session: {CURRENT_SESSION_FILE}")
+        session_id = request.values.get("session_id") or request.headers.get("X-Session-Id")
+        if session_id and not valid_session_id(session_id):
+            return jsonify({"error": "Invalid session_id"}), 400
+        if session_id and not os.path.exists(os.path.join(DATA_FOLDER, session_id)):
+            return jsonify({"error": "Session file not found"}), 404
 
         if 'audio' not in request.files:
-            print("❌ No audio file in request")
+            log.error("❌ No audio file in request")
             return jsonify({"error": "No audio file provided"}), 400
             
         audio = request.files["audio"]
         if audio.filename == '':
-            print("❌ Empty audio filename")
+            log.error("❌ Empty audio filename")
             return jsonify({"error": "No audio file selected"}), 400
             
-        print(f"📁 Audio file received: {audio.filename}")
+        log.info("📁 Audio file received: %s", audio.filename)
 
-        path = os.path.join(UPLOAD_FOLDER, "product_audio.webm")
-        audio.save(path)
-        print(f"💾 Audio saved to: {path}")
+        refresh = request.values.get("refresh", "").lower() in ("1", "true", "yes")
 
-        print("🔍 Starting transcription...")
-        transcript = transcribe_audio(path)
-        
-        # Check if transcription failed
-        if transcript.startswith("Transcription failed") or transcript.startswith("Groq") or transcript.startswith("Audio"):
-            print(f"❌ Transcription error: {transcript}")
-            return jsonify({"error": transcript}), 400
-        
-        print(f"📝 Transcription completed: {transcript[:100]}...")
+        if not session_id:
+            log.info("📝 No session_id given, creating new session for products")
+            session_id = create_session(blank_session())
+            log.info("📁 Created new session: %s", session_id)
+
+        if wants_sse():
+            upload = receive_upload(audio)
+            response = Response(stream_product_upload(upload, session_id, refresh), mimetype="text/event-stream")
+            response.headers["Cache-Control"] = "no-cache"
+            response.call_on_close(lambda: release_upload(upload))
+            return response
+
+        if wants_job():
+            return start_upload_job("product", audio, process_product_audio, session_id, refresh)
+
+        upload = receive_upload(audio)
+        try:
+            body, status = process_product_audio(upload, session_id, refresh)
+        finally:
+            release_upload(upload)
+        return jsonify(body), status
         
-        print("🤖 Starting product extraction...")
-        products = extract_products(transcript)
-        print(f"✅ Product extraction completed: {len(products)} products found")
+    except (UploadTooLarge, RequestEntityTooLarge):
+        return upload_too_large_response()
+    except Exception as e:
+        log.exception("❌ Error in upload_product_audio: %s", e)
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
 
-        with open(CURRENT_SESSION_FILE, "r") as f:
-            session_data = json.load(f)
+@app.route("/jobs/<job_id>")
+def get_job(job_id):
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_view(job))
 
-        existing_products = session_data.get("products", [])
-        combined_products = existing_products + products
+@app.route("/batch/transcribe", methods=["POST"])
+def batch_transcribe():
+    """Process many recordings at once, streaming one NDJSON result line per recording.
 
-        session_data["products"] = combined_products
-        session_data["transcription"] = transcript
+    kind=business (default) makes a session per recording; kind=product adds
+    every recording's products to session_id, or to one new session.
+    """
+    request.max_content_length = BATCH_MAX_BYTES
+    items = []
+    try:
+        log.info("📦 Received batch transcription request")
 
-        with open(CURRENT_SESSION_FILE, "w") as f:
-            json.dump(session_data, f, indent=4)
-        
-        print(f"💾 Session updated with products: {CURRENT_SESSION_FILE}")
+        kind = request.values.get("kind", "business")
+        if kind not in ("business", "product"):
+            return jsonify({"error": "kind must be business or product"}), 400
 
-        return jsonify({
-            "data": session_data, 
-            "filename": CURRENT_SESSION_FILENAME,
-            "transcription": transcript
-        })
-        
+        files = [storage for field in request.files for storage in request.files.getlist(field) if storage.filename]
+        if not files:
+            return jsonify({"error": "No audio files provided"}), 400
+
+        if kind == "business":
+            func, args = process_business_audio, ()
+        else:
+            session_id = request.values.get("session_id") or request.headers.get("X-Session-Id")
+            if session_id and not valid_session_id(session_id):
+                return jsonify({"error": "Invalid session_id"}), 400
+            if session_id and not os.path.exists(os.path.join(DATA_FOLDER, session_id)):
+                return jsonify({"error": "Session file not found"}), 404
+            refresh = request.values.get("refresh", "").lower() in ("1", "true", "yes")
+            func, args = process_product_audio, (session_id or create_session(blank_session()), refresh)
+
+        for index, (name, storage) in enumerate(iter_batch_files(files)):
+            try:
+                items.append((index, name, receive_upload(storage), None))
+            except UploadTooLarge:
+                items.append((index, name, None, ({"error": upload_too_large_error()}, 413)))
+
+        log.info("📦 Batch of %d %s recordings queued", len(items), kind)
+        return Response(stream_batch(items, func, args), mimetype="application/x-ndjson")
+
+    except BatchTooLarge:
+        for item in items:
+            release_upload(item[2])
+        return jsonify({"error": f"Too many recordings (max {BATCH_MAX_ITEMS} per batch)"}), 413
+    except RequestEntityTooLarge:
+        limit_mb = BATCH_MAX_BYTES / (1024 * 1024)
+        return jsonify({"error": f"Batch too large (max {limit_mb:g}MB per request)"}), 413
+    except zipfile.BadZipFile:
+        for item in items:
+            release_upload(item[2])
+        return jsonify({"error": "Could not read zip archive"}), 400
     except Exception as e:
-        print(f"❌ Error in upload_product_audio: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        for item in items:
+            release_upload(item[2])
+        log.exception("❌ Error in batch_transcribe: %s", e)
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+@app.route("/stream/products", methods=["POST"])
+def stream_product_audio():
+    """Transcribe and extract products clip by clip while the recording is still being sent"""
+    request.max_content_length = STREAM_MAX_BYTES
+    log.info("🎙️ Product stream opened")
+
+    session_id = request.values.get("session_id") or request.headers.get("X-Session-Id")
+    if session_id and not valid_session_id(session_id):
+        return jsonify({"error": "Invalid session_id"}), 400
+    if session_id and not os.path.exists(os.path.join(DATA_FOLDER, session_id)):
+        return jsonify({"error": "Session file not found"}), 404
+    session_id = session_id or create_session(blank_session())
+    refresh = request.values.get("refresh", "").lower() in ("1", "true", "yes")
+
+    frames = iter_stream_frames(request.stream)
+    return Response(stream_with_context(stream_products(frames, session_id, refresh)), mimetype="application/x-ndjson")
+
+@app.route("/batch/extract_products", methods=["POST"])
+def batch_extract_products():
+    """Extract products from many transcripts at once, for backfills"""
+    data = request.get_json(silent=True) or {}
+    transcripts = data.get("transcripts")
+    if not isinstance(transcripts, list) or not all(isinstance(t, str) for t in transcripts):
+        return jsonify({"error": "transcripts must be a list of strings"}), 400
+    if len(transcripts) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many transcripts (max {BATCH_MAX_ITEMS} per batch)"}), 413
+
+    refresh = str(data.get("refresh", "")).lower() in ("1", "true", "yes")
+    # Packed completions are a Groq feature; without Groq in the chain (or ready)
+    # every transcript goes to the routed extractor on its own
+    groq = EXTRACTORS["groq"]
+    if groq not in extractor_order("products") or not groq.ready():
+        results = []
+        for index, text in enumerate(transcripts):
+            products, extractor = extract_products_routed(text, refresh)
+            results.append({"index": index, "products": products, "extractor": extractor})
+        return jsonify({"results": results})
+
+    results, pending = [None] * len(transcripts), []
+    for index, text in enumerate(transcripts):
+        cached = groq.cached("products", text, refresh)
+        if cached is not None:
+            results[index] = {"index": index, "products": cached, "extractor": "cache"}
+        else:
+            pending.append(index)
+    batch = extract_products_llm_batch([transcripts[index] for index in pending], refresh=True)
+    for index, products in zip(pending, batch):
+        if products:
+            results[index] = {"index": index, "products": products, "extractor": groq.label}
+        else:
+            FALLBACKS.inc("llm_failed")
+            results[index] = {"index": index, "products": extract_products_fallback(transcripts[index]), "extractor": "regex"}
+    return jsonify({"results": results})
+
 @app.route("/save", methods=["POST"])
 def save_edited_data():
     data = request.json
@@ -1021,23 +4288,24 @@ def save_edited_data():
     if not filename or not session_data:
         return jsonify({"error": "Missing filename or data"}), 400
     
-    file_path = os.path.join(DATA_FOLDER, filename)
+    if not valid_session_id(filename):
+        return jsonify({"error": "Invalid filename"}), 400
     
     if "transcription" not in session_data:
         session_data["transcription"] = ""
     
-    with open(file_path, "w") as f:
-        json.dump(session_data, f, indent=4)
+    with session_lock(filename):
+        write_session(filename, session_data)
     
     return jsonify({"success": True, "message": "Data saved successfully"})
 
 @app.route("/editor")
 def editor():
-    files = sorted(os.listdir(DATA_FOLDER))
-    if not files:
+    filename = latest_session_filename()
+    if not filename:
         return "No sessions found"
 
-    with open(os.path.join(DATA_FOLDER, files[-1])) as f:
+    with span("session_read"), open(os.path.join(DATA_FOLDER, filename)) as f:
         data = json.load(f)
     
     if "transcription" not in data:
@@ -1049,7 +4317,7 @@ def editor():
 def get_session(filename):
     file_path = os.path.join(DATA_FOLDER, filename)
     if os.path.exists(file_path):
-        with open(file_path, "r") as f:
+        with span("session_read"), open(file_path, "r") as f:
             data = json.load(f)
         
         if "transcription" not in data:
@@ -1059,31 +4327,107 @@ def get_session(filename):
     else:
         return jsonify({"error": "Session file not found"}), 404
 
+# ================== SESSION LISTING ==================
+# /get_sessions query parameters, all optional:
+#   city, category   exact match, case-insensitive
+#   from, to         creation date range, YYYY-MM-DD, inclusive
+#   fields           comma-separated projection of the session data, with dots
+#                    reaching into nested objects and lists: name,city,products.name
+#   limit, after     cursor pagination; the response becomes
+#                    {"sessions": [...], "nextCursor": <filename or null>} and the
+#                    cursor is passed back as after=
+#   format=ndjson    stream one {"filename", "data"} object per line
+# Without any of them the response is the full list, as before.
+SESSIONS_PAGE_MAX = int(os.getenv("SESSIONS_PAGE_MAX", "500"))
+DATE_PARAM = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# Projections that only touch these fields are answered from the index alone
+INDEXED_SESSION_FIELDS = {"personName": "person_name", "name": "name", "city": "city", "category": "category"}
+
+def parse_fields(fields):
+    """Turn "name,products.name" into a projection tree {"name": {}, "products": {"name": {}}}"""
+    tree = {}
+    for path in fields.split(","):
+        node = tree
+        for part in filter(None, path.strip().split(".")):
+            node = node.setdefault(part, {})
+    return tree
+
+def project(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+def iter_sessions(rows, tree):
+    """Yield {"filename", "data"} per index row, reading one session file at a time"""
+    from_index = bool(tree) and all(not subtree and key in INDEXED_SESSION_FIELDS for key, subtree in tree.items())
+    for row in rows:
+        filename = row["filename"]
+        if from_index:
+            yield {"filename": filename, "data": {key: row[INDEXED_SESSION_FIELDS[key]] for key in tree}}
+            continue
+        try:
+            with open(os.path.join(DATA_FOLDER, filename), "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            log.warning("Session file %s is gone, dropping it from the index", filename)
+            unindex_session(filename)
+            continue
+        except Exception as e:
+            log.error("Error reading file %s: %s", filename, e)
+            continue
+        
+        if "transcription" not in data:
+            data["transcription"] = ""
+        
+        yield {"filename": filename, "data": project(data, tree)}
+
 @app.route("/get_sessions")
 def get_sessions():
     try:
-        files = sorted(os.listdir(DATA_FOLDER))
-        sessions = []
-        
-        for filename in files:
-            if filename.endswith('.json'):
-                file_path = os.path.join(DATA_FOLDER, filename)
-                try:
-                    with open(file_path, "r") as f:
-                        data = json.load(f)
-                    
-                    if "transcription" not in data:
-                        data["transcription"] = ""
-                        
-                    sessions.append({
-                        "filename": filename,
-                        "data": data
-                    })
-                except Exception as e:
-                    print(f"Error reading file {filename}: {e}")
-                    continue
-        
-        return jsonify(sessions)
+        args = request.args
+        for key in ("from", "to"):
+            if args.get(key) and not DATE_PARAM.match(args[key]):
+                return jsonify({"error": f"{key} must be a YYYY-MM-DD date"}), 400
+
+        limit = None
+        if args.get("limit"):
+            try:
+                limit = int(args["limit"])
+            except ValueError:
+                return jsonify({"error": "limit must be a number"}), 400
+            if not 1 <= limit <= SESSIONS_PAGE_MAX:
+                return jsonify({"error": f"limit must be between 1 and {SESSIONS_PAGE_MAX}"}), 400
+
+        rows = query_sessions(
+            city=args.get("city"),
+            category=args.get("category"),
+            date_from=args.get("from"),
+            date_to=args.get("to"),
+            after=args.get("after"),
+            limit=limit
+        )
+        tree = parse_fields(args["fields"]) if args.get("fields") else {}
+
+        if args.get("format") == "ndjson":
+            def generate():
+                for session in iter_sessions(rows, tree):
+                    yield json.dumps(session) + "\n"
+            return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+        if limit is None:
+            return jsonify(list(iter_sessions(rows, tree)))
+
+        # A full page of index rows may have more behind it, even when some of
+        # their files could not be read; the last row's filename is the cursor
+        rows = rows.fetchall()
+        sessions = list(iter_sessions(rows, tree))
+        next_cursor = rows[-1]["filename"] if len(rows) == limit else None
+        return jsonify({"sessions": sessions, "nextCursor": next_cursor})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1091,20 +4435,21 @@ def get_sessions():
 def delete_session(filename):
     try:
         file_path = os.path.join(DATA_FOLDER, filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            return jsonify({"success": True, "message": "Session deleted successfully"})
-        else:
-            return jsonify({"error": "Session file not found"}), 404
+        with session_lock(filename):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                unindex_session(filename)
+                return jsonify({"success": True, "message": "Session deleted successfully"})
+        return jsonify({"error": "Session file not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
-    print("\n" + "="*50)
-    print("🚀 Starting Flask Backend Server")
-    print("="*50)
-    print(f"✅ Groq API Status: {'Connected' if groq_client else 'Not Connected'}")
-    print(f"📂 Upload Folder: {UPLOAD_FOLDER}")
-    print(f"📂 Data Folder: {DATA_FOLDER}")
-    print("="*50 + "\n")
+    log.info("\n" + "="*50)
+    log.info("🚀 Starting Flask Backend Server")
+    log.info("="*50)
+    log.info("✅ Groq API Status: %s", 'Connected' if get_groq_client() else 'Not Connected')
+    log.info("📂 Upload Folder: %s", UPLOAD_FOLDER)
+    log.info("📂 Data Folder: %s", DATA_FOLDER)
+    log.info("="*50 + "\n")
     app.run(debug=True, port=5001)
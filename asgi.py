@@ -0,0 +1,477 @@
+"""Async (ASGI) serving mode for app.py.
+
+    gunicorn -k asgi asgi:app
+
+The sync app holds a worker thread for the whole of every upload, and most of
+that time is spent waiting on Whisper and the LLM. Here the two upload routes
+run on the event loop instead: Groq is called through AsyncGroq, so a request
+waiting on the network is a suspended coroutine rather than a blocked thread,
+and thousands of them fit in one process. The short blocking steps (pydub
+conversion, session file reads and writes under their locks) run on a small
+thread pool so they never stall the loop.
+
+Every other route, and the job and SSE variants of the uploads, are handed to
+the unchanged Flask app through a WSGI bridge, so routes and JSON contracts
+are identical in both modes.
+"""
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
+from werkzeug.wrappers import Request
+
+import app as backend
+from app import FALLBACKS, HTTP_REQUEST_SECONDS, log
+
+flask_app = backend.app
+
+# ================== CONFIGURATION ==================
+# Blocking steps of the native routes (conversion, session I/O) share
+# ASGI_IO_WORKERS threads; bridged Flask requests get their own pool, since a
+# streamed batch response can hold its thread for minutes.
+ASGI_IO_WORKERS = int(os.getenv("ASGI_IO_WORKERS", "16"))
+ASGI_BRIDGE_WORKERS = int(os.getenv("ASGI_BRIDGE_WORKERS", "32"))
+# Native upload bodies are spooled: kept in memory up to ASGI_BODY_SPOOL_BYTES,
+# then moved to a temp file, so a large upload in flight costs disk, not memory
+ASGI_BODY_SPOOL_BYTES = int(os.getenv("ASGI_BODY_SPOOL_BYTES", str(256 * 1024)))
+
+io_executor = ThreadPoolExecutor(max_workers=ASGI_IO_WORKERS, thread_name_prefix="asgi-io")
+bridge_executor = ThreadPoolExecutor(max_workers=ASGI_BRIDGE_WORKERS, thread_name_prefix="asgi-bridge")
+# Local Whisper holds its thread for the whole decode, so it gets a pool of
+# its own sized to the model's workers
+local_whisper_executor = ThreadPoolExecutor(max_workers=backend.LOCAL_WHISPER_WORKERS, thread_name_prefix="asgi-whisper")
+
+# Late LLM results keep running after their request returned; holding the
+# tasks here stops them from being garbage collected mid-flight
+background_tasks = set()
+
+async def run_blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(io_executor, partial(func, *args))
+
+# ================== WSGI BRIDGE ==================
+def wsgi_environ(scope, body):
+    """WSGI environ for an ASGI http scope, reading the request body from the file-like body"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    if "CONTENT_LENGTH" not in environ:
+        # Chunked request bodies end when the client says so
+        environ["wsgi.input_terminated"] = True
+    return environ
+
+class ReceiveStream(io.RawIOBase):
+    """Blocking file view of an ASGI request body, read from a bridge thread"""
+
+    def __init__(self, receive, loop):
+        self.receive = receive
+        self.loop = loop
+        self.buffer = b""
+        self.more_body = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self.buffer and self.more_body:
+            message = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+            if message["type"] == "http.disconnect":
+                self.more_body = False
+                break
+            self.buffer = message.get("body", b"")
+            self.more_body = message.get("more_body", False)
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+def run_wsgi(environ, send, loop):
+    """Call the Flask app on a bridge thread, forwarding its response as it is produced"""
+    def send_sync(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+    def send_start():
+        send_sync({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+
+    result = flask_app(environ, start_response)
+    try:
+        sent_start = False
+        for chunk in result:
+            if not sent_start:
+                send_start()
+                sent_start = True
+            if chunk:
+                send_sync({"type": "http.response.body", "body": chunk, "more_body": True})
+        if not sent_start:
+            send_start()
+        send_sync({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+
+async def bridge(scope, receive, send, body=None):
+    """Serve a request with the Flask app; body is the already-read (spooled) request body, if any"""
+    loop = asyncio.get_running_loop()
+    if body is not None:
+        body.seek(0)
+    stream = body if body is not None else io.BufferedReader(ReceiveStream(receive, loop))
+    await loop.run_in_executor(bridge_executor, run_wsgi, wsgi_environ(scope, stream), send, loop)
+
+# ================== RESPONSES ==================
+async def send_json(send, body, status=200):
+    # Serialized exactly as jsonify() does in the Flask routes
+    payload = flask_app.json.response(body).get_data()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            (b"access-control-allow-origin", b"*")
+        ]
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+# What read_body returns instead of a body
+BODY_TOO_LARGE = object()
+CLIENT_GONE = object()
+
+def content_length(scope):
+    for name, value in scope.get("headers", []):
+        if name.lower() == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+async def read_body(scope, receive, limit):
+    """The request body in a spooled temp file, or BODY_TOO_LARGE / CLIENT_GONE.
+
+    A declared Content-Length over limit is refused before anything is read.
+    """
+    declared = content_length(scope)
+    if declared is not None and declared > limit:
+        return BODY_TOO_LARGE
+    body = tempfile.SpooledTemporaryFile(max_size=ASGI_BODY_SPOOL_BYTES)
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            body.close()
+            return CLIENT_GONE
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            body.close()
+            return BODY_TOO_LARGE
+        body.write(chunk)
+        if not message.get("more_body", False):
+            body.seek(0)
+            return body
+
+# ================== ASYNC GROQ CALLS ==================
+async def request_transcription_async(upload):
+    """request_groq_transcription() on AsyncGroq; upload is a (filename, bytes or file) tuple"""
+    def create(client):
+        backend.rewind(upload)  # a retry must resend the whole file
+        return client.audio.transcriptions.create(
+            file=upload,
+            model=backend.WHISPER_MODEL,
+            response_format="text",
+            temperature=backend.WHISPER_TEMPERATURE,
+            language=backend.WHISPER_LANGUAGE,
+            timeout=backend.groq_timeout("audio")
+        )
+    with backend.span("whisper"):
+        return await backend.groq_call_async("audio", create)
+
+async def transcribe_with_engine_async(upload):
+    """transcribe_with_engine() with Groq awaited; local Whisper runs on its own thread pool"""
+    engine = backend.transcription_engine() or backend.groq_whisper
+    if engine is backend.replay_whisper:
+        return await run_blocking(backend.replay_whisper.transcribe, upload), engine
+    if engine is backend.local_whisper:
+        if backend.TRANSCRIPTION_ENGINE == "auto":
+            FALLBACKS.inc("local_whisper")
+        return await transcribe_locally_async(upload), backend.local_whisper
+    try:
+        return await request_transcription_async(upload), backend.groq_whisper
+    except Exception as e:
+        if not backend.local_fallback(e):
+            raise
+        FALLBACKS.inc("local_whisper")
+        log.warning("⚠️ Groq Whisper failed (%s), transcribing locally", type(e).__name__)
+        return await transcribe_locally_async(upload), backend.local_whisper
+
+async def transcribe_locally_async(upload):
+    return await asyncio.get_running_loop().run_in_executor(local_whisper_executor, backend.local_whisper.transcribe, upload)
+
+async def transcribe_audio_async(audio):
+    """transcribe_audio() for in-memory uploads, awaiting Whisper instead of blocking on it"""
+    try:
+        prepared = await run_blocking(backend.prepare_transcription, audio)
+        if isinstance(prepared, str):
+            return prepared
+        upload, cache_key = prepared  # in-memory audio always comes back as a (filename, bytes or file) tuple
+
+        log.info("📤 Sending audio to Whisper...")
+        transcription, engine = await transcribe_with_engine_async(upload)
+        return backend.finish_transcription(transcription, cache_key if backend.cacheable(engine) else None)
+
+    except Exception as e:
+        return backend.transcription_error_message(e)
+
+async def request_product_completion_async(prompt, max_tokens, json_mode=None):
+    kwargs = backend.product_completion_kwargs(prompt, max_tokens, json_mode)
+    with backend.span("llm"):
+        try:
+            return await backend.groq_call_async("chat", lambda client: client.chat.completions.create(**kwargs))
+        except Exception as e:
+            if not backend.drop_refused_json_mode(e, kwargs):
+                raise
+            return await backend.groq_call_async("chat", lambda client: client.chat.completions.create(**kwargs))
+
+async def extract_products_llm_async(text, refresh=False):
+    """extract_products_llm() on AsyncGroq; None when the LLM gave nothing usable"""
+    try:
+        cached = backend.cached_products(text, refresh)
+        if cached is not None:
+            return cached
+        if backend.get_async_groq_client() is None:
+            log.error("❌ Groq client not available for LLM extraction")
+            return None
+
+        prompt, json_mode = backend.product_prompt(text)
+        log.info("🤖 Calling Groq LLM for product extraction...")
+        response = await request_product_completion_async(prompt, 1500, json_mode)
+        return backend.read_products_answer(text, response)
+
+    except backend.GroqUnavailable as e:
+        log.warning("⚠️ Skipping LLM extraction: %s", e)
+        return None
+    except Exception as e:
+        log.error("❌ LLM extraction failed: %s", e)
+        return None
+
+async def run_extractor_async(extractor, text, refresh=False):
+    """extractor.run() for products: Groq is awaited on AsyncGroq, a local model runs on the LLM pool"""
+    if extractor.name != "groq":
+        return await asyncio.wrap_future(backend.llm_executor.submit(extractor.run, "products", text, refresh))
+    cached = extractor.cached("products", text, refresh)
+    if cached is not None:
+        return cached
+    start = time.perf_counter()
+    products = await extract_products_llm_async(text, refresh=True)
+    extractor.record(text, time.perf_counter() - start, products is not None)
+    return products
+
+def thread_future(task, loop):
+    """A concurrent Future that takes a task's result, with its callbacks run off the event loop"""
+    future = Future()
+
+    def done(task):
+        result = None if task.cancelled() or task.exception() else task.result()
+        loop.run_in_executor(io_executor, future.set_result, result)
+
+    task.add_done_callback(done)
+    return future
+
+async def extract_products_hedged_async(text, refresh=False, deadline=None):
+    """extract_products_hedged() on the event loop; pending is a Future save_products can wait on"""
+    deadline = backend.PRODUCT_LLM_DEADLINE_SECONDS if deadline is None else deadline
+    extractor = backend.route_extractor("products", text, deadline)
+    if extractor.name == "regex":
+        log.info("🔄 No LLM extractor available within budget, using regex extraction")
+        FALLBACKS.inc("llm_routed_away")
+        return backend.extract_products_fallback(text), "regex", None
+    cached = extractor.cached("products", text, refresh)
+    if cached is not None:
+        return cached, "cache", None
+    log.info("🤖 Attempting %s LLM product extraction...", extractor.name)
+    llm_task = asyncio.ensure_future(run_extractor_async(extractor, text, refresh))
+    background_tasks.add(llm_task)
+    llm_task.add_done_callback(background_tasks.discard)
+    fallback_products = backend.extract_products_fallback(text)
+
+    try:
+        llm_products = await asyncio.wait_for(asyncio.shield(llm_task), deadline if deadline > 0 else None)
+    except asyncio.TimeoutError:
+        log.info("⏱️ LLM missed the %gs deadline, using regex fallback: %d products", deadline, len(fallback_products))
+        FALLBACKS.inc("llm_deadline")
+        return fallback_products, "regex", thread_future(llm_task, asyncio.get_running_loop())
+
+    if llm_products:
+        log.info("✅ Using LLM-extracted products: %d products", len(llm_products))
+        return llm_products, extractor.label, None
+
+    log.info("🔄 LLM extraction failed or returned no products, using regex fallback")
+    FALLBACKS.inc("llm_failed")
+    return fallback_products, "regex", None
+
+# ================== AUDIO PIPELINES ==================
+async def process_business_audio_async(audio):
+    log.info("🔍 Starting transcription...")
+    transcript = await transcribe_audio_async(audio)
+    if backend.is_transcription_error(transcript):
+        log.error("❌ Transcription error: %s", transcript)
+        return {"error": transcript}, 400
+    log.debug("📝 Transcription completed: %.100s...", transcript)
+    return await run_blocking(backend.business_upload_result, transcript)
+
+async def process_product_audio_async(audio, session_id, refresh=False):
+    log.info("🔍 Starting transcription...")
+    transcript = await transcribe_audio_async(audio)
+    if backend.is_transcription_error(transcript):
+        log.error("❌ Transcription error: %s", transcript)
+        return {"error": transcript}, 400
+    log.debug("📝 Transcription completed: %.100s...", transcript)
+
+    log.info("🤖 Starting product extraction...")
+    products, extractor, pending = await extract_products_hedged_async(transcript, refresh=refresh)
+    log.info("✅ Product extraction completed: %d products found", len(products))
+    return await run_blocking(backend.product_upload_result, session_id, transcript, products, extractor, pending)
+
+# ================== ROUTES ==================
+def audio_from(request):
+    """(audio file, error body) for the "audio" file of an upload request.
+
+    The file is the parser's own spooled temp file, handed on without copying;
+    call with the form already parsed (see parse_form).
+    """
+    if "audio" not in request.files:
+        log.error("❌ No audio file in request")
+        return None, {"error": "No audio file provided"}
+    audio = request.files["audio"]
+    if audio.filename == "":
+        log.error("❌ Empty audio filename")
+        return None, {"error": "No audio file selected"}
+    size = audio.stream.seek(0, os.SEEK_END)
+    if size > backend.UPLOAD_LIMIT_BYTES:
+        raise backend.UploadTooLarge(f"upload exceeds {backend.UPLOAD_LIMIT_BYTES} bytes")
+    log.info("📁 Audio file received: %s (%.2f KB)", audio.filename, size / 1024)
+    return audio.stream, None
+
+async def upload_business_audio(request):
+    log.info("🎤 Received business audio upload request")
+    audio, error = audio_from(request)
+    if error:
+        return error, 400
+    return await process_business_audio_async(audio)
+
+async def upload_product_audio(request):
+    log.info("🛒 Received product audio upload request")
+
+    session_id = request.values.get("session_id") or request.headers.get("X-Session-Id")
+    if session_id and not backend.valid_session_id(session_id):
+        return {"error": "Invalid session_id"}, 400
+    if session_id and not await run_blocking(os.path.exists, os.path.join(backend.DATA_FOLDER, session_id)):
+        return {"error": "Session file not found"}, 404
+
+    audio, error = audio_from(request)
+    if error:
+        return error, 400
+
+    refresh = request.values.get("refresh", "").lower() in ("1", "true", "yes")
+
+    if not session_id:
+        log.info("📝 No session_id given, creating new session for products")
+        session_id = await run_blocking(backend.create_session, backend.blank_session())
+        log.info("📁 Created new session: %s", session_id)
+
+    return await process_product_audio_async(audio, session_id, refresh)
+
+NATIVE_ROUTES = {
+    ("POST", "/upload_business_audio"): ("upload_business_audio", upload_business_audio),
+    ("POST", "/upload_product_audio"): ("upload_product_audio", upload_product_audio)
+}
+
+def parse_form(request):
+    """Parse the request body so request.form, .files and .values are ready to read"""
+    request.files
+
+async def serve_native(scope, receive, send, endpoint, handler):
+    started = time.perf_counter()
+    body = await read_body(scope, receive, flask_app.config["MAX_CONTENT_LENGTH"])
+    if body is CLIENT_GONE:
+        log.info("👋 Client disconnected before the upload finished")
+        return
+    if body is BODY_TOO_LARGE:
+        log.error("❌ Audio file too large")
+        result = {"error": backend.upload_too_large_error()}, 413
+    else:
+        request = Request(wsgi_environ(scope, body))
+        try:
+            # Multipart parsing copies the upload into a spooled temp file; keep it off the loop
+            await run_blocking(parse_form, request)
+            if backend.wants_sse(request) or backend.wants_job(request):
+                # Jobs and event streams keep their thread-based implementation
+                return await bridge(scope, receive, send, body)
+            result = await handler(request)
+        except backend.UploadTooLarge:
+            log.error("❌ Audio file too large")
+            result = {"error": backend.upload_too_large_error()}, 413
+        except Exception as e:
+            log.exception("❌ Error in %s: %s", endpoint, e)
+            result = {"error": f"Server error: {str(e)}"}, 500
+        finally:
+            request.close()
+            body.close()
+
+    await send_json(send, *result)
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, result[1])
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if backend.async_groq_client is not None:
+                await backend.async_groq_client.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    route = NATIVE_ROUTES.get((scope["method"], scope["path"]))
+    if route:
+        return await serve_native(scope, receive, send, *route)
+    return await bridge(scope, receive, send)
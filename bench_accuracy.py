@@ -0,0 +1,393 @@
+"""Accuracy and speed harness for the extractors, built from test_cases.md.
+
+Parses the BP-xx (business) and PE-xx (product) cases in test_cases.md into
+a corpus and runs it through extract_business_info_fallback,
+extract_products_fallback and, against a stubbed or recorded Groq client,
+extract_products_llm. For each extractor it reports per-field accuracy,
+throughput, latency percentiles and peak memory allocated per transcript.
+
+--scale N adds N synthetic transcripts generated from templates with known
+answers, so 100k-transcript runs show speed regressions and quality drift.
+--save-baseline writes the results to a JSON file and --baseline compares a
+run against it, exiting 1 when accuracy or p95 latency regresses.
+
+The LLM extractor never calls Groq unless --record is given:
+    --llm oracle          a stub that answers with each case's expected JSON
+                          (measures the request/parse path, accuracy is the ceiling)
+    --llm replay:FILE     answers recorded earlier with --record
+    --record FILE         call the real API (needs GROQ_API_KEY) and save the answers
+    --llm off             skip the LLM extractor
+
+--local also scores the local CPU model (LOCAL_LLM_MODEL_PATH, needs
+llama-cpp-python) on the product and business cases, fully offline. Without
+the model it scores the replay extractor instead, answering from REPLAY_PATH
+or, when that is unset, with each case's expected JSON, so the routed local
+path (run, parse, merge with the regex details) is still exercised.
+
+Usage:
+    python bench_accuracy.py [--scale 100000] [--llm oracle|replay:FILE|off] [--record FILE] [--local]
+                             [--baseline FILE] [--save-baseline FILE] [--latency-tolerance 1.25]
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+import app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUSINESS_FIELDS = ["name", "address", "city", "category", "subcategory", "phone", "products"]
+ALLOCATION_SAMPLE = 2000
+
+
+# ---- corpus ----
+
+def load_cases(path=os.path.join(HERE, "test_cases.md")):
+    """[{"id", "kind", "input", "expected"}] for every BP/PE case with an input and expected JSON"""
+    with open(path) as f:
+        text = f.read()
+    cases = []
+    pattern = re.compile(
+        r'### ((BP|PE)-\d+):.*?\n\*\*Input\*?\*?"?:\s*"(.+?)"\s*\n\*\*Expected Output\*\*:\s*\n```json\n(.*?)\n```',
+        re.S
+    )
+    for case_id, prefix, transcript, expected in pattern.findall(text):
+        cases.append({
+            "id": case_id,
+            "kind": "business" if prefix == "BP" else "product",
+            "input": transcript,
+            "expected": json.loads(expected)
+        })
+    return cases
+
+
+SYNTHETIC_PEOPLE = ["Raj", "Priya", "Amit", "Sunita", "Vikram", "Meena", "Arjun", "Kavya"]
+SYNTHETIC_SHOPS = ["Sharma General Store", "Lakshmi Traders", "Green Valley Mart", "Sai Provisions", "Royal Sweets"]
+SYNTHETIC_PRODUCTS = ["rice", "sugar", "tea", "milk", "onion", "potato", "tomato", "oil", "flour", "salt"]
+SYNTHETIC_UNITS = ["kg", "packet", "bottle", "dozen", "liter"]
+
+
+def synthetic_cases(count, seed=42):
+    """Yield count template-generated cases whose expected answers are known by construction"""
+    rng = random.Random(seed)
+    cities = [city.title() for city in app.BUSINESS_CITIES if " " not in city]
+    for i in range(count):
+        if i % 2 == 0:
+            city = rng.choice(cities)
+            phone = "9" + "".join(rng.choice("0123456789") for _ in range(9))
+            shop = rng.choice(SYNTHETIC_SHOPS)
+            template = rng.randrange(3)
+            if template == 0:
+                transcript = f"I run {shop} in {city}"
+                expected = {"city": city}
+            elif template == 1:
+                transcript = f"I'm {rng.choice(SYNTHETIC_PEOPLE)}, my shop is in {city}. Phone is {phone}"
+                expected = {"city": city, "phone": phone}
+            else:
+                transcript = f"We are located in {city}, call us at {phone}"
+                expected = {"city": city, "phone": phone}
+            yield {"id": f"SYN-{i}", "kind": "business", "input": transcript, "expected": expected}
+        else:
+            items = rng.sample(SYNTHETIC_PRODUCTS, rng.randint(1, 3))
+            parts, expected = [], []
+            for name in items:
+                unit, price = rng.choice(SYNTHETIC_UNITS), rng.randint(10, 500)
+                if rng.random() < 0.5:
+                    parts.append(f"{name} {price} rupees per {unit}")
+                else:
+                    parts.append(f"1 {unit} {name} for {price} rupees")
+                expected.append({"name": name, "unit": unit, "price": price})
+            yield {"id": f"SYN-{i}", "kind": "product", "input": ", ".join(parts), "expected": expected}
+
+
+# ---- scoring ----
+
+def norm(value):
+    return re.sub(r'[^\w]+', ' ', str(value or "").casefold()).strip()
+
+
+def singular(name):
+    name = norm(name)
+    for suffix in ("es", "s"):
+        if name.endswith(suffix) and len(name) > len(suffix) + 2:
+            return name[:-len(suffix)]
+    return name
+
+
+def names_match(expected, predicted):
+    a, b = singular(expected), singular(predicted)
+    return bool(a and b) and (a == b or a in b or b in a)
+
+
+def product_names(products):
+    return [p.get("name", "") if isinstance(p, dict) else p for p in products or []]
+
+
+def score_business(expected, predicted, totals):
+    for field in BUSINESS_FIELDS:
+        if field not in expected:
+            continue
+        if field == "products":
+            want, got = product_names(expected[field]), product_names(predicted.get(field))
+            correct = len(want) == len(got) and all(any(names_match(w, g) for g in got) for w in want)
+        else:
+            correct = norm(expected[field]) == norm(predicted.get(field))
+        totals.setdefault(field, [0, 0])
+        totals[field][0] += correct
+        totals[field][1] += 1
+
+
+def score_products(expected, predicted, totals):
+    predicted = [p for p in predicted or [] if isinstance(p, dict)]
+    unmatched = list(predicted)
+    for field in ("productRecall", "unit", "price"):
+        totals.setdefault(field, [0, 0])
+    totals.setdefault("productPrecision", [0, 0])
+    totals.setdefault("productCount", [0, 0])
+
+    matched = 0
+    for want in expected:
+        hit = next((p for p in unmatched if names_match(want["name"], p.get("name"))), None)
+        totals["productRecall"][1] += 1
+        if hit is None:
+            continue
+        unmatched.remove(hit)
+        matched += 1
+        totals["productRecall"][0] += 1
+        totals["unit"][0] += app.normalize_unit(want.get("unit")) == app.normalize_unit(hit.get("unit"))
+        totals["unit"][1] += 1
+        totals["price"][0] += app.coerce_number(want.get("price"), 0) == app.coerce_number(hit.get("price"), 0)
+        totals["price"][1] += 1
+    totals["productPrecision"][0] += matched
+    totals["productPrecision"][1] += len(predicted)
+    totals["productCount"][0] += len(predicted) == len(expected)
+    totals["productCount"][1] += 1
+
+
+# ---- stubbed and recorded Groq ----
+
+class _Obj:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+def prompt_transcript(prompt):
+    match = re.search(r'\nText: (.*?)\n\nReturn ONLY', prompt, re.S)
+    return match.group(1) if match else ""
+
+
+class StubGroq:
+    """Answers chat completions from a {normalized transcript: response text} table"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        stub = self
+
+        class Completions:
+            def create(self, **kwargs):
+                transcript = prompt_transcript(kwargs["messages"][0]["content"])
+                content = stub.answers.get(app.normalize_transcript(transcript))
+                if content is None:
+                    raise RuntimeError(f"no recorded answer for: {transcript[:60]}")
+                return _Obj(choices=[_Obj(message=_Obj(content=content))], usage=None)
+
+        self.chat = _Obj(completions=Completions())
+
+
+class RecordingGroq:
+    """Wraps the real client and keeps every (transcript, response) pair it sees"""
+
+    def __init__(self, client):
+        self.records = []
+        real, recorder = client, self
+
+        class Completions:
+            def create(self, **kwargs):
+                response = real.chat.completions.create(**kwargs)
+                recorder.records.append({
+                    "transcript": prompt_transcript(kwargs["messages"][0]["content"]),
+                    "response": response.choices[0].message.content
+                })
+                return response
+
+        self.chat = _Obj(completions=Completions())
+
+
+def install_groq(mode, record_path, cases):
+    """Point the app at the chosen client; returns the recorder when recording"""
+    # Stubbed answers are instant: lift the quota so the token bucket does not pace the run
+    app.GROQ_ENDPOINTS["chat"] = app.GroqEndpoint("chat", 10 ** 9)
+    app.product_cache.max_entries = 0
+
+    if record_path:
+        client = app.get_groq_client()
+        if client is None:
+            raise SystemExit("❌ --record needs GROQ_API_KEY")
+        app.GROQ_ENDPOINTS["chat"] = app.GroqEndpoint("chat", app.GROQ_CHAT_RPM)
+        app.groq_client = RecordingGroq(client)
+        return app.groq_client
+    if mode == "oracle":
+        app.groq_client = StubGroq({
+            app.normalize_transcript(case["input"]): json.dumps({"products": case["expected"]})
+            for case in cases if case["kind"] == "product"
+        })
+    elif mode.startswith("replay:"):
+        with open(mode.split(":", 1)[1]) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        app.groq_client = StubGroq({app.normalize_transcript(r["transcript"]): r["response"] for r in records})
+    return None
+
+
+# ---- running ----
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_extractor(name, func, cases, score):
+    totals, latencies = {}, []
+    for case in cases:
+        start = time.perf_counter()
+        predicted = func(case["input"])
+        latencies.append(time.perf_counter() - start)
+        score(case["expected"], predicted, totals)
+
+    # Allocations are measured in a second pass so tracing does not skew the timings
+    sample = cases[:ALLOCATION_SAMPLE]
+    peaks = []
+    tracemalloc.start()
+    for case in sample:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func(case["input"])
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    latencies.sort()
+    elapsed = sum(latencies)
+    return {
+        "extractor": name,
+        "transcripts": len(cases),
+        "throughputPerSecond": round(len(cases) / elapsed, 1) if elapsed else 0.0,
+        "p50Ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95Ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99Ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "peakKbPerTranscript": round(sum(peaks) / len(peaks) / 1024, 1) if peaks else 0.0,
+        "accuracy": {field: round(c / n, 4) for field, (c, n) in totals.items() if n},
+        "samples": {field: n for field, (c, n) in totals.items()}
+    }
+
+
+def print_result(result):
+    print(f"\n🔬 {result['extractor']} — {result['transcripts']} transcripts")
+    print(f"   {result['throughputPerSecond']:,.1f}/s   p50 {result['p50Ms']:.3f}ms   p95 {result['p95Ms']:.3f}ms   "
+          f"p99 {result['p99Ms']:.3f}ms   peak {result['peakKbPerTranscript']:.1f} KB/transcript")
+    for field, accuracy in result["accuracy"].items():
+        print(f"   {field:<18}{accuracy:>8.1%}  (n={result['samples'][field]})")
+
+
+def compare(results, baseline, latency_tolerance):
+    """Regressions against a saved baseline: accuracy drops over a point, p95 over tolerance"""
+    problems = []
+    previous = {r["extractor"]: r for r in baseline}
+    for result in results:
+        old = previous.get(result["extractor"])
+        if not old or old["transcripts"] != result["transcripts"]:
+            continue
+        for field, accuracy in result["accuracy"].items():
+            if field in old["accuracy"] and accuracy < old["accuracy"][field] - 0.01:
+                problems.append(f"{result['extractor']} {field}: {old['accuracy'][field]:.1%} -> {accuracy:.1%}")
+        if old["p95Ms"] and result["p95Ms"] > old["p95Ms"] * latency_tolerance:
+            problems.append(f"{result['extractor']} p95: {old['p95Ms']:.3f}ms -> {result['p95Ms']:.3f}ms")
+    return problems
+
+
+def main(argv):
+    def option(name, default=None):
+        return argv[argv.index(name) + 1] if name in argv else default
+
+    scale = int(option("--scale", "0"))
+    llm_mode = option("--llm", "oracle")
+    record_path = option("--record")
+    tolerance = float(option("--latency-tolerance", "1.25"))
+
+    cases = load_cases()
+    print(f"📚 {len(cases)} cases from test_cases.md"
+          f" ({sum(c['kind'] == 'business' for c in cases)} business, {sum(c['kind'] == 'product' for c in cases)} product)")
+    if scale:
+        start = time.perf_counter()
+        cases += list(synthetic_cases(scale))
+        print(f"🧪 +{scale:,} synthetic transcripts generated in {time.perf_counter() - start:.2f}s")
+
+    business = [c for c in cases if c["kind"] == "business"]
+    products = [c for c in cases if c["kind"] == "product"]
+
+    results = [
+        run_extractor("extract_business_info_fallback", app.extract_business_info_fallback, business, score_business),
+        run_extractor("extract_products_fallback", app.extract_products_fallback, products, score_products)
+    ]
+
+    if record_path or llm_mode != "off":
+        recorder = install_groq(llm_mode, record_path, products)
+        label = "live" if record_path else llm_mode.split(":")[0]
+        results.append(run_extractor(
+            f"extract_products_llm ({label})",
+            lambda text: app.extract_products_llm(text, refresh=True) or [],
+            products, score_products
+        ))
+        if recorder:
+            with open(record_path, "w") as f:
+                for record in recorder.records:
+                    f.write(json.dumps(record) + "\n")
+            print(f"📼 Recorded {len(recorder.records)} answers to {record_path}")
+
+    if "--local" in argv:
+        local = app.EXTRACTORS["local"]
+        label = "local llm"
+        if not local.ready():
+            print(f"⚠️ Local LLM unavailable ({local.error}), scoring the replay stand-in")
+            local, label = app.EXTRACTORS["replay"], "replay"
+            if not app.REPLAY_PATH:
+                for case in cases:
+                    kind = "business" if case["kind"] == "business" else "products"
+                    answer = case["expected"] if kind == "business" else {"products": case["expected"]}
+                    app.replay_log.add(case["input"], json.dumps(answer), kind)
+            if not local.ready():
+                print(f"❌ Replay answers unavailable: {app.replay_log.error}")
+                return 1
+        results.append(run_extractor(
+            f"{label} business",
+            lambda text: local.run("business", text) or app.extract_business_info_fallback(text),
+            business, score_business
+        ))
+        results.append(run_extractor(
+            f"{label} products", lambda text: local.run("products", text) or [], products, score_products
+        ))
+
+    for result in results:
+        print_result(result)
+
+    if option("--save-baseline"):
+        with open(option("--save-baseline"), "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to {option('--save-baseline')}")
+
+    if option("--baseline"):
+        with open(option("--baseline")) as f:
+            problems = compare(results, json.load(f), tolerance)
+        if problems:
+            print("\n❌ Regressions against the baseline:")
+            for problem in problems:
+                print(f"   {problem}")
+            return 1
+        print("\n✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,277 @@
+"""Load test the sync (gunicorn app:app) and async (gunicorn -k asgi asgi:app) serving modes.
+
+Starts a local fake Groq server that answers Whisper and chat completions
+after a fixed delay, then runs each serving mode against it in a single
+gunicorn worker and fires product uploads at it with many in flight. For
+each mode it reports throughput, latency percentiles, errors, and the peak
+memory and thread count of the server process.
+
+Every upload carries different audio and gets a different transcript back,
+so neither the transcription cache nor the product cache hides a Groq call.
+
+Usage:
+    python bench_async_serving.py [--requests 1000] [--concurrency 500] [--groq-delay 1.0]
+                                  [--sync-threads 64] [--modes sync,async]
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# ---- fake Groq ----
+
+async def fake_groq_connection(reader, writer, delay, counter):
+    """Answer keep-alive requests on one connection like the Groq API would"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            path = request_line.split(" ")[1]
+            headers = dict(line.split(": ", 1) for line in header_lines if ": " in line)
+            length = int(headers.get("Content-Length") or headers.get("content-length") or 0)
+            if length:
+                await reader.readexactly(length)
+
+            await asyncio.sleep(delay)
+            counter[0] += 1
+            n = counter[0]
+            if path.endswith("/audio/transcriptions"):
+                body, content_type = f"we sell rice at {n} rupees per kg and sugar at 50 rupees per kg", "text/plain"
+            elif path.endswith("/chat/completions"):
+                products = [{"name": "Rice", "price": n, "unit": "kg"}, {"name": "Sugar", "price": 50, "unit": "kg"}]
+                body = json.dumps({
+                    "id": f"chatcmpl-{n}", "object": "chat.completion", "created": int(time.time()), "model": "fake",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": json.dumps({"products": products})}}],
+                    "usage": {"prompt_tokens": 400, "completion_tokens": 60, "total_tokens": 460}
+                })
+                content_type = "application/json"
+            else:
+                body, content_type = json.dumps({"object": "list", "data": []}), "application/json"
+            payload = body.encode()
+            writer.write(
+                f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def run_fake_groq(port, delay):
+    async def serve():
+        counter = [0]
+        server = await asyncio.start_server(
+            lambda r, w: fake_groq_connection(r, w, delay, counter), "127.0.0.1", port, backlog=4096
+        )
+        async with server:
+            await server.serve_forever()
+    asyncio.run(serve())
+
+
+# ---- servers ----
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, groq_port, work_dir, sync_threads):
+    env = {
+        **os.environ,
+        "PYTHONPATH": HERE,
+        "GROQ_API_KEY": "fake",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+        "GROQ_AUDIO_RPM": "1000000000",
+        "GROQ_CHAT_RPM": "1000000000",
+        "AUDIO_IN_MEMORY": "true",
+        "PRODUCT_LLM_DEADLINE_SECONDS": "0",  # wait for the LLM, so no late session updates outlive a run
+        "LOG_LEVEL": "WARNING",
+        "METRICS_ENABLED": os.getenv("METRICS_ENABLED", "false")
+    }
+    command = [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", "--workers", "1",
+               "--timeout", "300", "--backlog", "4096", "--log-level", "warning"]
+    if mode == "sync":
+        command += ["-k", "gthread", "--threads", str(sync_threads), "app:app"]
+    else:
+        command += ["-k", "asgi", "--worker-connections", "10000", "asgi:app"]
+    server = subprocess.Popen(command, cwd=work_dir, env=env)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise SystemExit(f"❌ {mode} server did not start")
+
+
+def process_tree(pid):
+    children = [pid]
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return children
+
+
+def sample_usage(pid):
+    """(RSS in MB, threads) summed over the gunicorn master and its worker"""
+    rss_kb = threads = 0
+    for child in process_tree(pid):
+        try:
+            with open(f"/proc/{child}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+                    elif line.startswith("Threads:"):
+                        threads += int(line.split()[1])
+        except OSError:
+            continue
+    return rss_kb / 1024, threads
+
+
+class UsageSampler(threading.Thread):
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak_rss = 0.0
+        self.peak_threads = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            rss, threads = sample_usage(self.pid)
+            self.peak_rss = max(self.peak_rss, rss)
+            self.peak_threads = max(self.peak_threads, threads)
+            time.sleep(0.1)
+
+
+# ---- load ----
+
+async def fire(port, requests, concurrency):
+    import httpx
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(600)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(client, i):
+        audio = i.to_bytes(4, "big") * 512  # unique 2 KB payload per upload
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"http://127.0.0.1:{port}/upload_product_audio",
+                    files={"audio": ("recording.webm", audio, "audio/webm")}
+                )
+                if response.status_code != 200:
+                    errors.append(f"{response.status_code} {response.text[:80]}")
+                    return
+            except Exception as e:
+                errors.append(type(e).__name__)
+                return
+            latencies.append(time.perf_counter() - start)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    return elapsed, sorted(latencies), errors
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def bench_mode(mode, groq_port, requests, concurrency, sync_threads):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as work_dir:
+        server = start_server(mode, port, groq_port, work_dir, sync_threads)
+        try:
+            idle_rss, idle_threads = sample_usage(server.pid)
+            sampler = UsageSampler(server.pid)
+            sampler.start()
+            elapsed, latencies, errors = asyncio.run(fire(port, requests, concurrency))
+            sampler.running = False
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+    return {
+        "mode": mode,
+        "ok": len(latencies),
+        "errors": len(errors),
+        "firstError": errors[0] if errors else "",
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "idleRss": idle_rss,
+        "peakRss": sampler.peak_rss,
+        "peakThreads": sampler.peak_threads
+    }
+
+
+def main(argv):
+    def option(name, default):
+        return argv[argv.index(name) + 1] if name in argv else default
+
+    if "--fake-groq" in argv:
+        run_fake_groq(int(option("--fake-groq", "0")), float(option("--groq-delay", "1.0")))
+        return 0
+
+    requests = int(option("--requests", "1000"))
+    concurrency = int(option("--concurrency", "500"))
+    delay = float(option("--groq-delay", "1.0"))
+    sync_threads = int(option("--sync-threads", "64"))
+    modes = option("--modes", "sync,async").split(",")
+
+    groq_port = free_port()
+    fake = subprocess.Popen([sys.executable, __file__, "--fake-groq", str(groq_port), "--groq-delay", str(delay)])
+    try:
+        time.sleep(0.5)
+        print(f"🎭 Fake Groq on :{groq_port}, {delay:g}s per call (Whisper + LLM = {2 * delay:g}s per upload)")
+        print(f"🚀 {requests} product uploads, {concurrency} in flight, one gunicorn worker per mode")
+        results = []
+        for mode in modes:
+            label = f"sync ({sync_threads} threads)" if mode == "sync" else "async"
+            print(f"\n⏳ {label}...")
+            result = bench_mode(mode, groq_port, requests, concurrency, sync_threads)
+            result["label"] = label
+            results.append(result)
+            if result["errors"]:
+                print(f"   ⚠️ {result['errors']} failed, first: {result['firstError']}")
+    finally:
+        fake.terminate()
+
+    print(f"\n{'mode':<20}{'ok':>6}{'err':>6}{'req/s':>9}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}"
+          f"{'idle MB':>9}{'peak MB':>9}{'threads':>9}")
+    for r in results:
+        print(f"{r['label']:<20}{r['ok']:>6}{r['errors']:>6}{r['throughput']:>9.1f}{r['p50']:>8.2f}{r['p95']:>8.2f}"
+              f"{r['p99']:>8.2f}{r['idleRss']:>9.1f}{r['peakRss']:>9.1f}{r['peakThreads']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
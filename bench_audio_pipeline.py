@@ -0,0 +1,111 @@
+"""Compare the ways transcribe_audio can hand a recording to Whisper.
+
+For every AUDIO_TRANSCODE mode this reports the bytes that would go over the
+wire and the wall time to prepare them. The "wav" row is the disk path the
+app uses by default: convert next to the upload, then reopen the WAV. The
+other rows are encoded in memory. Every decoding mode runs twice, without
+and with silence trimming (AUDIO_TRIM_SILENCE), and reports the seconds of
+audio left to send.
+
+Usage:
+    python bench_audio_pipeline.py recording.webm [more.webm ...] [--live] [--runs N]
+
+--live also sends each payload to Groq Whisper (needs GROQ_API_KEY), adds
+the API round trip to the wall time, and scores each trimmed transcript
+against the untrimmed one of the same mode (word-level similarity).
+"""
+import difflib
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+import app
+
+MODES = ["wav", "original", "flac", "opus"]
+
+
+def prepare_wav_on_disk(path):
+    """The default path: export a WAV next to the upload and read it back"""
+    from pydub import AudioSegment
+    work_dir = tempfile.mkdtemp()
+    try:
+        webm_path = os.path.join(work_dir, "audio.webm")
+        shutil.copyfile(path, webm_path)
+        wav_path = os.path.join(work_dir, "audio.wav")
+        app.condition_audio(AudioSegment.from_file(webm_path)).export(wav_path, format="wav")
+        with open(wav_path, "rb") as f:
+            return "audio.wav", f.read()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def prepare(path, mode):
+    if mode == "wav":
+        return prepare_wav_on_disk(path)
+    with open(path, "rb") as f:
+        return app.encode_for_whisper(f.read(), mode)
+
+
+def bench(path, mode, runs, live, trim):
+    app.AUDIO_TRIM_SILENCE = trim
+    timings = []
+    payload = b""
+    transcript = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        filename, payload = prepare(path, mode)
+        if live:
+            transcript = app.request_transcription((filename, payload))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return len(payload), timings[len(timings) // 2], payload_seconds(filename, payload), transcript
+
+
+def payload_seconds(filename, payload):
+    """Duration of the audio in a payload, or None if it cannot be decoded"""
+    import io
+    from pydub import AudioSegment
+    try:
+        return AudioSegment.from_file(io.BytesIO(payload), format=os.path.splitext(filename)[1][1:]).duration_seconds
+    except Exception:
+        return None
+
+
+def agreement(reference, text):
+    return difflib.SequenceMatcher(None, reference.lower().split(), text.lower().split()).ratio()
+
+
+def main(argv):
+    live = "--live" in argv
+    runs = 3
+    if "--runs" in argv:
+        runs = int(argv[argv.index("--runs") + 1])
+    paths = [a for i, a in enumerate(argv) if not a.startswith("--") and (i == 0 or argv[i - 1] != "--runs")]
+    if not paths:
+        print(__doc__)
+        return 1
+
+    for path in paths:
+        source_size = os.path.getsize(path)
+        print(f"\n📁 {path} ({source_size / 1024:.1f} KB)")
+        print(f"{'mode':<10}{'trim':>6}{'bytes sent':>14}{'vs wav':>10}{'audio s':>10}{'median s':>12}"
+              + (f"{'agree':>8}" if live else ""))
+        baseline = None
+        for mode in MODES:
+            reference = None
+            for trim in ([False] if mode == "original" else [False, True]):
+                size, seconds, audio_seconds, transcript = bench(path, mode, runs, live, trim)
+                baseline = baseline or size
+                audio = f"{audio_seconds:.1f}" if audio_seconds is not None else "-"
+                row = f"{mode:<10}{'on' if trim else 'off':>6}{size:>14,}{size / baseline:>10.2f}{audio:>10}{seconds:>12.3f}"
+                if live:
+                    row += f"{agreement(reference, transcript):>8.2f}" if trim else f"{'':>8}"
+                reference = transcript
+                print(row)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,81 @@
+"""Compare per-transcript and batched LLM product extraction on a replay corpus.
+
+Runs every transcript through extract_products_llm one call at a time, then
+through extract_products_llm_batch, both bypassing the product cache, and
+reports Groq calls, tokens, products found and tokens per product for each.
+Needs GROQ_API_KEY; the token counts come from the API's usage figures.
+
+The corpus is a text file with one transcript per line. Without one, the
+product inputs (PE-xx) from test_cases.md are used.
+
+Usage:
+    python bench_llm_batching.py [corpus.txt] [--repeat N] [--batch-size N]
+"""
+import os
+import re
+import sys
+import time
+
+import app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_corpus(path):
+    if path:
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip()]
+    with open(os.path.join(HERE, "test_cases.md")) as f:
+        cases = f.read()
+    return re.findall(r'### PE-\d+:.*?\n\*\*Input\*\*: "([^"]+)"', cases)
+
+
+def chat_usage():
+    stats = app.GROQ_ENDPOINTS["chat"].stats()
+    return stats["succeeded"], stats["promptTokens"], stats["completionTokens"]
+
+
+def run(label, extract, corpus):
+    calls0, prompt0, completion0 = chat_usage()
+    start = time.perf_counter()
+    results = extract(corpus)
+    elapsed = time.perf_counter() - start
+    calls1, prompt1, completion1 = chat_usage()
+
+    products = sum(len(r) for r in results if r)
+    missing = sum(1 for r in results if r is None)
+    tokens = (prompt1 - prompt0) + (completion1 - completion0)
+    per_product = tokens / products if products else float("nan")
+    print(f"{label:<10}{calls1 - calls0:>7}{prompt1 - prompt0:>10,}{completion1 - completion0:>12,}"
+          f"{products:>10}{missing:>9}{per_product:>12.1f}{elapsed:>10.2f}")
+    return per_product
+
+
+def main(argv):
+    repeat = 1
+    if "--repeat" in argv:
+        repeat = int(argv[argv.index("--repeat") + 1])
+    if "--batch-size" in argv:
+        app.PRODUCT_BATCH_SIZE = int(argv[argv.index("--batch-size") + 1])
+    values = {argv[i + 1] for i, a in enumerate(argv[:-1]) if a in ("--repeat", "--batch-size")}
+    paths = [a for a in argv if not a.startswith("--") and a not in values]
+
+    corpus = load_corpus(paths[0] if paths else None) * repeat
+    if not corpus:
+        print("❌ Empty corpus")
+        return 1
+    if app.get_groq_client() is None:
+        print("❌ GROQ_API_KEY is required to measure token usage")
+        return 1
+
+    print(f"📚 {len(corpus)} transcripts, batch size {app.PRODUCT_BATCH_SIZE}")
+    print(f"{'mode':<10}{'calls':>7}{'prompt':>10}{'completion':>12}{'products':>10}{'missing':>9}{'tok/product':>12}{'seconds':>10}")
+    single = run("single", lambda texts: [app.extract_products_llm(t, refresh=True) for t in texts], corpus)
+    batched = run("batched", lambda texts: app.extract_products_llm_batch(texts, refresh=True), corpus)
+    if single == single and batched == batched:
+        print(f"\n📉 tokens per product: {single:.1f} -> {batched:.1f} ({(1 - batched / single) * 100:.0f}% less)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
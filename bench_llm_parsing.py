@@ -0,0 +1,117 @@
+"""Replay LLM product answers through the old and the tolerant parser.
+
+Reads answers recorded with PRODUCT_LLM_RECORD_PATH (one JSON object per
+line with a "response" field) and reports how many each parser accepts, how
+many products come out, and the salvage rate: the share of answers the old
+parser rejected that the new one still recovered products from. Batch
+answers are skipped since they have their own per-entry validation.
+
+Without a recording, a synthetic corpus is built by damaging well-formed
+answers the way real ones break: truncation, trailing commas, prose around
+the JSON and a stray unquoted value.
+
+Usage:
+    python bench_llm_parsing.py [recorded.jsonl] [--synthetic N]
+"""
+import json
+import random
+import sys
+import time
+
+import app
+
+SAMPLE_PRODUCTS = [
+    {"name": "Premium Basmati Rice", "price": 120, "unit": "kg", "unitQuantity": 50, "minimumOrderQuantity": 5,
+     "category": "Groceries", "subcategory": "Rice", "description": "Aged basmati rice"},
+    {"name": "Coconut Oil", "price": 200, "unit": "liter", "unitQuantity": 20, "minimumOrderQuantity": 1,
+     "category": "Groceries", "subcategory": "Oil", "description": "Cold pressed coconut oil"},
+    {"name": "Toor Dal", "price": 140, "unit": "kg", "unitQuantity": 30, "minimumOrderQuantity": 2,
+     "category": "Groceries", "subcategory": "Pulses", "description": "Unpolished toor dal"},
+    {"name": "Eggs", "price": 60, "unit": "dozen", "unitQuantity": 10, "minimumOrderQuantity": 1,
+     "category": "Groceries", "subcategory": "Dairy", "description": "Farm fresh eggs"},
+]
+
+
+def old_parse(result):
+    """The parser extract_products_llm used before: fences, json.loads, list or nothing"""
+    result = result.strip()
+    if "```json" in result:
+        result = result.split("```json")[1].split("```")[0].strip()
+    elif "```" in result:
+        result = result.split("```")[1].split("```")[0].strip()
+    try:
+        products = json.loads(result)
+    except json.JSONDecodeError:
+        return None
+    return products if isinstance(products, list) else None
+
+
+def synthetic_corpus(count, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        products = rng.sample(SAMPLE_PRODUCTS, rng.randint(1, len(SAMPLE_PRODUCTS)))
+        text = json.dumps(products)
+        damage = rng.choice(["none", "truncate", "trailing comma", "prose", "unquoted", "fenced"])
+        if damage == "truncate":
+            text = text[:rng.randint(len(text) // 3, len(text) - 2)]
+        elif damage == "trailing comma":
+            text = text.replace("}", ",}", 1)
+        elif damage == "prose":
+            text = f"Here are the products I found:\n{text}\nLet me know if you need anything else."
+        elif damage == "unquoted":
+            text = text.replace('"kg"', "kg", 1)
+        elif damage == "fenced":
+            text = f"```json\n{text}\n```"
+        corpus.append(text)
+    return corpus
+
+
+def load_recording(path):
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return [entry["response"] for entry in entries if entry.get("kind", "single") == "single"]
+
+
+def main(argv):
+    paths = [a for i, a in enumerate(argv) if not a.startswith("--") and (i == 0 or argv[i - 1] != "--synthetic")]
+    if paths:
+        corpus = load_recording(paths[0])
+        print(f"📼 {len(corpus)} recorded answers from {paths[0]}")
+    else:
+        count = int(argv[argv.index("--synthetic") + 1]) if "--synthetic" in argv else 500
+        corpus = synthetic_corpus(count)
+        print(f"🧪 {len(corpus)} synthetic answers")
+    if not corpus:
+        return 1
+
+    old_ok = old_products = 0
+    start = time.perf_counter()
+    for text in corpus:
+        products = old_parse(text)
+        if products is not None:
+            old_ok += 1
+            old_products += len(products)
+    old_seconds = time.perf_counter() - start
+
+    outcomes = {"strict": 0, "salvaged": 0, "failed": 0}
+    new_products = 0
+    start = time.perf_counter()
+    for text in corpus:
+        products, outcome = app.parse_products_response(text)
+        outcomes[outcome] += 1
+        new_products += len(products)
+    new_seconds = time.perf_counter() - start
+
+    rejected_before = len(corpus) - old_ok
+    print(f"{'parser':<10}{'accepted':>10}{'products':>10}{'us/answer':>12}")
+    print(f"{'old':<10}{old_ok:>10}{old_products:>10}{old_seconds / len(corpus) * 1e6:>12.1f}")
+    print(f"{'tolerant':<10}{outcomes['strict'] + outcomes['salvaged']:>10}{new_products:>10}{new_seconds / len(corpus) * 1e6:>12.1f}")
+    print(f"\nstrict {outcomes['strict']}, salvaged {outcomes['salvaged']}, failed {outcomes['failed']}")
+    if rejected_before:
+        print(f"🩹 salvage rate: {outcomes['salvaged'] / rejected_before:.1%} of the {rejected_before} answers the old parser rejected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
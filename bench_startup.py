@@ -0,0 +1,52 @@
+"""Check that importing the app stays fast and offline.
+
+Imports app.py in a fresh interpreter with the Groq API pointed at an
+unroutable address, so any network call made during import would hang until
+its timeout. Fails if the import takes longer than the budget.
+
+Usage:
+    python bench_startup.py [--budget SECONDS] [--runs N]
+"""
+import os
+import subprocess
+import sys
+import time
+
+BLACKHOLE_URL = "http://10.255.255.1:9"  # non-routable: connects hang instead of failing
+
+
+def time_import():
+    env = dict(os.environ)
+    env["GROQ_BASE_URL"] = BLACKHOLE_URL
+    env.setdefault("GROQ_API_KEY", "offline-benchmark-key")
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import app"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL
+    )
+    return time.perf_counter() - start
+
+
+def main(argv):
+    budget = 2.0
+    runs = 3
+    if "--budget" in argv:
+        budget = float(argv[argv.index("--budget") + 1])
+    if "--runs" in argv:
+        runs = int(argv[argv.index("--runs") + 1])
+
+    timings = sorted(time_import() for _ in range(runs))
+    median = timings[len(timings) // 2]
+    print(f"Import times: {', '.join(f'{t:.3f}s' for t in timings)}")
+    print(f"Median: {median:.3f}s (budget {budget:.1f}s)")
+
+    assert median < budget, f"import took {median:.3f}s, over the {budget:.1f}s budget"
+    print("✅ Import finished within budget with the network unavailable")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,90 @@
+"""Measure time-to-first-product on /stream/products against a running server.
+
+Sends each clip as one frame of a chunked POST, pausing --pace seconds
+between clips the way a recorder would, and prints every event as it comes
+back with its arrival time. The first "products" event is the
+time-to-first-product; "final" is when the LLM-refined list was saved.
+
+Usage:
+    python bench_stream_products.py clip1.webm [clip2.webm ...] [--url http://127.0.0.1:5001] [--pace 2] [--session-id ID]
+"""
+import json
+import socket
+import ssl
+import struct
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def option(argv, name, default):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+def main(argv):
+    url = urlparse(option(argv, "--url", "http://127.0.0.1:5001"))
+    pace = float(option(argv, "--pace", "2"))
+    session_id = option(argv, "--session-id", None)
+    values = {option(argv, n, None) for n in ("--url", "--pace", "--session-id")}
+    paths = [a for a in argv if not a.startswith("--") and a not in values]
+    if not paths:
+        print(__doc__)
+        return 1
+
+    port = url.port or (443 if url.scheme == "https" else 80)
+    sock = socket.create_connection((url.hostname, port))
+    if url.scheme == "https":
+        sock = ssl.create_default_context().wrap_socket(sock, server_hostname=url.hostname)
+    target = "/stream/products" + (f"?session_id={session_id}" if session_id else "")
+    sock.sendall((
+        f"POST {target} HTTP/1.1\r\nHost: {url.hostname}\r\n"
+        "Content-Type: application/octet-stream\r\nTransfer-Encoding: chunked\r\n\r\n"
+    ).encode())
+
+    start = time.perf_counter()
+    first_product = []
+
+    def read_events():
+        buffer = b""
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b"\r\n")
+            for line in lines:
+                if not line.startswith(b"{"):
+                    continue
+                event = json.loads(line)
+                elapsed = time.perf_counter() - start
+                detail = event.get("text") or event.get("error") or ", ".join(p.get("name", "") for p in event.get("products", []))
+                print(f"{elapsed:7.2f}s  {event['event']:<11}{detail[:70]}")
+                if event["event"] == "products" and not first_product:
+                    first_product.append(elapsed)
+                if event["event"] == "final":
+                    return
+
+    reader = threading.Thread(target=read_events)
+    reader.start()
+    for i, path in enumerate(paths):
+        if i:
+            time.sleep(pace)
+        with open(path, "rb") as f:
+            clip = f.read()
+        frame = struct.pack(">I", len(clip)) + clip
+        sock.sendall(b"%x\r\n" % len(frame) + frame + b"\r\n")
+        print(f"{time.perf_counter() - start:7.2f}s  sent       {path} ({len(clip) / 1024:.1f} KB)")
+    sock.sendall(b"0\r\n\r\n")
+    reader.join()
+    sock.close()
+
+    if first_product:
+        print(f"\n⏱️ time to first product: {first_product[0]:.2f}s")
+    else:
+        print("\n⚠️ no provisional products were reported")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
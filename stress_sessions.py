@@ -0,0 +1,105 @@
+"""Hammer the session store from several processes and threads at once.
+
+Each worker process imports the app against a scratch data folder and its
+threads append products to a handful of shared sessions through
+update_session, while also creating new sessions. Afterwards every product
+must be present exactly once and every created session must have its own
+file, otherwise updates were lost or sessions collided.
+
+Usage:
+    python stress_sessions.py [--processes N] [--threads N] [--updates N] [--sessions N]
+"""
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_app(work_dir):
+    os.chdir(work_dir)
+    sys.path.insert(0, HERE)
+    import app
+    return app
+
+
+def worker(work_dir, worker_id, threads, updates, session_ids, created):
+    app = load_app(work_dir)
+
+    def run(thread_id):
+        for n in range(updates):
+            session_id = session_ids[(thread_id + n) % len(session_ids)]
+            product = {"name": f"p{worker_id}-{thread_id}-{n}", "price": n, "quantity": 1}
+            app.update_session(session_id, lambda data: data["products"].append(product))
+            if n % 10 == 0:
+                created.append(app.create_session(app.blank_session()))
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def main(argv):
+    def option(name, default):
+        return int(argv[argv.index(name) + 1]) if name in argv else default
+
+    processes = option("--processes", 4)
+    threads = option("--threads", 8)
+    updates = option("--updates", 50)
+    sessions = option("--sessions", 3)
+
+    work_dir = tempfile.mkdtemp(prefix="stress_sessions_")
+    app = load_app(work_dir)
+    session_ids = [app.create_session(app.blank_session()) for _ in range(sessions)]
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager:
+        created = manager.list()
+        start = time.perf_counter()
+        procs = [
+            ctx.Process(target=worker, args=(work_dir, p, threads, updates, session_ids, created))
+            for p in range(processes)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+        created = list(created)
+
+    if any(p.exitcode for p in procs):
+        print("❌ A worker process crashed")
+        return 1
+
+    names = []
+    for session_id in session_ids:
+        with open(os.path.join(work_dir, app.DATA_FOLDER, session_id)) as f:
+            names.extend(product["name"] for product in json.load(f)["products"])
+
+    expected = processes * threads * updates
+    missing_files = [s for s in created if not os.path.exists(os.path.join(work_dir, app.DATA_FOLDER, s))]
+    indexed = len(app.session_filenames())
+
+    print(f"📂 {work_dir}")
+    print(f"⏱️ {expected} updates + {len(created)} creates in {elapsed:.2f}s "
+          f"({processes} processes x {threads} threads)")
+    print(f"🛒 products stored: {len(names)} / {expected} (unique: {len(set(names))})")
+    print(f"📁 sessions created: {len(created)} (distinct ids: {len(set(created))}, missing files: {len(missing_files)})")
+    print(f"🗂️ indexed sessions: {indexed} / {len(session_ids) + len(created)}")
+
+    ok = (len(names) == len(set(names)) == expected
+          and len(set(created)) == len(created)
+          and not missing_files
+          and indexed == len(session_ids) + len(created))
+    print("✅ No lost updates or collisions" if ok else "❌ Lost updates or colliding sessions")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))